@@ -2,19 +2,42 @@
 API FastAPI pour exposer les services STT et TTS
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Header, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, JSONResponse, StreamingResponse, FileResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, TYPE_CHECKING
+from concurrent.futures import Future
+from functools import partial
+import asyncio
+import base64
+import json
 import logging
 import os
 import tempfile
 import time
 from pathlib import Path
 
-from services.speech_to_text import SpeechToTextService
 from services.text_to_speech import TextToSpeechService
+from services.tts_cache import AudioCache
+from services.tts_registry import TTSRegistry
+from services.worker_pool import WorkerPool, process_memory
+from services.result_cache import ResultCache
+from services.batch_scheduler import MicroBatchScheduler
+from services.audio_io import DecodedAudio, StreamDecoder
+from services.streaming_stt import StreamingTranscriber
+from services.inference_executor import BoundedExecutor, QueueFullError
+from services.tts_streaming import AudioStreamAssembler, split_sentences, synthesize_pipelined
+from services.translation import OfflineTranslator, Translator, create_translator
+from services.metrics import REGISTRY, observe_stage, stage_timer
+from services.profiling import RequestProfiler
+from services.stub_backends import StubSpeechToTextService, StubTTSRegistry
+from services.startup import StartupTracker, LOADING, WARMING, READY, FAILED
+
+if TYPE_CHECKING:
+    # Modules lourds (Whisper, PyTorch, librosa) importés au chargement des modèles
+    from services.speech_to_text import SpeechToTextService
+    from services.long_audio import LongAudioTranscriber
 
 # Configuration du logging
 logging.basicConfig(
@@ -40,42 +63,512 @@ app.add_middleware(
 )
 
 # Initialiser les services
-stt_service: Optional[SpeechToTextService] = None
-tts_service: Optional[TextToSpeechService] = None
+stt_service: Optional["SpeechToTextService"] = None
+stt_pool: Optional[WorkerPool] = None
+stt_scheduler: Optional[MicroBatchScheduler] = None
+tts_registry: Optional[TTSRegistry] = None
+tts_pool: Optional[WorkerPool] = None
+tts_config: dict = {}
+stt_config: dict = {}
+
+# Enregistrements longs : découpés aux silences et transcrits en parallèle
+stt_long_audio: Optional["LongAudioTranscriber"] = None
+long_audio_threshold: float = 0.0
+
+# Exécuteurs dédiés : les inférences bloquantes ne tournent jamais dans la boucle
+# d'événements, /health et /info restent réactifs même à pleine charge
+stt_executor: Optional[BoundedExecutor] = None
+tts_executor: Optional[BoundedExecutor] = None
+
+# Traduction du pipeline parole -> parole (repli hors ligne si le backend échoue)
+translator: Optional[Translator] = None
+fallback_translator = OfflineTranslator()
+
+# Profilage à la demande (en-tête X-Profile ou échantillonnage)
+profiler: Optional[RequestProfiler] = None
+
+# Chargement des modèles en arrière-plan (sondes /health/live et /health/ready)
+startup = StartupTracker(("stt", "tts"))
+loading_task: Optional[asyncio.Task] = None
+# Pré-chauffage du cache TTS (référence conservée jusqu'à la fin de la tâche)
+tts_warmup_task = None
+
+
+def service_stats(field: str, pool_field: Optional[str] = None):
+    """
+    Lecture d'une statistique des exécuteurs STT/TTS au moment de l'export
+    (statistique du pool de workers à la place quand il est actif et pool_field donné)
+    """
+    def collect() -> dict:
+        values = {}
+        for name, executor, pool in (("stt", stt_executor, stt_pool), ("tts", tts_executor, tts_pool)):
+            if pool is not None and pool_field is not None:
+                values[(name,)] = pool.get_stats()[pool_field]
+            elif executor is not None:
+                values[(name,)] = executor.get_stats()[field]
+        return values
+    return collect
+
+
+# Métriques de l'API (les durées d'étapes sont enregistrées par les services)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "transvoicer_http_requests_in_flight",
+    "Requêtes HTTP en cours de traitement"
+)
+HTTP_DURATION = REGISTRY.histogram(
+    "transvoicer_http_request_duration_seconds",
+    "Durée des requêtes HTTP (jusqu'à l'envoi des en-têtes)",
+    ("method", "route", "status")
+)
+REGISTRY.gauge(
+    "transvoicer_queue_depth",
+    "Appels en attente d'un exécuteur ou d'un worker",
+    ("service",),
+    callback=service_stats("queued", "queue_depth")
+)
+REGISTRY.gauge(
+    "transvoicer_jobs_in_flight",
+    "Appels admis (en cours ou en attente)",
+    ("service",),
+    callback=service_stats("in_flight")
+)
+REGISTRY.gauge(
+    "transvoicer_busy_workers",
+    "Workers (ou threads d'exécution) occupés",
+    ("service",),
+    callback=service_stats("running", "busy_workers")
+)
+
+
+def worker_memory() -> dict:
+    """RSS et PSS de chaque worker des pools STT/TTS (octets)"""
+    values = {}
+    for name, pool in (("stt", stt_pool), ("tts", tts_pool)):
+        if pool is None:
+            continue
+        for worker_id, memory in pool.get_memory()["workers"].items():
+            for kind in ("rss", "pss"):
+                values[(name, str(worker_id), kind)] = memory[f"{kind}_mb"] * 1024 * 1024
+    return values
+
+
+REGISTRY.gauge(
+    "transvoicer_worker_memory_bytes",
+    "Mémoire des workers : rss (pages partagées comptées en entier) et pss (réparties)",
+    ("service", "worker", "kind"),
+    callback=worker_memory
+)
+
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """Requêtes en cours et durée par route"""
+    start_time = time.perf_counter()
+    status = 500
+    with HTTP_IN_FLIGHT.track():
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            HTTP_DURATION.observe(
+                time.perf_counter() - start_time,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            )
+
+
+def stt_available() -> bool:
+    """Le STT est disponible en local ou via le pool de workers"""
+    return stt_service is not None or stt_pool is not None
+
+
+def tts_available() -> bool:
+    """Le TTS est disponible en local ou via le pool de workers"""
+    return tts_registry is not None or tts_pool is not None
+
+
+def start_profile(x_profile: Optional[str]) -> Optional[str]:
+    """Identifiant de profil si la requête doit être profilée, sinon None"""
+    if profiler is None or not profiler.should_profile(x_profile):
+        return None
+    return profiler.new_profile()
+
+
+def profiled(fn, profile_id: Optional[str], label: str):
+    """fn profilée dans le thread qui l'exécute si la requête l'est, sinon inchangée"""
+    if profile_id is None:
+        return fn
+    return profiler.wrap(fn, profile_id, label)
+
+
+def profile_headers(profile_id: Optional[str]) -> dict:
+    """En-tête X-Profile-Id des réponses profilées (et nettoyage des anciens profils)"""
+    if profile_id is None:
+        return {}
+    profiler.prune()
+    return {"X-Profile-Id": profile_id}
+
+
+async def run_service(
+    executor: BoundedExecutor,
+    pool: Optional[WorkerPool],
+    service,
+    method: str,
+    *args,
+    wait: bool = False,
+    profile_id: Optional[str] = None,
+    **kwargs
+):
+    """
+    Exécute une méthode d'un service hors de la boucle d'événements
+    (pool de workers si configuré, sinon exécuteur de threads borné)
+    
+    Args:
+        wait: Attendre une place libre au lieu d'échouer si la file est pleine
+        profile_id: Profiler l'appel sous cet identifiant (dans le worker avec le pool)
+    
+    Raises:
+        QueueFullError: file d'attente pleine (wait=False)
+    """
+    if pool is not None:
+        profile = (str(profiler.output_dir), profile_id, method) if profile_id else None
+        async with executor.slot(wait=wait):
+            start_time = time.perf_counter()
+            result = await asyncio.wrap_future(pool.submit(method, *args, profile=profile, **kwargs))
+            executor.record_service_time(time.perf_counter() - start_time)
+            return result
+    call = profiled(getattr(service, method), profile_id, method)
+    if wait:
+        return await executor.run_waiting(call, *args, **kwargs)
+    return await executor.run(call, *args, **kwargs)
+
+
+async def run_stt(method: str, *args, **kwargs):
+    """Exécute une méthode du service STT (voir run_service)"""
+    return await run_service(stt_executor, stt_pool, stt_service, method, *args, **kwargs)
+
+
+async def run_tts(method: str, *args, **kwargs):
+    """Exécute une méthode du service TTS (voir run_service)"""
+    return await run_service(tts_executor, tts_pool, tts_registry, method, *args, **kwargs)
+
+
+def overloaded(error: QueueFullError) -> HTTPException:
+    """Réponse 503 avec Retry-After quand la file d'attente est pleine"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialise les services au démarrage"""
-    global stt_service, tts_service
-    
+    """
+    Lit la configuration et crée les exécuteurs, puis charge les modèles en
+    arrière-plan : le port est ouvert aussitôt, /health/ready indique quand les
+    services sont chargés et pré-chauffés (STARTUP_BLOCKING=true : attendre ici)
+    """
+    global stt_config, tts_config, stt_executor, tts_executor, long_audio_threshold
+    global translator, profiler, loading_task
+
     try:
-        # Initialiser STT
+        # Configuration STT
         model_size = os.getenv("WHISPER_MODEL_SIZE", "base")
         language = os.getenv("STT_LANGUAGE", "pt")
         preprocess = os.getenv("STT_PREPROCESS", "true").lower() == "true"
-        
-        stt_service = SpeechToTextService(
-            model_size=model_size,
-            language=language,
-            preprocess=preprocess
+        reload_per_request = os.getenv("STT_RELOAD_MODEL", "false").lower() == "true"
+        stt_workers = int(os.getenv("STT_WORKERS", "0"))
+        cache_size = int(os.getenv("STT_CACHE_SIZE", "128"))
+        cache_dir = os.getenv("STT_CACHE_DIR") or None
+        batch_window_ms = float(os.getenv("STT_BATCH_WINDOW_MS", "0"))
+        batch_max_size = int(os.getenv("STT_BATCH_MAX_SIZE", "8"))
+        long_audio_threshold = float(os.getenv("STT_LONG_AUDIO_S", "30"))
+        stt_warmup = os.getenv("STT_WARMUP", "true").lower() == "true"
+        mmap_weights = os.getenv("STT_MMAP_WEIGHTS", "false").lower() == "true"
+
+        # Concurrence par défaut : un appel par worker, ou assez d'appels simultanés
+        # pour remplir un lot quand le micro-batching est actif
+        default_concurrency = stt_workers or (batch_max_size if batch_window_ms > 0 else 1)
+        stt_executor = BoundedExecutor(
+            max_concurrency=int(os.getenv("STT_MAX_CONCURRENCY") or default_concurrency),
+            max_queue=int(os.getenv("STT_MAX_QUEUE", "16")),
+            name="stt"
         )
-        logger.info("Service STT initialisé")
-        
-        # Initialiser TTS
+
+        stt_config = {
+            "model_size": model_size,
+            "language": language,
+            "preprocess": preprocess,
+            "reload_per_request": reload_per_request,
+            "cache_size": cache_size,
+            "cache_dir": cache_dir,
+            "mmap_weights": mmap_weights,
+            "weights_dir": os.getenv("STT_WEIGHTS_DIR") or None
+        }
+
+        # Backend simulé (tests de charge) : durée d'inférence sans modèle
+        stub_busy = os.getenv("STUB_BUSY", "false").lower() == "true"
+        stt_backend = os.getenv("STT_BACKEND", "whisper")
+        if stt_backend == "stub":
+            stt_config.update(
+                rtf=float(os.getenv("STUB_STT_RTF", "0.1")),
+                base_latency=float(os.getenv("STUB_STT_LATENCY_MS", "50")) / 1000,
+                busy=stub_busy
+            )
+        elif stt_backend != "whisper":
+            raise ValueError(f"STT_BACKEND inconnu: {stt_backend} (attendu: whisper, stub)")
+
+        # Configuration TTS
         tts_engine = os.getenv("TTS_ENGINE", "pyttsx3")
         tts_language = os.getenv("TTS_LANGUAGE", "fr")
-        
-        tts_service = TextToSpeechService(
-            engine=tts_engine,
-            language=tts_language
+
+        tts_workers = int(os.getenv("TTS_WORKERS", "0"))
+
+        # Combinaisons moteur:langue[:voix] initialisées dès le démarrage
+        tts_preload = [spec for spec in os.getenv("TTS_PRELOAD", "").split(",") if spec.strip()]
+
+        tts_config = {
+            "engine": tts_engine,
+            "language": tts_language,
+            "preload": tts_preload,
+            "max_services": int(os.getenv("TTS_MAX_ENGINES", "8")),
+            "cache_size": int(os.getenv("TTS_CACHE_SIZE", "256")),
+            "cache_dir": os.getenv("TTS_CACHE_DIR") or None
+        }
+
+        tts_backend = os.getenv("TTS_BACKEND", "engines")
+        if tts_backend == "stub":
+            tts_config.update(
+                base_latency=float(os.getenv("STUB_TTS_LATENCY_MS", "50")) / 1000,
+                seconds_per_char=float(os.getenv("STUB_TTS_MS_PER_CHAR", "2")) / 1000,
+                busy=stub_busy
+            )
+        elif tts_backend != "engines":
+            raise ValueError(f"TTS_BACKEND inconnu: {tts_backend} (attendu: engines, stub)")
+
+        # pyttsx3 n'est pas réentrant : une synthèse à la fois par défaut
+        # (une par worker avec le pool)
+        tts_executor = BoundedExecutor(
+            max_concurrency=int(os.getenv("TTS_MAX_CONCURRENCY") or tts_workers or 1),
+            max_queue=int(os.getenv("TTS_MAX_QUEUE", "16")),
+            name="tts"
         )
-        logger.info("Service TTS initialisé")
-        
+
+        # Traduction : gemini si GEMINI_API_KEY est définie, sinon hors ligne
+        translator = create_translator(os.getenv("TRANSLATION_BACKEND") or None)
+        if translator is not None:
+            logger.info(f"Traduction: backend {translator.name}")
+
+        # Profils écrits dans un dossier partagé avec les workers
+        profiler = RequestProfiler(
+            output_dir=os.getenv("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "transvoicer-profiles"),
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            max_profiles=int(os.getenv("PROFILE_MAX", "50")),
+            token=os.getenv("PROFILE_TOKEN") or None
+        )
+
     except Exception as e:
         logger.error(f"Erreur lors de l'initialisation: {e}")
         raise
 
+    loading_task = asyncio.create_task(load_services(
+        stt_backend, stt_workers, stt_warmup, batch_window_ms, batch_max_size,
+        tts_backend, tts_workers
+    ))
+    if os.getenv("STARTUP_BLOCKING", "false").lower() == "true":
+        await loading_task
+        if not startup.is_ready():
+            raise RuntimeError("Échec du chargement des services (voir /health/ready)")
+
+
+def load_stt(backend: str, workers: int, warm_up: bool, batch_window_ms: float, batch_max_size: int):
+    """
+    Charge le STT (thread d'arrière-plan) puis le publie : les routes ne voient
+    le service qu'une fois chargé et pré-chauffé
+    """
+    global stt_service, stt_pool, stt_scheduler, stt_long_audio
+
+    service = None
+    pool = None
+    with startup.phase("stt", LOADING, f"{backend} {stt_config['model_size']}"):
+        if backend == "stub":
+            factory = StubSpeechToTextService
+        else:
+            # Whisper et PyTorch ne sont importés qu'ici, après l'ouverture du port
+            from services.speech_to_text import SpeechToTextService
+            factory = SpeechToTextService
+
+        if workers > 0 and backend == "whisper" and stt_config["mmap_weights"]:
+            # Conversion faite une seule fois ici : les workers ne font que mapper le fichier
+            from services.shared_weights import ensure_checkpoint
+            ensure_checkpoint(stt_config["model_size"], stt_config["weights_dir"])
+
+        if workers > 0:
+            # Pool de processus : un modèle Whisper par worker (ou un checkpoint mappé
+            # partagé), file de requêtes partagée ; chaque worker se pré-chauffe avant
+            # de se déclarer prêt
+            pool = WorkerPool(
+                factory,
+                {**stt_config, "warm_up": warm_up},
+                num_workers=workers,
+                name="stt",
+                stats_method="get_cache_stats"
+            )
+            pool.start()
+            logger.info(f"Pool STT initialisé ({workers} workers)")
+        else:
+            service = factory(**stt_config)
+            logger.info("Service STT initialisé")
+
+    if service is not None and warm_up:
+        with startup.phase("stt", WARMING, "transcription d'un extrait synthétique"):
+            service.warm_up()
+
+    scheduler = None
+    if service is not None and batch_window_ms > 0:
+        # Regrouper les requêtes courtes concurrentes en un seul passage Whisper
+        scheduler = MicroBatchScheduler(
+            service,
+            window_ms=batch_window_ms,
+            max_batch_size=batch_max_size
+        )
+        scheduler.start()
+
+    long_audio = None
+    if long_audio_threshold > 0:
+        from services.long_audio import LongAudioTranscriber
+        # Avec le pool, les morceaux sont répartis sur tous les workers ;
+        # sinon ils passent l'un après l'autre dans le service local
+        if pool is not None:
+            submit = partial(pool.submit, "transcribe_array")
+        else:
+            submit = submit_local
+        long_audio = LongAudioTranscriber(submit)
+
+    stt_scheduler, stt_long_audio = scheduler, long_audio
+    stt_service, stt_pool = service, pool
+    startup.set("stt", READY)
+
+
+def load_tts(backend: str, workers: int):
+    """Initialise les moteurs TTS (thread d'arrière-plan) puis les publie"""
+    global tts_registry, tts_pool
+
+    registry = None
+    pool = None
+    with startup.phase("tts", LOADING, f"{backend} {tts_config['engine']}/{tts_config['language']}"):
+        factory = StubTTSRegistry if backend == "stub" else TTSRegistry
+        if workers > 0:
+            # Pool de processus : un registre de moteurs isolé par worker, les
+            # synthèses concurrentes ne partagent ni boucle runAndWait ni réglages
+            pool = WorkerPool(
+                factory,
+                tts_config,
+                num_workers=workers,
+                name="tts"
+            )
+            pool.start()
+            logger.info(f"Pool TTS initialisé ({workers} workers)")
+        else:
+            registry = factory(**tts_config)
+            logger.info("Service TTS initialisé")
+
+    tts_registry, tts_pool = registry, pool
+    startup.set("tts", READY)
+
+
+async def load_services(
+    stt_backend: str,
+    stt_workers: int,
+    stt_warmup: bool,
+    batch_window_ms: float,
+    batch_max_size: int,
+    tts_backend: str,
+    tts_workers: int
+):
+    """Charge STT et TTS en parallèle, hors de la boucle d'événements"""
+    async def start_stt():
+        await asyncio.to_thread(load_stt, stt_backend, stt_workers, stt_warmup, batch_window_ms, batch_max_size)
+
+    async def start_tts():
+        await asyncio.to_thread(load_tts, tts_backend, tts_workers)
+
+        # Pré-chauffage du cache TTS en arrière-plan (une phrase par ligne)
+        warmup_file = os.getenv("TTS_WARMUP_FILE")
+        if warmup_file and (tts_config["cache_size"] > 0 or tts_config["cache_dir"]):
+            try:
+                lines = Path(warmup_file).read_text(encoding="utf-8").splitlines()
+            except OSError as e:
+                # Le TTS est prêt : seul le pré-chauffage est abandonné
+                logger.error(f"Pré-chauffage du cache TTS impossible ({warmup_file}): {e}")
+                return
+            phrases = [line.strip() for line in lines if line.strip()]
+            global tts_warmup_task
+            tts_warmup_task = asyncio.create_task(warm_up_tts_cache(phrases))
+            tts_warmup_task.add_done_callback(log_tts_warmup)
+            logger.info(f"Pré-chauffage du cache TTS: {len(phrases)} phrases depuis {warmup_file}")
+
+    # Les échecs sont consignés par le suivi du démarrage (/health/ready), y compris
+    # ceux survenus hors d'une phase (construction du planificateur...)
+    results = await asyncio.gather(start_stt(), start_tts(), return_exceptions=True)
+    for component, result in zip(("stt", "tts"), results):
+        if isinstance(result, BaseException):
+            logger.error(f"Échec du chargement de {component}", exc_info=result)
+            if startup.is_loading(component):
+                startup.set(component, FAILED, error=f"{type(result).__name__}: {result}")
+    if startup.is_ready():
+        logger.info(f"✅ Services prêts en {startup.get_status()['uptime']:.1f}s")
+
+
+async def warm_up_tts_cache(phrases: List[str]) -> int:
+    """
+    Pré-chauffe le cache TTS une phrase par job
+
+    Le TTS est déjà annoncé prêt : entre deux phrases, la place de l'exécuteur, le
+    verrou du moteur (ou le worker du pool) reviennent aux requêtes en attente.
+
+    Returns:
+        Nombre de phrases synthétisées
+    """
+    synthesized = 0
+    for phrase in phrases:
+        synthesized += await run_tts("warm_up", [phrase], wait=True)
+    return synthesized
+
+
+def log_tts_warmup(task):
+    """Consigne l'issue du pré-chauffage du cache TTS"""
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.error(f"Échec du pré-chauffage du cache TTS: {type(error).__name__}: {error}")
+    else:
+        logger.info(f"Cache TTS pré-chauffé: {task.result()} phrases synthétisées")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arrête proprement les workers"""
+    if loading_task is not None and not loading_task.done():
+        # Un thread de chargement ne s'interrompt pas : on cesse seulement de l'attendre
+        loading_task.cancel()
+    if tts_warmup_task is not None and not tts_warmup_task.done():
+        tts_warmup_task.cancel()
+    if stt_scheduler is not None:
+        stt_scheduler.shutdown()
+    if stt_pool is not None:
+        stt_pool.shutdown()
+    if tts_pool is not None:
+        tts_pool.shutdown()
+    for executor in (stt_executor, tts_executor):
+        if executor is not None:
+            executor.shutdown()
+
 
 # Modèles Pydantic
 class TranscriptionRequest(BaseModel):
@@ -86,8 +579,9 @@ class TranscriptionRequest(BaseModel):
 
 class SynthesisRequest(BaseModel):
     text: str
-    language: Optional[str] = "fr"
+    language: Optional[str] = None
     engine: Optional[str] = None
+    voice_id: Optional[str] = None
     rate: Optional[int] = None
     volume: Optional[float] = None
 
@@ -107,48 +601,177 @@ async def root():
 @app.get("/health")
 async def health():
     """Vérification de santé"""
+    status = startup.get_status()
     return {
         "status": "healthy",
-        "stt_ready": stt_service is not None,
-        "tts_ready": tts_service is not None
+        "ready": status["ready"],
+        "stt_ready": stt_available(),
+        "tts_ready": tts_available(),
+        "startup": {name: component["state"] for name, component in status["components"].items()}
     }
 
 
+@app.get("/health/live")
+async def liveness():
+    """Sonde de vivacité : le processus répond, que les modèles soient chargés ou non"""
+    return {"status": "alive", "uptime": startup.get_status()["uptime"]}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Sonde de disponibilité : 200 quand STT et TTS sont chargés et pré-chauffés,
+    503 sinon, avec l'état et la durée de chaque phase de chargement
+    """
+    status = startup.get_status()
+    if status["ready"]:
+        return {"status": "ready", **status}
+    failed = any(component["state"] == FAILED for component in status["components"].values())
+    return JSONResponse(
+        status_code=503,
+        content={"status": "failed" if failed else "loading", **status},
+        headers={} if failed else {"Retry-After": "5"}
+    )
+
+
+def service_unavailable(component: str) -> HTTPException:
+    """Erreur 503 d'un service absent (Retry-After tant qu'il est en cours de chargement)"""
+    if startup.is_loading(component):
+        return HTTPException(
+            status_code=503,
+            detail=f"Service {component.upper()} en cours de chargement",
+            headers={"Retry-After": "5"}
+        )
+    return HTTPException(status_code=503, detail=f"Service {component.upper()} non disponible")
+
+
+@app.get("/metrics")
+async def metrics():
+    """Métriques au format texte Prometheus (durées par étape, files, chargements de modèle)"""
+    return Response(
+        content=REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def submit_local(audio, **options) -> Future:
+    """Transcrit un morceau avec le service local (appel bloquant, résultat dans un Future)"""
+    future = Future()
+    try:
+        future.set_result(stt_service.transcribe_array(audio, **options))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def transcribe_batched(decoded: DecodedAudio, task: str, word_timestamps: bool) -> dict:
+    """
+    Micro-batching : les extraits courts sont décodés en lot avec les requêtes
+    concurrentes, les plus longs passent par le chemin classique
+    """
+    decoded.validate()
+    if not word_timestamps and stt_scheduler.can_batch(decoded.samples):
+        return stt_scheduler.submit(decoded.samples, task=task).result()
+    return stt_service.transcribe_array(decoded.samples, task=task, word_timestamps=word_timestamps)
+
+
+async def decode_upload(content: bytes, audio_format: str, profile_id: Optional[str] = None) -> DecodedAudio:
+    """
+    Décode un fichier envoyé dans l'exécuteur STT (soumis au contrôle d'admission)
+
+    L'étape "decode" ne mesure que le décodage, dans le thread de l'exécuteur ;
+    l'attente d'une place est mesurée à part (étape "decode_queue").
+
+    Raises:
+        QueueFullError: file d'attente pleine
+    """
+    submitted_at = time.perf_counter()
+
+    def decode() -> DecodedAudio:
+        observe_stage("decode_queue", time.perf_counter() - submitted_at)
+        with stage_timer("decode"):
+            return DecodedAudio.from_bytes(content, 16000, audio_format)
+
+    return await stt_executor.run(profiled(decode, profile_id, "decode"))
+
+
+async def transcribe_decoded(
+    decoded: DecodedAudio,
+    task: str = "transcribe",
+    word_timestamps: bool = False,
+    profile_id: Optional[str] = None
+) -> dict:
+    """
+    Transcrit un signal décodé par le chemin adapté à sa durée : découpage aux
+    silences (long), micro-batching, ou service / pool de workers
+    
+    Raises:
+        QueueFullError: file d'attente pleine
+    """
+    if stt_long_audio is not None and decoded.duration > long_audio_threshold:
+        decoded.validate()
+        return await stt_executor.run(
+            profiled(stt_long_audio.transcribe, profile_id, "long_audio"),
+            decoded.samples,
+            task=task,
+            word_timestamps=word_timestamps
+        )
+    
+    if stt_scheduler is not None:
+        return await stt_executor.run(
+            profiled(transcribe_batched, profile_id, "transcribe_batched"),
+            decoded,
+            task,
+            word_timestamps
+        )
+    
+    # Le contexte est toujours vierge (condition_on_previous_text=False, pas de prompt)
+    return await run_stt(
+        "transcribe_array",
+        decoded.samples,
+        task=task,
+        word_timestamps=word_timestamps,
+        profile_id=profile_id
+    )
+
+
 @app.post("/api/stt/transcribe")
 async def transcribe_audio(
     file: UploadFile = File(...),
     language: str = Form("pt"),
     task: str = Form("transcribe"),
-    temperature: float = Form(0.0)
+    temperature: float = Form(0.0),
+    word_timestamps: bool = Form(False),
+    x_profile: Optional[str] = Header(None)
 ):
     """
     Transcrit un fichier audio
     
+    Les enregistrements plus longs que STT_LONG_AUDIO_S sont découpés aux silences
+    et leurs morceaux transcrits en parallèle (sur tous les workers si STT_WORKERS>0).
+    Avec l'en-tête X-Profile (ou si la requête est échantillonnée), le décodage et
+    la transcription sont profilés : voir X-Profile-Id et /api/profiles.
+    
     Args:
         file: Fichier audio (webm, wav, mp3, etc.)
         language: Code langue ISO 639-1
         task: "transcribe" ou "translate"
         temperature: Température pour le sampling
+        word_timestamps: Inclure les timestamps de chaque mot dans les segments
     
     Returns:
         JSON avec la transcription et métriques
     """
-    if not stt_service:
-        raise HTTPException(status_code=503, detail="Service STT non disponible")
+    if not stt_available():
+        raise service_unavailable("stt")
     
-    temp_file_path = None
-    converted_file_path = None
+    profile_id = start_profile(x_profile)
     
     try:
-        # Sauvegarder le fichier temporairement
-        temp_file = tempfile.NamedTemporaryFile(
-            delete=False,
-            suffix=Path(file.filename).suffix if file.filename else ".webm"
-        )
-        temp_file_path = temp_file.name
-        
-        # Écrire le contenu du fichier
-        content = await file.read()
+        # Lire le contenu en mémoire : il est décodé directement en signal 16 kHz,
+        # sans fichier temporaire
+        with stage_timer("upload_read"):
+            content = await file.read()
         
         # Vérifier que le contenu n'est pas vide
         if len(content) == 0:
@@ -156,68 +779,22 @@ async def transcribe_audio(
         
         logger.info(f"Fichier reçu: {len(content)} bytes, type: {file.content_type}")
         
-        temp_file.write(content)
-        temp_file.flush()  # S'assurer que tout est écrit
-        temp_file.close()
-        
-        # Vérifier que le fichier a bien été écrit
-        if not os.path.exists(temp_file_path) or os.path.getsize(temp_file_path) == 0:
-            raise HTTPException(status_code=400, detail="Fichier audio invalide ou vide")
-        
-        # Transcrir (le service convertira automatiquement en WAV si nécessaire)
-        # FORCER condition_on_previous_text=False pour éviter les problèmes de contexte
-        result = stt_service.transcribe(
-            temp_file_path,
-            task=task,
-            temperature=temperature,
-            condition_on_previous_text=False,  # FORCER à False
-            initial_prompt=None  # FORCER à None pour éviter tout contexte
-        )
+        audio_format = Path(file.filename).suffix if file.filename else None
+        audio_format = audio_format or file.content_type or "webm"
         
-        # Vérifier si un fichier converti a été créé
-        if temp_file_path.endswith('.webm'):
-            wav_path = temp_file_path.rsplit('.', 1)[0] + '.wav'
-            if os.path.exists(wav_path):
-                converted_file_path = wav_path
+        # Décodage une seule fois dans l'API : la durée décide du chemin de transcription
+        decoded = await decode_upload(content, audio_format, profile_id)
         
-        return JSONResponse(content=result)
+        result = await transcribe_decoded(decoded, task, word_timestamps, profile_id)
+        return JSONResponse(content=result, headers=profile_headers(profile_id))
         
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise overloaded(e)
     except Exception as e:
         logger.error(f"Erreur lors de la transcription: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-        
-    finally:
-        # Nettoyer les fichiers temporaires
-        cleanup_paths = []
-        
-        if temp_file_path and os.path.exists(temp_file_path):
-            cleanup_paths.append(temp_file_path)
-        
-        if converted_file_path and os.path.exists(converted_file_path):
-            cleanup_paths.append(converted_file_path)
-        
-        # Nettoyer TOUS les fichiers pré-traités récents dans trans_voice
-        # (plus agressif pour éviter les problèmes de réutilisation)
-        temp_dir = Path(tempfile.gettempdir()) / "trans_voice"
-        if temp_dir.exists():
-            current_time = time.time()
-            for file in temp_dir.glob("audio_*.wav"):
-                try:
-                    file_time = file.stat().st_mtime
-                    # Nettoyer les fichiers de moins de 5 minutes (plus agressif)
-                    if current_time - file_time < 300:  # 5 minutes
-                        cleanup_paths.append(str(file))
-                except:
-                    pass
-        
-        # Supprimer tous les fichiers
-        for path in cleanup_paths:
-            try:
-                if os.path.exists(path):
-                    os.remove(path)
-                    logger.debug(f"Fichier temporaire supprimé: {path}")
-            except Exception as e:
-                logger.warning(f"Impossible de supprimer {path}: {e}")
 
 
 @app.post("/api/stt/transcribe-stream")
@@ -235,97 +812,582 @@ async def transcribe_stream(
     Returns:
         JSON avec la transcription
     """
-    if not stt_service:
-        raise HTTPException(status_code=503, detail="Service STT non disponible")
+    if not stt_available():
+        raise service_unavailable("stt")
     
     try:
-        result = stt_service.transcribe_stream(audio_data)
+        result = await run_stt("transcribe_stream", audio_data)
         return JSONResponse(content=result)
+    except QueueFullError as e:
+        raise overloaded(e)
     except Exception as e:
         logger.error(f"Erreur lors de la transcription stream: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Bornes de l'intervalle des hypothèses partielles demandé par le client (ms)
+PARTIAL_INTERVAL_MS = (100, 10000)
+
+
+def partial_interval(value) -> int:
+    """
+    Intervalle des hypothèses partielles demandé par le client, borné
+    
+    Raises:
+        ValueError: valeur non numérique
+    """
+    low, high = PARTIAL_INTERVAL_MS
+    return min(high, max(low, int(value)))
+
+
+@app.websocket("/ws/stt/stream")
+async def transcribe_websocket(websocket: WebSocket):
+    """
+    Transcription en flux sur WebSocket
+    
+    Protocole:
+        1. (optionnel) message texte JSON {"type": "config", "format": "pcm16" | "float32"
+           | "webm" | "ogg", "sample_rate": 16000, "partial_interval_ms": 500}
+           (partial_interval_ms borné à 100-10000 ; pas de partiels si STT_RELOAD_MODEL=true)
+        2. messages binaires : morceaux audio au fil de la capture
+        3. message texte {"type": "end"} pour terminer la session
+    
+    Le serveur envoie des événements JSON :
+        {"type": "partial", "text", "stable_text", "start", "end", "latency"}
+        {"type": "final", "text", "start", "end", "latency"}
+        {"type": "done", "stats"}
+    """
+    await websocket.accept()
+    
+    if not stt_available():
+        await websocket.send_json({"type": "error", "detail": "Service STT non disponible"})
+        await websocket.close(code=1013)
+        return
+    
+    if stt_pool is not None:
+        def window_decoder(audio, beam_size=1):
+            return stt_pool.call("transcribe_window", audio, beam_size=beam_size)
+    else:
+        window_decoder = stt_service.transcribe_window
+    
+    config = {"format": "pcm16", "sample_rate": 16000, "partial_interval_ms": 500}
+    decoder: Optional[StreamDecoder] = None
+    session: Optional[StreamingTranscriber] = None
+    
+    async def process(samples):
+        # Le décodage Whisper est bloquant : l'exécuter hors de la boucle d'événements.
+        # Le flux attend une place plutôt que de perdre de l'audio
+        events = await stt_executor.run_waiting(session.add_audio, samples)
+        for event in events:
+            await websocket.send_json(event)
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("text") is not None:
+                payload = json.loads(message["text"])
+                if payload.get("type") == "config" and session is None:
+                    config.update({k: v for k, v in payload.items() if k in config})
+                    try:
+                        config["partial_interval_ms"] = partial_interval(config["partial_interval_ms"])
+                    except (TypeError, ValueError):
+                        await websocket.send_json({"type": "error", "detail": "partial_interval_ms invalide"})
+                        await websocket.close(code=1003)
+                        break
+                elif payload.get("type") == "end":
+                    if session is not None:
+                        await process(await asyncio.to_thread(decoder.close))
+                        for event in await stt_executor.run_waiting(session.flush):
+                            await websocket.send_json(event)
+                        decoder = None
+                    await websocket.send_json({
+                        "type": "done",
+                        "stats": session.get_stats() if session is not None else {}
+                    })
+                    await websocket.close()
+                    break
+                continue
+            
+            if message.get("bytes") is not None:
+                if session is None:
+                    decoder = StreamDecoder(
+                        format=config["format"],
+                        sample_rate=int(config["sample_rate"])
+                    )
+                    # Avec rechargement du modèle à chaque appel, chaque hypothèse
+                    # partielle rechargerait Whisper : segments finaux seulement
+                    session = StreamingTranscriber(
+                        window_decoder,
+                        partial_interval_ms=0 if stt_config.get("reload_per_request") else config["partial_interval_ms"]
+                    )
+                # L'écriture dans ffmpeg peut bloquer : hors de la boucle d'événements
+                await process(await asyncio.to_thread(decoder.feed, message["bytes"]))
+    
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Erreur lors de la transcription WebSocket: {e}")
+        try:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        if decoder is not None:
+            try:
+                await asyncio.to_thread(decoder.close)
+            except Exception:
+                pass
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Vérifie un en-tête If-None-Match (liste d'ETags, W/ et * acceptés)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates
+    )
+
+
+def synthesis_options(request: SynthesisRequest) -> dict:
+    """
+    Moteur, langue, voix, vitesse et volume d'une requête, passés au job :
+    jamais appliqués aux moteurs partagés
+    
+    Raises:
+        HTTPException: moteur inconnu (400)
+    """
+    engine = request.engine or tts_config["engine"]
+    if engine not in TTSRegistry.ENGINES:
+        raise HTTPException(status_code=400, detail=f"Moteur TTS non supporté: {engine}")
+    return {
+        "engine": engine,
+        "language": request.language or tts_config["language"],
+        "voice_id": request.voice_id or None,
+        "rate": request.rate or None,
+        "volume": request.volume or None
+    }
+
+
+def expected_etag(request: SynthesisRequest) -> str:
+    """
+    ETag d'une synthèse, calculé sans synthétiser
+    (même clé que TextToSpeechService.cache_key du moteur de la requête)
+    """
+    options = synthesis_options(request)
+    key = AudioCache.synthesis_key(
+        request.text,
+        options["engine"],
+        options["language"],
+        options["voice_id"],
+        options["rate"] or TextToSpeechService.DEFAULT_RATE,
+        options["volume"] or TextToSpeechService.DEFAULT_VOLUME
+    )
+    return f'"{key}"'
+
+
 @app.post("/api/tts/synthesize")
-async def synthesize_text(request: SynthesisRequest):
+async def synthesize_text(
+    request: SynthesisRequest,
+    if_none_match: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None)
+):
     """
     Synthétise du texte en audio
     
+    La réponse porte un ETag dérivé du texte et des paramètres de synthèse ;
+    un client qui renvoie cet ETag dans If-None-Match reçoit 304 sans corps.
+    
     Args:
         request: Requête avec texte et paramètres
     
     Returns:
         Fichier audio (WAV ou MP3)
     """
-    if not tts_service:
-        raise HTTPException(status_code=503, detail="Service TTS non disponible")
+    if not tts_available():
+        raise service_unavailable("tts")
+    
+    options = synthesis_options(request)
+    
+    # Le client possède déjà cet audio : ni synthèse ni téléchargement
+    etag = expected_etag(request)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    profile_id = start_profile(x_profile)
     
     try:
-        # Configurer le service si nécessaire
-        if request.rate:
-            tts_service.set_rate(request.rate)
-        if request.volume:
-            tts_service.set_volume(request.volume)
-        if request.engine and request.engine != tts_service.engine_name:
-            # Recréer le service avec le nouveau moteur
-            tts_service = TextToSpeechService(
-                engine=request.engine,
-                language=request.language or tts_service.language
-            )
-        
-        # Synthétiser
-        audio_bytes, metadata = tts_service.synthesize(
-            request.text,
-            slow=False
-        )
+        # Moteur pré-initialisé du registre pour (moteur, langue, voix)
+        audio_bytes, metadata = await run_tts("synthesize", request.text, profile_id=profile_id, **options)
         
         # Déterminer le type MIME
-        mime_type = "audio/mpeg" if tts_service.engine_name == "gtts" else "audio/wav"
+        mime_type = "audio/mpeg" if options["engine"] == "gtts" else "audio/wav"
         
         return Response(
             content=audio_bytes,
             media_type=mime_type,
             headers={
+                "ETag": etag,
+                "Cache-Control": "no-cache",
                 "X-Duration": str(metadata.get("duration", 0)),
-                "X-Latency": str(metadata.get("latency", 0))
+                "X-Latency": str(metadata.get("latency", 0)),
+                "X-Cache": "HIT" if metadata.get("cached") else "MISS",
+                **profile_headers(profile_id)
             }
         )
         
+    except QueueFullError as e:
+        raise overloaded(e)
     except Exception as e:
         logger.error(f"Erreur lors de la synthèse: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/tts/synthesize")
+async def synthesize_text_get(
+    text: str,
+    language: Optional[str] = None,
+    engine: Optional[str] = None,
+    voice_id: Optional[str] = None,
+    rate: Optional[int] = None,
+    volume: Optional[float] = None,
+    if_none_match: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None)
+):
+    """
+    Variante GET de /api/tts/synthesize, utilisable directement comme source
+    d'un élément <audio> : le cache HTTP du navigateur revalide via If-None-Match
+    """
+    request = SynthesisRequest(
+        text=text, language=language, engine=engine, voice_id=voice_id, rate=rate, volume=volume
+    )
+    return await synthesize_text(request, if_none_match, x_profile)
+
+
+@app.post("/api/tts/synthesize-stream")
+async def synthesize_text_stream(request: SynthesisRequest):
+    """
+    Synthétise un texte long phrase par phrase, en flux
+
+    Les phrases sont synthétisées en pipeline (en parallèle sur les workers TTS)
+    et l'audio de chacune est envoyé dès qu'elle est prête, en transfert chunked :
+    le client entend la première phrase sans attendre la fin du texte.
+
+    Args:
+        request: Requête avec texte et paramètres
+
+    Returns:
+        Flux audio (WAV de longueur inconnue ou MP3)
+    """
+    if not tts_available():
+        raise service_unavailable("tts")
+
+    sentences = split_sentences(request.text)
+    if not sentences:
+        raise HTTPException(status_code=400, detail="Texte vide")
+
+    options = synthesis_options(request)
+
+    async def synthesize(sentence: str, index: int):
+        # Seule la première phrase peut être refusée (503) : ensuite la réponse
+        # est commencée, les phrases suivantes attendent leur tour
+        return await run_tts("synthesize", sentence, wait=index > 0, **options)
+
+    # Une phrase d'avance par synthèse simultanée possible : le registre
+    # sérialise de toute façon les appels à un même moteur
+    lookahead = tts_executor.max_concurrency + 1
+    pipeline = synthesize_pipelined(sentences, synthesize, lookahead=lookahead)
+    assembler = AudioStreamAssembler()
+
+    # La première phrase est synthétisée avant d'envoyer les en-têtes : une erreur
+    # à ce stade donne encore un vrai code HTTP
+    try:
+        first_audio, _ = await pipeline.__anext__()
+        first_chunk = assembler.feed(first_audio)
+    except QueueFullError as e:
+        await pipeline.aclose()
+        raise overloaded(e)
+    except Exception as e:
+        await pipeline.aclose()
+        logger.error(f"Erreur lors de la synthèse en flux: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def stream():
+        try:
+            yield first_chunk
+            async for audio_bytes, _ in pipeline:
+                yield assembler.feed(audio_bytes)
+        except Exception as e:
+            # En-têtes déjà envoyés : le flux est simplement interrompu
+            logger.error(f"Synthèse en flux interrompue: {e}")
+        finally:
+            await pipeline.aclose()
+
+    return StreamingResponse(
+        stream(),
+        media_type="audio/mpeg" if options["engine"] == "gtts" else "audio/wav",
+        headers={"Cache-Control": "no-cache", "X-Sentences": str(len(sentences))}
+    )
+
+
+@app.get("/api/tts/synthesize-stream")
+async def synthesize_text_stream_get(
+    text: str,
+    language: Optional[str] = None,
+    engine: Optional[str] = None,
+    voice_id: Optional[str] = None,
+    rate: Optional[int] = None,
+    volume: Optional[float] = None
+):
+    """Variante GET de /api/tts/synthesize-stream (source d'un élément <audio>)"""
+    request = SynthesisRequest(
+        text=text, language=language, engine=engine, voice_id=voice_id, rate=rate, volume=volume
+    )
+    return await synthesize_text_stream(request)
+
+
 @app.get("/api/tts/voices")
-async def get_voices():
-    """Retourne la liste des voix disponibles"""
-    if not tts_service:
-        raise HTTPException(status_code=503, detail="Service TTS non disponible")
+async def get_voices(engine: Optional[str] = None, language: Optional[str] = None):
+    """Retourne la liste des voix disponibles (moteur et langue par défaut si omis)"""
+    if not tts_available():
+        raise service_unavailable("tts")
     
+    options = synthesis_options(SynthesisRequest(text="", engine=engine, language=language))
     try:
-        voices = tts_service.get_available_voices()
+        voices = await run_tts("get_available_voices", options["engine"], options["language"])
         return {"voices": voices}
+    except QueueFullError as e:
+        raise overloaded(e)
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des voix: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def pool_cache_stats(pool: WorkerPool) -> Optional[dict]:
+    """Compteurs des caches de tous les workers, additionnés (détail par worker)"""
+    workers = {worker_id: stats for worker_id, stats in pool.get_worker_stats().items() if stats is not None}
+    if not workers:
+        return None
+    return {**ResultCache.merge_stats(list(workers.values())), "workers": workers}
+
+
 @app.get("/api/stt/info")
 async def get_stt_info():
     """Retourne les informations sur le service STT"""
-    if not stt_service:
-        raise HTTPException(status_code=503, detail="Service STT non disponible")
+    if not stt_available():
+        raise service_unavailable("stt")
+    
+    long_audio = {"enabled": stt_long_audio is not None, "threshold_s": long_audio_threshold}
     
-    return stt_service.get_model_info()
+    if stt_pool is not None:
+        return {
+            **stt_config,
+            "pool": stt_pool.get_stats(),
+            "cache": pool_cache_stats(stt_pool),
+            "memory": stt_pool.get_memory(),
+            "executor": stt_executor.get_stats(),
+            "long_audio": long_audio
+        }
+    
+    info = stt_service.get_model_info()
+    info["memory"] = process_memory(os.getpid())
+    info["executor"] = stt_executor.get_stats()
+    info["long_audio"] = long_audio
+    if stt_scheduler is not None:
+        info["batching"] = stt_scheduler.get_stats()
+    return info
 
 
 @app.get("/api/tts/info")
 async def get_tts_info():
     """Retourne les informations sur le service TTS"""
-    if not tts_service:
-        raise HTTPException(status_code=503, detail="Service TTS non disponible")
+    if not tts_available():
+        raise service_unavailable("tts")
+    
+    if tts_pool is not None:
+        return {
+            **tts_config,
+            "pool": tts_pool.get_stats(),
+            "memory": tts_pool.get_memory(),
+            "executor": tts_executor.get_stats()
+        }
+    
+    return {**tts_registry.get_info(), "executor": tts_executor.get_stats()}
+
+
+def translate_text(text: str, target_language: str, source_language: Optional[str]) -> tuple:
+    """
+    Traduit avec le backend configuré, ou le backend hors ligne en cas d'échec
+    
+    Returns:
+        Tuple (texte traduit, nom du backend utilisé) ; texte inchangé et None si
+        la traduction est désactivée
+    """
+    if translator is None or not text.strip() or source_language == target_language:
+        return text, None
+    with stage_timer("translation"):
+        try:
+            return translator.translate(text, target_language, source_language), translator.name
+        except Exception as e:
+            logger.warning(f"Traduction {translator.name} en échec, repli hors ligne: {e}")
+            return fallback_translator.translate(text, target_language, source_language), fallback_translator.name
+
+
+@app.post("/api/pipeline")
+async def speech_to_speech(
+    file: UploadFile = File(...),
+    target_language: str = Form("fr"),
+    task: str = Form("transcribe"),
+    engine: Optional[str] = Form(None),
+    voice_id: Optional[str] = Form(None),
+    rate: Optional[int] = Form(None),
+    volume: Optional[float] = Form(None),
+    x_profile: Optional[str] = Header(None)
+):
+    """
+    Pipeline parole -> parole en un seul appel : STT, traduction puis TTS
+    
+    Les trois étapes s'enchaînent dans ce processus, sans aller-retour par le
+    serveur Node ni le navigateur.
+    
+    Args:
+        file: Fichier audio (webm, wav, mp3, etc.)
+        target_language: Langue de la traduction et de la synthèse
+        task: Tâche Whisper ("transcribe" ou "translate")
+        engine, voice_id, rate, volume: Paramètres de synthèse (défaut : configuration TTS)
     
-    return tts_service.get_info()
+    Returns:
+        JSON avec transcription, traduction, audio (base64) et durée de chaque étape
+    """
+    if not stt_available():
+        raise service_unavailable("stt")
+    if not tts_available():
+        raise service_unavailable("tts")
+    
+    synthesis = synthesis_options(SynthesisRequest(
+        text="", language=target_language, engine=engine, voice_id=voice_id, rate=rate, volume=volume
+    ))
+    timings = {}
+    start_time = time.perf_counter()
+    profile_id = start_profile(x_profile)
+    
+    try:
+        with stage_timer("upload_read"):
+            content = await file.read()
+        if len(content) == 0:
+            raise HTTPException(status_code=400, detail="Fichier audio vide")
+        
+        audio_format = Path(file.filename).suffix if file.filename else None
+        audio_format = audio_format or file.content_type or "webm"
+        
+        stage_start = time.perf_counter()
+        decoded = await decode_upload(content, audio_format, profile_id)
+        timings["decode"] = time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        transcription = await transcribe_decoded(decoded, task, profile_id=profile_id)
+        timings["stt"] = time.perf_counter() - stage_start
+        
+        text = transcription.get("text", "").strip()
+        if not text:
+            raise HTTPException(status_code=422, detail="Aucune parole détectée")
+        
+        # Whisper "translate" produit déjà de l'anglais
+        source_language = "en" if task == "translate" else transcription.get("language")
+        stage_start = time.perf_counter()
+        translation, backend = await asyncio.to_thread(
+            profiled(translate_text, profile_id, "translation"), text, target_language, source_language
+        )
+        timings["translation"] = time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        audio_bytes, metadata = await run_tts("synthesize", translation, profile_id=profile_id, **synthesis)
+        timings["tts"] = time.perf_counter() - stage_start
+        
+        timings["total"] = time.perf_counter() - start_time
+        
+        return JSONResponse(content={
+            "text": text,
+            "language": transcription.get("language"),
+            "translation": translation,
+            "target_language": target_language,
+            "translation_backend": backend,
+            "audio": base64.b64encode(audio_bytes).decode("ascii"),
+            "audio_mime_type": "audio/mpeg" if synthesis["engine"] == "gtts" else "audio/wav",
+            "audio_duration": metadata.get("duration", 0),
+            "stt_cached": bool(transcription.get("cached")),
+            "tts_cached": bool(metadata.get("cached")),
+            "timings": timings
+        }, headers=profile_headers(profile_id))
+        
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erreur dans le pipeline parole -> parole: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def check_profile_access(x_profile: Optional[str]):
+    """
+    Les profils (traces, arguments des fonctions) ne sont consultables qu'avec
+    PROFILE_TOKEN, passé dans l'en-tête X-Profile
+
+    Raises:
+        HTTPException: 503 sans profileur, 403 sans jeton configuré ou valide
+    """
+    if profiler is None:
+        raise HTTPException(status_code=503, detail="Profilage indisponible")
+    if profiler.token is None:
+        raise HTTPException(status_code=403, detail="Consultation des profils désactivée (PROFILE_TOKEN non défini)")
+    if not profiler.authorize(x_profile):
+        raise HTTPException(status_code=403, detail="Jeton de profil invalide (en-tête X-Profile)")
+
+
+@app.get("/api/profiles")
+async def list_profiles(x_profile: Optional[str] = Header(None)):
+    """Profils enregistrés, du plus récent au plus ancien"""
+    check_profile_access(x_profile)
+    return {**profiler.get_info(), "profiles": await asyncio.to_thread(profiler.list_profiles)}
+
+
+@app.get("/api/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """
+    Profil d'une requête : fichiers et résumé texte de chaque étape
+    (fonctions les plus coûteuses, opérateurs PyTorch)
+    """
+    check_profile_access(x_profile)
+    try:
+        summary = await asyncio.to_thread(profiler.summary, profile_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Profil introuvable: {profile_id}")
+    return summary
+
+
+@app.get("/api/profiles/{profile_id}/{filename}")
+async def download_profile(profile_id: str, filename: str, x_profile: Optional[str] = Header(None)):
+    """
+    Télécharge un fichier de profil : <étape>.pstats (snakeviz, pstats),
+    <étape>.torch.json (chrome://tracing, Perfetto) ou <étape>.txt
+    """
+    check_profile_access(x_profile)
+    try:
+        path = profiler.file_path(profile_id, filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Fichier de profil introuvable: {filename}")
+    return FileResponse(path, filename=f"{profile_id}-{filename}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+"""
+Benchmark : modèle Whisper résident vs rechargement avant chaque transcription
+
+Transcrit plusieurs fois un court extrait synthétique avec les deux modes de
+SpeechToTextService et compare les latences.
+
+Usage (depuis le dossier python/) :
+    python -m benchmarks.bench_model_reload --model-size tiny --runs 5 --duration 2
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import soundfile as sf
+
+from services.speech_to_text import SpeechToTextService
+
+from .signals import SAMPLE_RATE, speech_like
+
+
+def time_transcriptions(service: SpeechToTextService, audio_path: str, runs: int) -> list:
+    """Retourne la latence (s) de chaque transcription"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        service.transcribe(audio_path)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summarize(latencies: list) -> dict:
+    return {
+        "runs": len(latencies),
+        "mean": statistics.mean(latencies),
+        "p50": statistics.median(latencies),
+        "min": min(latencies),
+        "max": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-size", default=os.getenv("WHISPER_MODEL_SIZE", "base"))
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=2.0, help="Durée de l'extrait (s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        audio_path = os.path.join(tmp_dir, "clip.wav")
+        sf.write(audio_path, speech_like(args.duration), SAMPLE_RATE)
+
+        results = {}
+        for mode, reload_per_request in (("resident", False), ("reload", True)):
+            service = SpeechToTextService(
+                model_size=args.model_size,
+                device=args.device,
+                preprocess=False,
+                reload_per_request=reload_per_request
+            )
+            # Première transcription hors mesure (allocation des buffers, caches CPU)
+            service.transcribe(audio_path)
+            results[mode] = summarize(time_transcriptions(service, audio_path, args.runs))
+            del service
+
+    results["speedup_p50"] = results["reload"]["p50"] / results["resident"]["p50"]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
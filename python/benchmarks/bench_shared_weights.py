@@ -0,0 +1,84 @@
+"""
+Benchmark : mémoire d'un pool STT avec poids privés vs checkpoint mappé partagé
+
+Démarre N workers Whisper dans chaque mode, fait transcrire un extrait à chacun
+(tous les poids sont lus) puis relève RSS et PSS de chaque worker. Le PSS
+répartit les pages partagées entre les processus : sa somme est la mémoire
+physique occupée par le pool.
+
+Usage (depuis le dossier python/) :
+    python -m benchmarks.bench_shared_weights --model-size base --workers 4
+    # Hors ligne, sans téléchargement (modèle de substitution aux dimensions de "tiny")
+    python -m benchmarks.bench_shared_weights --stand-in --workers 2
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+
+from services.shared_weights import ensure_checkpoint
+from services.speech_to_text import SpeechToTextService
+from services.worker_pool import WorkerPool
+
+from .signals import speech_like
+
+
+def measure_pool(model_size: str, workers: int, mmap_weights: bool, weights_dir: str, duration: float) -> dict:
+    """Mémoire des workers après une transcription chacun"""
+    if mmap_weights:
+        # Conversion hors des workers, comme au démarrage de l'API
+        ensure_checkpoint(model_size, weights_dir)
+    pool = WorkerPool(
+        SpeechToTextService,
+        {
+            "model_size": model_size,
+            "device": "cpu",
+            "preprocess": False,
+            "mmap_weights": mmap_weights,
+            "weights_dir": weights_dir
+        },
+        num_workers=workers,
+        name="mmap" if mmap_weights else "private"
+    )
+    pool.start()
+    try:
+        audio = speech_like(duration)
+        # Un job par worker : chacun est occupé par le sien quand les suivants arrivent
+        futures = [pool.submit("transcribe_window", audio, beam_size=1) for _ in range(workers)]
+        for future in futures:
+            future.result()
+        return pool.get_memory()
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-size", default=os.getenv("WHISPER_MODEL_SIZE", "base"))
+    parser.add_argument("--stand-in", action="store_true", help="Modèle de substitution (aucun téléchargement)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=1.0, help="Durée de l'extrait transcrit (s)")
+    parser.add_argument("--weights-dir", help="Dossier des checkpoints partagés (défaut: temporaire)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_size = args.model_size
+        if args.stand_in:
+            from .stand_in import write_checkpoint
+            model_size = write_checkpoint(os.path.join(tmp_dir, "stand-in-tiny.pt"))
+        weights_dir = args.weights_dir or tmp_dir
+
+        results = {}
+        for mode, mmap_weights in (("private", False), ("mmap", True)):
+            results[mode] = measure_pool(model_size, args.workers, mmap_weights, weights_dir, args.duration)
+
+    results["pss_saving_mb"] = results["private"]["total_pss_mb"] - results["mmap"]["total_pss_mb"]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
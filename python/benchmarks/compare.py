@@ -0,0 +1,37 @@
+"""
+Compare deux rapports de benchmarks.suite et signale les régressions
+
+Usage (depuis le dossier python/) :
+    python -m benchmarks.compare bench.json baseline.json --threshold 0.10
+
+Code de sortie 1 si une métrique (p50, p95, p99, rtf, peak_rss_mb, throughput)
+s'est dégradée de plus que le seuil.
+"""
+
+import argparse
+import json
+import sys
+
+from .harness import compare, format_comparison
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("current", help="Rapport courant (JSON)")
+    parser.add_argument("baseline", help="Rapport de référence (JSON)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Écart relatif toléré (0.10 = 10 %%)")
+    parser.add_argument("--json", action="store_true", help="Écarts au format JSON")
+    args = parser.parse_args()
+
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    rows = compare(current, baseline, args.threshold)
+    print(json.dumps(rows, indent=2) if args.json else format_comparison(rows))
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
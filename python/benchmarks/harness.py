@@ -0,0 +1,173 @@
+"""
+Mesures communes des benchmarks : latences (p50/p95/p99), facteur temps réel,
+débit, pic de mémoire résidente, et comparaison avec une référence enregistrée
+"""
+
+import gc
+import os
+import resource
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Métriques comparées à la référence et sens de l'amélioration
+LOWER_IS_BETTER = ("p50", "p95", "p99", "rtf", "peak_rss_mb")
+HIGHER_IS_BETTER = ("throughput",)
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """Résumé d'une série de latences (s)"""
+    values = np.asarray(latencies, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "mean": float(values.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "min": float(values.min()),
+        "max": float(values.max())
+    }
+
+
+def reset_peak_rss() -> bool:
+    """
+    Remet à zéro le pic de mémoire résidente du processus (Linux : /proc/self/clear_refs)
+
+    Returns:
+        False si le pic ne peut pas être réinitialisé (il couvre alors tout le processus)
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente (Mo) depuis le démarrage ou le dernier reset_peak_rss()"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets ailleurs
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(
+    fn: Callable[[], object],
+    runs: int = 10,
+    warmup: int = 1,
+    audio_seconds: Optional[float] = None
+) -> Dict:
+    """
+    Exécute fn plusieurs fois et mesure latence, débit et mémoire
+
+    Args:
+        fn: Appel mesuré (sans argument)
+        runs: Nombre d'appels mesurés
+        warmup: Appels préalables hors mesure (allocations, caches)
+        audio_seconds: Durée audio traitée (ou produite) par appel, pour le facteur
+            temps réel ; peut aussi être retournée par fn (float) quand elle varie
+
+    Returns:
+        Dict: runs, latences, rtf (temps de calcul / durée audio), throughput
+        (appels/s), audio_seconds_per_second, peak_rss_mb
+    """
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    peak_is_local = reset_peak_rss()
+
+    latencies = []
+    produced = 0.0
+    total_start = time.perf_counter()
+    for _ in range(runs):
+        start = time.perf_counter()
+        value = fn()
+        latencies.append(time.perf_counter() - start)
+        if audio_seconds is not None:
+            produced += audio_seconds
+        elif isinstance(value, (int, float)):
+            produced += float(value)
+    total = time.perf_counter() - total_start
+
+    result = {"runs": runs, **percentiles(latencies)}
+    result["throughput"] = runs / total if total > 0 else 0.0
+    if produced > 0:
+        result["rtf"] = sum(latencies) / produced
+        result["audio_seconds_per_second"] = produced / total
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["peak_rss_scope"] = "benchmark" if peak_is_local else "process"
+    return result
+
+
+def environment() -> Dict:
+    """Contexte de la mesure (à comparer avant d'interpréter un écart)"""
+    info = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "numpy": np.__version__
+    }
+    try:
+        import torch
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.10) -> List[Dict]:
+    """
+    Compare deux rapports benchmark par benchmark
+
+    Args:
+        current: Rapport courant ({"results": {nom: mesures}})
+        baseline: Rapport de référence, même format
+        threshold: Écart relatif toléré (0.10 = 10 %)
+
+    Returns:
+        Une entrée par métrique comparée : benchmark, metric, baseline, current,
+        change (relatif, positif = plus lent / plus gourmand), regression
+    """
+    rows = []
+    for name, measures in current.get("results", {}).items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference or "error" in measures or "error" in reference:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if metric not in measures or not reference.get(metric):
+                continue
+            change = measures[metric] / reference[metric] - 1
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            rows.append({
+                "benchmark": name,
+                "metric": metric,
+                "baseline": reference[metric],
+                "current": measures[metric],
+                "change": change,
+                "regression": change > threshold
+            })
+    return rows
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    """Tableau texte des écarts (régressions marquées)"""
+    lines = [f"{'benchmark':<48} {'métrique':<12} {'référence':>12} {'courant':>12} {'écart':>8}"]
+    for row in rows:
+        flag = "  RÉGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['benchmark']:<48} {row['metric']:<12} {row['baseline']:>12.4f} "
+            f"{row['current']:>12.4f} {row['change']:>+7.1%}{flag}"
+        )
+    return "\n".join(lines)
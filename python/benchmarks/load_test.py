@@ -0,0 +1,354 @@
+"""
+Test de charge de l'API : montée en concurrence et point de saturation
+
+Des clients asyncio envoient en boucle un mélange configurable de requêtes
+/api/stt/transcribe, /api/tts/synthesize et /health. Chaque niveau de concurrence
+est mesuré pendant --duration secondes (après --warmup secondes ignorées) : débit,
+latences p50/p95/p99 (globales et par type), taux d'erreurs et de refus (503).
+Le point de saturation ("genou") est le dernier niveau au-delà duquel ajouter des
+clients n'augmente plus le débit, ou au-delà duquel les erreurs apparaissent.
+
+Usage (depuis le dossier python/) :
+    # Lance l'API avec des backends simulés puis mesure 1, 8, 32 et 128 clients
+    STT_BACKEND=stub TTS_BACKEND=stub python -m benchmarks.load_test --serve --output load.json
+
+    # API déjà lancée (vrais modèles), mélange et niveaux personnalisés
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --mix stt=6,tts=3,health=1 --levels 1,4,16
+
+Nécessite httpx (pip install httpx).
+"""
+
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import httpx
+import numpy as np
+import soundfile as sf
+
+from .harness import environment
+from .signals import SAMPLE_RATE, TEXTS, speech_like
+
+KINDS = ("stt", "tts", "health")
+
+
+class Record(NamedTuple):
+    """Une requête envoyée"""
+    kind: str
+    start: float
+    end: float
+    status: Optional[int]
+    error: Optional[str]
+
+    @property
+    def latency(self) -> float:
+        return self.end - self.start
+
+    @property
+    def ok(self) -> bool:
+        return self.status is not None and 200 <= self.status < 400
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Lit "stt=6,tts=3,health=1" en proportions"""
+    weights = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise ValueError(f"Type de requête inconnu: {kind} (attendu: {', '.join(KINDS)})")
+        weights[kind] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Mélange de requêtes vide")
+    return {kind: weight / total for kind, weight in weights.items()}
+
+
+class RequestFactory:
+    """
+    Construit les requêtes du mélange
+
+    Par défaut chaque requête est unique (un échantillon du WAV ou un suffixe du
+    texte change) : les caches STT/TTS ne faussent pas la mesure de l'inférence.
+    """
+
+    def __init__(self, audio_seconds: float, tts_text: str, unique: bool = True, tts_engine: Optional[str] = None):
+        buffer = io.BytesIO()
+        sf.write(buffer, speech_like(audio_seconds), SAMPLE_RATE, format="WAV", subtype="PCM_16")
+        self.wav = buffer.getvalue()
+        self.tts_text = tts_text
+        self.tts_engine = tts_engine
+        self.unique = unique
+        self._counter = itertools.count()
+
+    def _wav(self, n: int) -> bytes:
+        if not self.unique:
+            return self.wav
+        # Les deux derniers échantillons portent le numéro de requête (inaudible)
+        data = bytearray(self.wav)
+        data[-4:] = (n % 2 ** 32).to_bytes(4, "little")
+        return bytes(data)
+
+    async def send(self, client: httpx.AsyncClient, kind: str) -> httpx.Response:
+        n = next(self._counter)
+        if kind == "stt":
+            return await client.post(
+                "/api/stt/transcribe",
+                files={"file": ("load.wav", self._wav(n), "audio/wav")}
+            )
+        if kind == "tts":
+            payload = {"text": f"{self.tts_text} ({n})" if self.unique else self.tts_text}
+            if self.tts_engine:
+                payload["engine"] = self.tts_engine
+            return await client.post("/api/tts/synthesize", json=payload)
+        return await client.get("/health")
+
+
+async def run_level(
+    url: str,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    mix: Dict[str, float],
+    factory: RequestFactory,
+    timeout: float,
+    seed: int
+) -> List[Record]:
+    """`concurrency` clients en boucle fermée pendant warmup + duration secondes"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    records: List[Record] = []
+    deadline = time.perf_counter() + warmup + duration
+
+    async def client_loop(client: httpx.AsyncClient, rng: random.Random):
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await factory.send(client, kind)
+                records.append(Record(kind, start, time.perf_counter(), response.status_code, None))
+            except httpx.HTTPError as e:
+                records.append(Record(kind, start, time.perf_counter(), None, type(e).__name__))
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        await asyncio.gather(*(
+            client_loop(client, random.Random(seed * 1000 + i)) for i in range(concurrency)
+        ))
+    return records
+
+
+def summarize_records(records: List[Record]) -> Dict:
+    """Latences (requêtes réussies), erreurs et refus d'un ensemble de requêtes"""
+    ok = [record.latency for record in records if record.ok]
+    rejected = sum(1 for record in records if record.status == 503)
+    errors = sum(1 for record in records if not record.ok and record.status != 503)
+    summary = {
+        "requests": len(records),
+        "ok": len(ok),
+        "rejected": rejected,
+        "errors": errors,
+        "error_rate": (rejected + errors) / len(records) if records else 0.0
+    }
+    if ok:
+        p50, p95, p99 = np.percentile(ok, [50, 95, 99])
+        summary.update(mean=float(np.mean(ok)), p50=float(p50), p95=float(p95), p99=float(p99), max=float(max(ok)))
+    return summary
+
+
+def summarize_level(records: List[Record], concurrency: int, started: float, warmup: float, duration: float) -> Dict:
+    """
+    Mesures d'un niveau sur la fenêtre [started + warmup, started + warmup + duration]
+
+    Le débit compte les réponses réussies reçues dans la fenêtre ; les latences
+    portent sur les requêtes envoyées dans la fenêtre.
+    """
+    window_start = started + warmup
+    window_end = window_start + duration
+    in_window = [record for record in records if window_start <= record.start < window_end]
+    completed = sum(1 for record in records if record.ok and window_start <= record.end < window_end)
+
+    summary = {"concurrency": concurrency, **summarize_records(in_window)}
+    summary["throughput"] = completed / duration
+    summary["by_kind"] = {
+        kind: summarize_records([record for record in in_window if record.kind == kind])
+        for kind in KINDS if any(record.kind == kind for record in in_window)
+    }
+    failures = {}
+    for record in in_window:
+        if not record.ok:
+            reason = record.error or f"HTTP {record.status}"
+            failures[reason] = failures.get(reason, 0) + 1
+    summary["failures"] = failures
+    return summary
+
+
+def find_knee(levels: List[Dict], min_gain: float = 0.10, max_error_rate: float = 0.01) -> Dict:
+    """
+    Point de saturation : dernier niveau avant que le débit ne progresse plus de
+    `min_gain` (relatif) ou que le taux d'erreurs ne dépasse `max_error_rate`
+
+    Returns:
+        Dict: concurrency (None si pas de saturation jusqu'au dernier niveau),
+        throughput et p95 à ce niveau, raison, et niveau de débit maximal
+    """
+    ordered = sorted(levels, key=lambda level: level["concurrency"])
+    best = max(ordered, key=lambda level: level["throughput"])
+    knee = {
+        "concurrency": None,
+        "reason": f"débit encore croissant à {ordered[-1]['concurrency']} clients",
+        "max_throughput": best["throughput"],
+        "max_throughput_concurrency": best["concurrency"]
+    }
+    for current, following in zip(ordered, ordered[1:]):
+        reason = None
+        if following["error_rate"] > max_error_rate:
+            reason = (f"{following['error_rate']:.1%} d'erreurs/refus à "
+                      f"{following['concurrency']} clients")
+        elif following["throughput"] < current["throughput"] * (1 + min_gain):
+            reason = (f"débit +{following['throughput'] / max(current['throughput'], 1e-9) - 1:.0%} seulement "
+                      f"de {current['concurrency']} à {following['concurrency']} clients")
+        if reason:
+            knee.update(
+                concurrency=current["concurrency"],
+                reason=reason,
+                throughput=current["throughput"],
+                p95=current.get("p95")
+            )
+            break
+    return knee
+
+
+def format_report(levels: List[Dict], knee: Dict) -> str:
+    """Tableau texte des niveaux et du point de saturation"""
+    lines = [f"{'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erreurs':>8} {'503':>6}"]
+    for level in levels:
+        lines.append(
+            f"{level['concurrency']:>8} {level['throughput']:>9.2f} "
+            f"{level.get('p50', 0) * 1000:>9.1f} {level.get('p95', 0) * 1000:>9.1f} "
+            f"{level.get('p99', 0) * 1000:>9.1f} {level['error_rate']:>7.1%} {level['rejected']:>6}"
+        )
+    if knee["concurrency"] is None:
+        lines.append(f"Pas de saturation ({knee['reason']})")
+    else:
+        lines.append(
+            f"Saturation à {knee['concurrency']} clients : {knee['throughput']:.2f} req/s ({knee['reason']})"
+        )
+    return "\n".join(lines)
+
+
+async def wait_ready(url: str, timeout: float):
+    """Attend que /health/ready réponde 200 (modèles chargés et pré-chauffés)"""
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=5) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/health/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"API non prête après {timeout}s: {url}")
+
+
+def start_server(port: int) -> subprocess.Popen:
+    """Lance l'API (uvicorn, sans rechargement) avec l'environnement courant"""
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=str(Path(__file__).resolve().parent.parent),
+        env=os.environ.copy()
+    )
+
+
+async def run(args) -> Dict:
+    mix = parse_mix(args.mix)
+    factory = RequestFactory(
+        args.audio_seconds,
+        TEXTS[args.text],
+        unique=not args.allow_cache,
+        tts_engine=args.tts_engine
+    )
+    await wait_ready(args.url, args.ready_timeout)
+
+    levels = []
+    for concurrency in (int(value) for value in args.levels.split(",")):
+        started = time.perf_counter()
+        records = await run_level(
+            args.url, concurrency, args.duration, args.warmup, mix, factory, args.timeout, args.seed
+        )
+        level = summarize_level(records, concurrency, started, args.warmup, args.duration)
+        levels.append(level)
+        print(
+            f"{concurrency} clients: {level['throughput']:.2f} req/s, "
+            f"p95 {level.get('p95', 0) * 1000:.0f} ms, erreurs {level['error_rate']:.1%}",
+            file=sys.stderr
+        )
+        if args.pause > 0:
+            await asyncio.sleep(args.pause)
+
+    knee = find_knee(levels, args.min_gain, args.max_error_rate)
+    return {
+        "environment": environment(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "mix": mix,
+        "levels": levels,
+        "knee": knee
+    }
+
+
+def parse_args(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="URL de l'API (défaut: http://127.0.0.1:<port>)")
+    parser.add_argument("--serve", action="store_true", help="Lancer l'API (uvicorn) pour la durée du test")
+    parser.add_argument("--port", type=int, default=8765, help="Port de l'API lancée par --serve")
+    parser.add_argument("--levels", default="1,8,32,128", help="Niveaux de concurrence")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durée mesurée par niveau (s)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Début de niveau ignoré (s)")
+    parser.add_argument("--pause", type=float, default=1.0, help="Pause entre niveaux (s)")
+    parser.add_argument("--mix", default="stt=6,tts=3,health=1", help="Proportions des requêtes")
+    parser.add_argument("--audio-seconds", type=float, default=3.0, help="Durée de l'audio envoyé au STT")
+    parser.add_argument("--text", default="medium", choices=sorted(TEXTS), help="Texte envoyé au TTS")
+    parser.add_argument("--tts-engine", default=None, help="Moteur TTS demandé (défaut: celui de l'API)")
+    parser.add_argument("--allow-cache", action="store_true", help="Requêtes identiques (mesure des caches)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Délai maximal d'une requête (s)")
+    parser.add_argument("--ready-timeout", type=float, default=300.0, help="Attente du démarrage de l'API (s)")
+    parser.add_argument("--min-gain", type=float, default=0.10, help="Gain de débit minimal entre niveaux")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Taux d'erreurs toléré")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Fichier JSON du rapport")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    args.url = args.url or f"http://127.0.0.1:{args.port}"
+
+    server = start_server(args.port) if args.serve else None
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print(format_report(report["levels"], report["knee"]))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
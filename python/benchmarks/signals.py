@@ -0,0 +1,86 @@
+"""
+Entrées déterministes des benchmarks : signaux synthétiques et textes fixes
+
+Mêmes paramètres -> mêmes échantillons, d'une machine et d'une exécution à l'autre.
+"""
+
+from typing import Callable, Dict
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def tone(duration: float, sr: int = SAMPLE_RATE, freq: float = 440.0, seed: int = 0) -> np.ndarray:
+    """Sinusoïde pure"""
+    t = np.arange(int(duration * sr)) / sr
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def noise(duration: float, sr: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Bruit blanc gaussien"""
+    rng = np.random.default_rng(seed)
+    return (0.1 * rng.standard_normal(int(duration * sr))).astype(np.float32)
+
+
+def silence(duration: float, sr: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Silence numérique"""
+    return np.zeros(int(duration * sr), dtype=np.float32)
+
+
+def speech_like(duration: float, sr: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Signal proche de la parole (harmoniques modulées + bruit)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sr)) / sr
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))  # ~4 syllabes/s
+    audio = 0.3 * envelope * voiced + 0.01 * rng.standard_normal(len(t))
+    return (audio / np.max(np.abs(audio)) * 0.5).astype(np.float32)
+
+
+def conversation(duration: float, sr: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Énoncés "parlés" séparés de pauses et de passages bruités (cas du VAD et du découpage)"""
+    rng = np.random.default_rng(seed)
+    total = int(duration * sr)
+    pieces = []
+    length = 0
+    turn = 0
+    while length < total:
+        utterance = speech_like(float(rng.uniform(1.5, 4.0)), sr, seed=seed + turn)
+        pause = silence(float(rng.uniform(0.3, 1.0)), sr)
+        pieces += [utterance, pause]
+        if turn % 3 == 2:
+            pieces.append(0.2 * noise(0.5, sr, seed=seed + turn))
+        length += sum(len(piece) for piece in pieces[-3:])
+        turn += 1
+    return np.concatenate(pieces)[:total].astype(np.float32)
+
+
+SIGNALS: Dict[str, Callable[..., np.ndarray]] = {
+    "tone": tone,
+    "noise": noise,
+    "silence": silence,
+    "speech_like": speech_like,
+    "conversation": conversation
+}
+
+# Textes de synthèse : courts (réponses), moyens (phrase de pipeline), longs (paragraphe)
+TEXTS: Dict[str, str] = {
+    "short": "Bonjour, comment allez-vous ?",
+    "medium": "Merci pour votre aide, j'aime beaucoup cette application et je l'utilise tous les jours.",
+    "long": (
+        "La reconnaissance vocale transforme la parole en texte, puis la traduction adapte ce texte "
+        "à la langue de l'interlocuteur. Enfin, la synthèse vocale lit la traduction à voix haute. "
+        "Chaque étape ajoute de la latence : c'est pourquoi nous la mesurons séparément, sur des "
+        "entrées identiques d'une version à l'autre."
+    )
+}
+
+
+def make_signal(name: str, duration: float, sr: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Signal nommé de SIGNALS"""
+    if name not in SIGNALS:
+        raise ValueError(f"Signal inconnu: {name} (attendu: {', '.join(SIGNALS)})")
+    return SIGNALS[name](duration, sr, seed=seed)
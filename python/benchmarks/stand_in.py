@@ -0,0 +1,59 @@
+"""
+Modèle Whisper de substitution pour mesurer hors ligne
+
+Mêmes dimensions que "tiny" (donc même graphe de calcul et même coût par jeton),
+poids aléatoires à graine fixe : aucun téléchargement, résultats reproductibles.
+Le texte produit n'a pas de sens ; seules les durées sont significatives.
+"""
+
+import time
+
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+from services.metrics import MODEL_LOAD_SECONDS, MODEL_LOADS
+from services.speech_to_text import SpeechToTextService
+
+# Dimensions de whisper "tiny" (39 M paramètres)
+TINY_DIMS = ModelDimensions(
+    n_mels=80,
+    n_audio_ctx=1500,
+    n_audio_state=384,
+    n_audio_head=6,
+    n_audio_layer=4,
+    n_vocab=51865,
+    n_text_ctx=448,
+    n_text_state=384,
+    n_text_head=6,
+    n_text_layer=4
+)
+
+
+class StandInSpeechToTextService(SpeechToTextService):
+    """SpeechToTextService dont le modèle est construit localement (voir le module)"""
+
+    def __init__(self, seed: int = 0, **kwargs):
+        self.seed = seed
+        kwargs.setdefault("model_size", "stand-in-tiny")
+        super().__init__(**kwargs)
+
+    def _load_model(self):
+        load_start = time.perf_counter()
+        torch.manual_seed(self.seed)
+        self.model = Whisper(TINY_DIMS).to(self.device).eval()
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - load_start, model=f"whisper-{self.model_size}")
+        MODEL_LOADS.inc(model=f"whisper-{self.model_size}")
+
+
+def write_checkpoint(path: str, seed: int = 0) -> str:
+    """
+    Écrit le modèle de substitution au format des checkpoints Whisper (poids
+    float16, comme les fichiers officiels) : utilisable comme model_size=path
+    """
+    torch.manual_seed(seed)
+    model = Whisper(TINY_DIMS)
+    torch.save({
+        "dims": vars(TINY_DIMS),
+        "model_state_dict": {name: tensor.half() for name, tensor in model.state_dict().items()}
+    }, path)
+    return path
@@ -0,0 +1,200 @@
+"""
+Suite de benchmarks reproductible : STT, étapes du pré-traitement et TTS
+
+Entrées déterministes (benchmarks/signals.py), mesures de latence p50/p95/p99,
+facteur temps réel, débit et pic de mémoire, rapport JSON. Avec --baseline, le
+rapport est comparé à une référence enregistrée et le code de sortie vaut 1 en
+cas de régression.
+
+Usage (depuis le dossier python/) :
+    # Hors ligne sur CPU, sans téléchargement (modèle de substitution "tiny")
+    python -m benchmarks.suite --stand-in --runs 5 --output bench.json
+
+    # Comparaison avec une référence (échec au-delà de 10 % d'écart)
+    python -m benchmarks.suite --stand-in --baseline baseline.json --threshold 0.10
+
+    # Un seul groupe, modèle Whisper réel
+    python -m benchmarks.suite --groups stt --model-size base --durations 5,30
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+from typing import Callable, Dict, List
+
+import soundfile as sf
+
+from .harness import compare, environment, format_comparison, run_benchmark
+from .signals import SAMPLE_RATE, TEXTS, make_signal
+
+GROUPS = ("preprocessing", "stt", "tts")
+DEFAULT_SIGNALS = "speech_like,conversation,noise,silence,tone"
+
+logger = logging.getLogger("benchmarks")
+
+
+def measure(results: Dict, name: str, fn: Callable, args, **kwargs):
+    """Enregistre un benchmark ; une erreur est consignée sans arrêter la suite"""
+    try:
+        results[name] = run_benchmark(fn, runs=args.runs, warmup=args.warmup, **kwargs)
+        logger.warning(f"{name}: p50 {results[name]['p50'] * 1000:.1f} ms")
+    except Exception as e:
+        results[name] = {"error": f"{type(e).__name__}: {e}"}
+        logger.warning(f"{name}: échec ({results[name]['error']})")
+
+
+def bench_preprocessing(args, clips: Dict, tmp_dir: str) -> Dict:
+    """Chaque étape d'AudioPreprocessor, puis preprocess() complet depuis un fichier"""
+    from services.audio_preprocessor import AudioPreprocessor
+    from services.spectral_frontend import WHISPER_HOP_LENGTH, WHISPER_N_FFT
+
+    preprocessor = AudioPreprocessor(target_sr=SAMPLE_RATE)
+    sr = SAMPLE_RATE
+    # Caractéristiques sur la STFT de Whisper (celle que le service calcule déjà)
+    whisper_stft = {"n_fft": WHISPER_N_FFT, "hop_length": WHISPER_HOP_LENGTH}
+    stages = {
+        "stft": lambda audio: preprocessor.analyze(audio, sr),
+        "noise_reduction": lambda audio: preprocessor._reduce_noise(audio, sr),
+        "normalize": lambda audio: preprocessor._normalize(audio),
+        "vad": lambda audio: preprocessor.detect_speech_segments(audio, sr),
+        "lowpass": lambda audio: preprocessor._apply_lowpass_filter(audio, sr),
+        "mfcc": lambda audio: preprocessor.extract_mfcc(audio, sr, **whisper_stft),
+        "log_mel": lambda audio: preprocessor.extract_log_mel_spectrogram(audio, sr, **whisper_stft)
+    }
+
+    results = {}
+    for clip_name, audio in clips.items():
+        seconds = len(audio) / sr
+        for stage, fn in stages.items():
+            measure(results, f"preprocessing/{stage}/{clip_name}", lambda: fn(audio), args, audio_seconds=seconds)
+
+        path = os.path.join(tmp_dir, clip_name.replace("/", "_") + ".wav")
+        sf.write(path, audio, sr)
+        measure(results, f"preprocessing/full/{clip_name}", lambda: preprocessor.preprocess(path), args,
+                audio_seconds=seconds)
+    return results
+
+
+def bench_stt(args, clips: Dict) -> Dict:
+    """SpeechToTextService.transcribe_array (cache désactivé) sur chaque signal"""
+    options = {"device": "cpu", "language": args.language, "preprocess": args.stt_preprocess}
+    if args.stand_in:
+        from .stand_in import StandInSpeechToTextService
+        service = StandInSpeechToTextService(**options)
+    else:
+        from services.speech_to_text import SpeechToTextService
+        service = SpeechToTextService(model_size=args.model_size, **options)
+
+    results = {}
+    for clip_name, audio in clips.items():
+        measure(
+            results,
+            f"stt/{service.model_size}/{clip_name}",
+            lambda: service.transcribe_array(audio, beam_size=args.beam_size, best_of=args.beam_size),
+            args,
+            audio_seconds=len(audio) / SAMPLE_RATE
+        )
+    return results
+
+
+def bench_tts(args) -> Dict:
+    """TextToSpeechService.synthesize (sans cache) sur les textes fixes"""
+    from services.text_to_speech import TextToSpeechService
+
+    try:
+        service = TextToSpeechService(engine=args.tts_engine, language=args.tts_language)
+    except Exception as e:
+        return {f"tts/{args.tts_engine}": {"error": f"{type(e).__name__}: {e}"}}
+
+    def synthesize(text: str) -> float:
+        _, metadata = service.synthesize(text)
+        # Durée produite : facteur temps réel de la synthèse
+        return float(metadata.get("duration") or 0.0)
+
+    results = {}
+    for text_name, text in TEXTS.items():
+        measure(results, f"tts/{args.tts_engine}/{text_name}", lambda: synthesize(text), args)
+    return results
+
+
+def parse_args(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", default=",".join(GROUPS), help=f"Groupes à mesurer ({', '.join(GROUPS)})")
+    parser.add_argument("--runs", type=int, default=5, help="Appels mesurés par benchmark")
+    parser.add_argument("--warmup", type=int, default=1, help="Appels hors mesure par benchmark")
+    parser.add_argument("--signals", default=DEFAULT_SIGNALS, help="Signaux de benchmarks/signals.py")
+    parser.add_argument("--durations", default="5,30", help="Durées des signaux (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-size", default=os.getenv("WHISPER_MODEL_SIZE", "tiny"))
+    parser.add_argument("--stand-in", action="store_true",
+                        help="Modèle de substitution aux dimensions de tiny (hors ligne, sans téléchargement)")
+    parser.add_argument("--language", default="pt")
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--stt-preprocess", action="store_true", help="Inclure le pré-traitement dans la mesure STT")
+    parser.add_argument("--tts-engine", default="pyttsx3", help="pyttsx3 (hors ligne) ou gtts (réseau)")
+    parser.add_argument("--tts-language", default="fr")
+    parser.add_argument("--threads", type=int, default=None, help="Threads PyTorch (défaut: réglage de PyTorch)")
+    parser.add_argument("--output", help="Fichier JSON du rapport (défaut: sortie standard)")
+    parser.add_argument("--baseline", help="Rapport de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Écart relatif toléré (0.10 = 10 %%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(name)s - %(message)s")
+
+    groups = [group.strip() for group in args.groups.split(",") if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        raise SystemExit(f"Groupes inconnus: {', '.join(sorted(unknown))}")
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    clips = {
+        f"{name}/{duration:g}s": make_signal(name, duration, seed=args.seed)
+        for name in args.signals.split(",") if name.strip()
+        for duration in (float(value) for value in args.durations.split(","))
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if "preprocessing" in groups:
+            results.update(bench_preprocessing(args, clips, tmp_dir))
+        if "stt" in groups:
+            results.update(bench_stt(args, clips))
+        if "tts" in groups:
+            results.update(bench_tts(args))
+
+    report = {
+        "environment": environment(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "results": results
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        print(format_comparison(rows), file=sys.stderr)
+        regressions = [row for row in rows if row["regression"]]
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,29 @@
 """
 Services de traitement audio pour transVoicer
+
+Les classes sont importées à la première utilisation : importer un module léger
+(services.metrics, services.inference_executor...) ne charge ni Whisper ni PyTorch.
 """
 
-from .audio_preprocessor import AudioPreprocessor
-from .speech_to_text import SpeechToTextService
-from .text_to_speech import TextToSpeechService
+import importlib
+
+_EXPORTS = {
+    'AudioPreprocessor': '.audio_preprocessor',
+    'SpeechToTextService': '.speech_to_text',
+    'TextToSpeechService': '.text_to_speech',
+    'WorkerPool': '.worker_pool'
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    'AudioPreprocessor',
-    'SpeechToTextService',
-    'TextToSpeechService'
-]
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
 
 
+def __dir__():
+    return sorted(list(globals()) + __all__)
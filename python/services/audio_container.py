@@ -0,0 +1,189 @@
+"""
+Lecture et écriture des conteneurs audio produits par les moteurs TTS
+En-têtes WAV (RIFF), trames et balises ID3 des fichiers MP3, sans décoder l'audio.
+"""
+
+import io
+import logging
+import struct
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Taille « inconnue » d'un WAV émis en flux (lecteurs : lire jusqu'à la fin du flux)
+STREAM_SIZE = 0xFFFFFFFF
+
+
+class WavInfo(NamedTuple):
+    """Paramètres et position des échantillons d'un fichier WAV"""
+    fmt: bytes
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def duration(self) -> float:
+        """Durée en secondes d'après la taille des données"""
+        frame_size = self.channels * self.bits_per_sample // 8
+        if frame_size == 0 or self.sample_rate == 0:
+            return 0.0
+        return self.data_size // frame_size / self.sample_rate
+
+
+def parse_wav(data: bytes) -> WavInfo:
+    """
+    Lit les chunks d'un fichier WAV (RIFF)
+
+    Une taille de chunk data nulle ou dépassant le fichier (WAV écrit en flux)
+    est remplacée par la taille réellement disponible.
+
+    Raises:
+        ValueError: données qui ne sont pas un WAV valide
+    """
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Données audio non WAV")
+
+    fmt = None
+    position = 12
+    while position + 8 <= len(data):
+        chunk_id = data[position:position + 4]
+        (size,) = struct.unpack("<I", data[position + 4:position + 8])
+        body = position + 8
+        if chunk_id == b"fmt ":
+            fmt = data[body:body + size]
+        elif chunk_id == b"data":
+            if fmt is None or len(fmt) < 16:
+                raise ValueError("WAV sans chunk fmt")
+            available = len(data) - body
+            if size == 0 or size > available:
+                size = available
+            channels, sample_rate = struct.unpack("<HI", fmt[2:8])
+            (bits_per_sample,) = struct.unpack("<H", fmt[14:16])
+            return WavInfo(fmt, channels, sample_rate, bits_per_sample, body, size)
+        # Les chunks sont alignés sur 2 octets
+        position = body + size + (size & 1)
+
+    raise ValueError("WAV sans chunk data")
+
+
+def wav_stream_header(fmt: bytes) -> bytes:
+    """En-tête WAV de longueur inconnue, suivi directement des échantillons PCM"""
+    padding = b"\x00" if len(fmt) & 1 else b""
+    return (
+        b"RIFF" + struct.pack("<I", STREAM_SIZE) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt + padding
+        + b"data" + struct.pack("<I", STREAM_SIZE)
+    )
+
+
+def strip_id3(data: bytes) -> bytes:
+    """Retire les balises ID3v2 (début) et ID3v1 (fin) : reste une suite de trames MP3"""
+    start = 0
+    if len(data) >= 10 and data[:3] == b"ID3":
+        # Taille « syncsafe » : 7 bits utiles par octet
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        start = 10 + size + footer
+    end = len(data)
+    if end - start >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    return data[start:end]
+
+
+# Débits (kbit/s) par (version MPEG-1 ?, couche) ; index 0 = « free », 15 = invalide
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Taux d'échantillonnage par version (bits 19-20 de l'en-tête : 0 = 2.5, 2 = 2, 3 = 1)
+_MP3_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+
+def _mp3_frame(data: bytes, position: int):
+    """
+    Décode l'en-tête de trame MP3 à `position`
+
+    Returns:
+        (longueur de la trame en octets, échantillons par canal, taux d'échantillonnage)
+        ou None si l'en-tête est invalide
+    """
+    b1, b2 = data[position + 1], data[position + 2]
+    if data[position] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x01
+
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    samples = 1152 if layer == 2 or mpeg1 else 576
+    return samples // 8 * bitrate // sample_rate + padding, samples, sample_rate
+
+
+def mp3_duration(data: bytes) -> float:
+    """
+    Durée d'un MP3 en secondes : somme des échantillons de toutes les trames
+
+    Exact aussi pour un débit variable ou une concaténation de MP3 ; la trame
+    d'information Xing/Info éventuelle (silencieuse) n'est pas comptée.
+    """
+    data = strip_id3(data)
+    duration = 0.0
+    position = 0
+    first = True
+    while position + 4 <= len(data):
+        frame = _mp3_frame(data, position)
+        if frame is None:
+            # Balise ID3 entre deux MP3 concaténés, ou octets parasites : resynchroniser
+            if data[position:position + 3] == b"ID3" and position + 10 <= len(data):
+                size = (data[position + 6] << 21) | (data[position + 7] << 14) \
+                    | (data[position + 8] << 7) | data[position + 9]
+                position += 10 + size
+            else:
+                position += 1
+            continue
+        length, samples, sample_rate = frame
+        if first and (b"Xing" in data[position:position + 64] or b"Info" in data[position:position + 64]):
+            samples = 0
+        first = False
+        duration += samples / sample_rate
+        position += max(length, 1)
+    return duration
+
+
+def audio_duration(data: bytes) -> float:
+    """
+    Durée en secondes d'un audio encodé (WAV, MP3, ou tout format lu par libsndfile)
+
+    Returns:
+        Durée, ou 0.0 si le format n'est pas reconnu
+    """
+    try:
+        if data[:4] == b"RIFF":
+            return parse_wav(data).duration
+        if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and (data[1] & 0xE0) == 0xE0):
+            return mp3_duration(data)
+
+        import soundfile as sf
+        return sf.info(io.BytesIO(data)).duration
+    except Exception as e:
+        logger.warning(f"Durée audio indéterminée: {e}")
+        return 0.0
@@ -0,0 +1,294 @@
+"""
+Décodage audio en mémoire
+Convertit directement les octets reçus (wav, flac, ogg, webm, mp3...) en signal
+mono float32 au taux cible, sans fichier temporaire.
+"""
+
+import hashlib
+import io
+import logging
+import queue
+import subprocess
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+# Formats lus nativement par libsndfile (sans ffmpeg)
+_SOUNDFILE_FORMATS = {"wav", "flac", "ogg", "aiff", "aif"}
+
+
+class DecodedAudio:
+    """
+    Signal décodé une seule fois, accompagné de ses statistiques
+
+    Toutes les validations (durée, silence) et l'inférence réutilisent cet objet au lieu
+    de recharger le fichier. Le hash porte sur les échantillons décodés : deux envois
+    du même enregistrement donnent le même hash quel que soit le conteneur.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int):
+        """
+        Args:
+            samples: Signal mono float32
+            sample_rate: Taux d'échantillonnage (Hz)
+        """
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.sample_rate = sample_rate
+        self.num_samples = len(self.samples)
+        self.duration = self.num_samples / sample_rate if sample_rate else 0.0
+
+        if self.num_samples:
+            # np.dot évite le tableau intermédiaire de samples**2
+            self.peak = float(max(self.samples.max(), -self.samples.min()))
+            self.rms = float(np.sqrt(np.dot(self.samples, self.samples) / self.num_samples))
+        else:
+            self.peak = 0.0
+            self.rms = 0.0
+
+        # Hash sans copie : blake2b lit directement le buffer du tableau
+        self.content_hash = hashlib.blake2b(self.samples.data, digest_size=16).hexdigest()
+
+    @classmethod
+    def from_bytes(
+        cls,
+        data: bytes,
+        target_sr: int = 16000,
+        format_hint: Optional[str] = None
+    ) -> "DecodedAudio":
+        """Décode un buffer audio (voir decode_audio_bytes)"""
+        return cls(decode_audio_bytes(data, target_sr=target_sr, format_hint=format_hint), target_sr)
+
+    @classmethod
+    def from_file(cls, audio_path: str, target_sr: int = 16000) -> "DecodedAudio":
+        """Lit le fichier une seule fois puis le décode en mémoire"""
+        with open(audio_path, "rb") as f:
+            data = f.read()
+        return cls.from_bytes(data, target_sr=target_sr, format_hint=Path(audio_path).suffix)
+
+    def validate(self, min_duration: float = 0.5, silence_peak: float = 0.01):
+        """
+        Vérifie que le signal est exploitable
+
+        Raises:
+            ValueError: signal vide ou plus court que min_duration
+        """
+        if self.num_samples == 0:
+            raise ValueError("Audio vide après décodage")
+        if self.duration < min_duration:
+            raise ValueError(f"Audio trop court: {self.duration:.2f}s (minimum {min_duration}s)")
+        if self.peak < silence_peak:
+            logger.warning(f"Audio très silencieux (amplitude max: {self.peak:.4f})")
+
+    def get_info(self) -> dict:
+        """Statistiques du signal (sérialisables en JSON)"""
+        return {
+            "duration": self.duration,
+            "sample_rate": self.sample_rate,
+            "peak": self.peak,
+            "rms": self.rms,
+            "content_hash": self.content_hash
+        }
+
+
+def decode_audio_bytes(
+    data: bytes,
+    target_sr: int = 16000,
+    format_hint: Optional[str] = None
+) -> np.ndarray:
+    """
+    Décode un buffer audio en signal mono float32
+
+    libsndfile est essayé en premier (WAV/FLAC/OGG, aucune copie disque) ; les autres
+    conteneurs (webm/opus, mp3, m4a...) sont décodés par ffmpeg via des pipes
+    stdin/stdout.
+
+    Args:
+        data: Contenu du fichier audio
+        target_sr: Taux d'échantillonnage de sortie (Hz)
+        format_hint: Extension ou type du fichier (ex: "webm", ".wav"), optionnel
+
+    Returns:
+        Signal mono float32 à target_sr
+    """
+    if not data:
+        raise ValueError("Buffer audio vide")
+
+    # Le contenu fait foi : l'extension annoncée par le client est souvent inexacte
+    fmt = _sniff_format(data) or (format_hint or "").lower().lstrip(".").split("/")[-1].removeprefix("x-")
+
+    if fmt in _SOUNDFILE_FORMATS or not fmt:
+        try:
+            return _decode_with_soundfile(data, target_sr)
+        except Exception as e:
+            logger.debug(f"libsndfile ne peut pas décoder le buffer ({e}), utilisation de ffmpeg")
+
+    return _decode_with_ffmpeg(data, target_sr)
+
+
+def _sniff_format(data: bytes) -> Optional[str]:
+    """Détecte le conteneur à partir des premiers octets"""
+    header = data[:12]
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"FORM":
+        return "aiff"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def _decode_with_soundfile(data: bytes, target_sr: int) -> np.ndarray:
+    audio, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+    if sr != target_sr:
+        import librosa
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=target_sr)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def _decode_with_ffmpeg(data: bytes, target_sr: int) -> np.ndarray:
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(target_sr),
+        "pipe:1"
+    ]
+    try:
+        process = subprocess.run(cmd, input=data, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise RuntimeError(
+            "ffmpeg est requis pour décoder ce format audio. "
+            "Installez-le avec: brew install ffmpeg (macOS) ou apt-get install ffmpeg (Linux)"
+        )
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode(errors="ignore").strip().splitlines()
+        raise RuntimeError(f"Impossible de décoder l'audio: {stderr[-1] if stderr else e}")
+
+    return np.frombuffer(process.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+class StreamDecoder:
+    """
+    Décodeur incrémental pour l'audio reçu par morceaux (WebSocket)
+
+    - "pcm16" : entiers 16 bits little-endian
+    - "float32" : flottants 32 bits little-endian
+    - tout autre format (ex: "webm", "ogg" pour Opus) : décodé au fil de l'eau par un
+      processus ffmpeg alimenté via stdin
+    """
+
+    RAW_FORMATS = ("pcm16", "float32")
+
+    def __init__(self, format: str = "pcm16", sample_rate: int = 16000, target_sr: int = 16000):
+        """
+        Args:
+            format: "pcm16", "float32" ou conteneur compressé ("webm", "ogg"...)
+            sample_rate: Taux d'échantillonnage des morceaux bruts (ignoré pour ffmpeg)
+            target_sr: Taux d'échantillonnage de sortie
+        """
+        self.format = format.lower()
+        self.sample_rate = sample_rate
+        self.target_sr = target_sr
+        self._remainder = b""
+        self._resampler = None
+        self._process = None
+        self._output: "queue.Queue[bytes]" = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+
+        if self.format in self.RAW_FORMATS:
+            if sample_rate != target_sr:
+                import soxr
+                self._resampler = soxr.ResampleStream(sample_rate, target_sr, 1, dtype="float32")
+        else:
+            self._start_ffmpeg()
+
+    def _start_ffmpeg(self):
+        cmd = [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(self.target_sr),
+            "pipe:1"
+        ]
+        try:
+            self._process = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            raise RuntimeError(
+                "ffmpeg est requis pour décoder ce format audio. "
+                "Installez-le avec: brew install ffmpeg (macOS) ou apt-get install ffmpeg (Linux)"
+            )
+        self._reader = threading.Thread(target=self._read_ffmpeg, daemon=True)
+        self._reader.start()
+
+    def _read_ffmpeg(self):
+        while True:
+            chunk = self._process.stdout.read1(8192)
+            if not chunk:
+                break
+            self._output.put(chunk)
+
+    def feed(self, data: bytes) -> np.ndarray:
+        """Ajoute un morceau et retourne les échantillons décodés disponibles"""
+        if self.format in self.RAW_FORMATS:
+            return self._decode_raw(data, final=False)
+        self._process.stdin.write(data)
+        self._process.stdin.flush()
+        return self._drain_ffmpeg()
+
+    def close(self) -> np.ndarray:
+        """Termine le flux et retourne les derniers échantillons"""
+        if self.format in self.RAW_FORMATS:
+            return self._decode_raw(b"", final=True)
+        if self._process is None:
+            return np.zeros(0, dtype=np.float32)
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        self._reader.join(timeout=5)
+        self._process.wait(timeout=5)
+        samples = self._drain_ffmpeg()
+        self._process = None
+        return samples
+
+    def _decode_raw(self, data: bytes, final: bool) -> np.ndarray:
+        data = self._remainder + data
+        width = 2 if self.format == "pcm16" else 4
+        usable = len(data) - len(data) % width
+        self._remainder = data[usable:]
+        if self.format == "pcm16":
+            samples = np.frombuffer(data[:usable], np.int16).astype(np.float32) / 32768.0
+        else:
+            samples = np.frombuffer(data[:usable], "<f4").astype(np.float32)
+        if self._resampler is not None:
+            samples = self._resampler.resample_chunk(samples, last=final)
+        return samples
+
+    def _drain_ffmpeg(self) -> np.ndarray:
+        chunks = []
+        while True:
+            try:
+                chunks.append(self._output.get_nowait())
+            except queue.Empty:
+                break
+        data = self._remainder + b"".join(chunks)
+        usable = len(data) - len(data) % 2
+        self._remainder = data[usable:]
+        return np.frombuffer(data[:usable], np.int16).astype(np.float32) / 32768.0
@@ -1,16 +1,21 @@
 """
 Module de pré-traitement audio pour Speech-to-Text
 Inclut : VAD (Voice Activity Detection), réduction de bruit, normalisation, MFCC
+Mode flux : traitement par blocs à mémoire constante (filtres causaux avec état)
 """
 
 import numpy as np
 import librosa
 import soundfile as sf
-import noisereduce as nr
 from scipy import signal
-from typing import Tuple, Optional
+from typing import Iterable, Iterator, List, Tuple, Optional
 import logging
 
+from .feature_batch import BatchFeatureExtractor, PackedFeatures
+from .metrics import stage_timer
+from .spectral_frontend import SpectralFrontend, Spectrogram
+from .vad import VADEngine, SpeechSegment, SpeechTimeline
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,7 +27,8 @@ class AudioPreprocessor:
         target_sr: int = 16000,
         normalize: bool = True,
         noise_reduction: bool = True,
-        vad_enabled: bool = True
+        vad_enabled: bool = True,
+        vad: Optional[VADEngine] = None
     ):
         """
         Args:
@@ -30,11 +36,13 @@ class AudioPreprocessor:
             normalize: Normaliser l'amplitude audio
             noise_reduction: Activer la réduction de bruit
             vad_enabled: Activer la détection d'activité vocale
+            vad: Moteur VAD (par défaut VADEngine avec ses réglages standards)
         """
         self.target_sr = target_sr
         self.normalize = normalize
         self.noise_reduction = noise_reduction
         self.vad_enabled = vad_enabled
+        self.vad = vad or VADEngine()
     
     def preprocess(
         self,
@@ -50,22 +58,31 @@ class AudioPreprocessor:
         logger.info(f"Pré-traitement de {audio_path}")
         
         # Charger l'audio
-        audio, sr = librosa.load(audio_path, sr=self.target_sr, mono=True)
-        
-        # 1. Réduction de bruit
-        if self.noise_reduction:
-            audio = self._reduce_noise(audio, sr)
-        
-        # 2. Normalisation
-        if self.normalize:
-            audio = self._normalize(audio)
+        with stage_timer("audio_load"):
+            audio, sr = librosa.load(audio_path, sr=self.target_sr, mono=True)
         
-        # 3. VAD (Voice Activity Detection)
-        if self.vad_enabled:
-            audio = self._apply_vad(audio, sr)
-        
-        # 4. Filtrage passe-bas (supprimer les fréquences > 8kHz pour la voix)
-        audio = self._apply_lowpass_filter(audio, sr, cutoff=8000)
+        with stage_timer("preprocessing"):
+            # STFT calculée une seule fois : réduction de bruit et VAD en dérivent
+            spec = self.analyze(audio, sr)
+            
+            # 1. Réduction de bruit
+            if self.noise_reduction:
+                spec = spec.spectral_gate(prop_decrease=0.8)
+                audio = spec.to_audio()
+                logger.debug("Réduction de bruit appliquée")
+            
+            # 2. Normalisation (gain constant : le spectrogramme est simplement mis à l'échelle)
+            if self.normalize and len(audio) > 0:
+                gain = self._normalization_gain(audio)
+                audio = np.clip(audio * gain, -1.0, 1.0)
+                spec = spec.scaled(gain)
+            
+            # 3. VAD (Voice Activity Detection)
+            if self.vad_enabled:
+                audio = self._apply_vad(audio, sr, spectrogram=spec)
+            
+            # 4. Filtrage passe-bas (supprimer les fréquences > 8kHz pour la voix)
+            audio = self._apply_lowpass_filter(audio, sr, cutoff=8000)
         
         # Sauvegarder si un chemin de sortie est fourni
         if output_path:
@@ -74,16 +91,78 @@ class AudioPreprocessor:
         
         return audio, sr
     
+    def preprocess_stream(self, blocks: Iterable[np.ndarray], sr: int) -> Iterator[np.ndarray]:
+        """
+        Pré-traite un flux de blocs audio (mono, float32) à mémoire constante
+        
+        Chaque bloc reçu produit un bloc traité de même longueur : porte de bruit
+        incrémentale, normalisation par blocs et filtre passe-bas causal dont l'état
+        est conservé d'un bloc à l'autre. Les silences ne sont pas supprimés (la
+        chronologie est conservée) ; detect_speech_segments() reste disponible.
+        
+        Args:
+            blocks: Itérable de blocs audio (ex: morceaux reçus en direct)
+            sr: Taux d'échantillonnage des blocs
+        
+        Yields:
+            Blocs traités
+        """
+        processor = StreamingPreprocessor(
+            sr,
+            normalize=self.normalize,
+            noise_gate=self.noise_reduction
+        )
+        for block in blocks:
+            yield processor.process(block)
+    
+    def preprocess_file_stream(
+        self,
+        audio_path: str,
+        block_duration: float = 1.0
+    ) -> Iterator[np.ndarray]:
+        """
+        Lit et pré-traite un fichier bloc par bloc, sans le charger en entier
+        
+        Args:
+            audio_path: Fichier audio lisible par soundfile (wav, flac, ogg...)
+            block_duration: Durée d'un bloc lu (s)
+        
+        Yields:
+            Blocs traités, mono, à target_sr
+        """
+        logger.info(f"Pré-traitement en flux de {audio_path}")
+        with sf.SoundFile(audio_path) as f:
+            blocksize = max(1, int(f.samplerate * block_duration))
+            resampler = None
+            if f.samplerate != self.target_sr:
+                import soxr
+                resampler = soxr.ResampleStream(f.samplerate, self.target_sr, 1, dtype="float32")
+            
+            def read_blocks():
+                for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+                    mono = block.mean(axis=1)
+                    yield resampler.resample_chunk(mono) if resampler is not None else mono
+                if resampler is not None:
+                    yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+            
+            yield from self.preprocess_stream(read_blocks(), self.target_sr)
+    
+    def analyze(self, audio: np.ndarray, sr: int) -> Spectrogram:
+        """STFT du front-end partagé (paramètres Whisper), réutilisable par toutes les étapes"""
+        return SpectralFrontend.get(sr).analyze(audio)
+    
     def _reduce_noise(self, audio: np.ndarray, sr: int) -> np.ndarray:
-        """Réduction de bruit spectral"""
+        """
+        Réduction de bruit spectral
+
+        Porte stationnaire équivalente au mode stationary=True de noisereduce,
+        qui remplace la bibliothèque : noisereduce recalcule sa propre STFT
+        (n_fft=1024) alors que preprocess() réutilise celle du VAD. Le seuil et
+        le lissage du masque diffèrent légèrement, donc le niveau résiduel aussi.
+        """
         try:
-            # Utiliser noisereduce avec méthode stationnaire
-            reduced = nr.reduce_noise(
-                y=audio,
-                sr=sr,
-                stationary=True,
-                prop_decrease=0.8
-            )
+            # Porte de bruit stationnaire sur la STFT partagée
+            reduced = self.analyze(audio, sr).spectral_gate(prop_decrease=0.8).to_audio()
             logger.debug("Réduction de bruit appliquée")
             return reduced
         except Exception as e:
@@ -95,102 +174,81 @@ class AudioPreprocessor:
         if len(audio) == 0:
             return audio
         
-        # Normalisation RMS (Root Mean Square)
-        rms = np.sqrt(np.mean(audio**2))
-        if rms > 0:
-            target_rms = 0.1  # Niveau cible
-            audio = audio * (target_rms / rms)
+        audio = audio * self._normalization_gain(audio)
         
         # Limiter à [-1, 1]
         audio = np.clip(audio, -1.0, 1.0)
         
         return audio
     
-    def _apply_vad(self, audio: np.ndarray, sr: int) -> np.ndarray:
-        """Détection d'activité vocale (VAD)"""
+    def _normalization_gain(self, audio: np.ndarray) -> float:
+        """Gain de normalisation RMS (Root Mean Square)"""
+        rms = float(np.sqrt(np.mean(np.square(audio, dtype=np.float64))))
+        if rms > 0:
+            target_rms = 0.1  # Niveau cible
+            return target_rms / rms
+        return 1.0
+    
+    def _apply_vad(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        spectrogram: Optional[Spectrogram] = None
+    ) -> np.ndarray:
+        """Détection d'activité vocale (VAD) : ne conserve que les segments de parole"""
         try:
-            import webrtcvad
-            
-            # webrtcvad nécessite des échantillons de 10, 20 ou 30 ms
-            # et un taux d'échantillonnage de 8000, 16000 ou 32000 Hz
-            if sr not in [8000, 16000, 32000]:
-                logger.warning(f"VAD: taux d'échantillonnage {sr} non supporté, rééchantillonnage à 16000")
-                audio = librosa.resample(audio, orig_sr=sr, target_sr=16000)
-                sr = 16000
-            
-            vad = webrtcvad.Vad(2)  # Mode agressif (0-3)
-            frame_duration_ms = 30  # 30ms par frame
-            frame_size = int(sr * frame_duration_ms / 1000)
-            
-            # Convertir en int16 pour webrtcvad
-            audio_int16 = (audio * 32767).astype(np.int16)
-            
-            # Détecter les segments vocaux
-            voice_segments = []
-            for i in range(0, len(audio_int16) - frame_size, frame_size):
-                frame = audio_int16[i:i + frame_size]
-                if len(frame) == frame_size:
-                    is_speech = vad.is_speech(frame.tobytes(), sr)
-                    if is_speech:
-                        voice_segments.append((i, i + frame_size))
-            
-            # Extraire uniquement les segments vocaux
-            if voice_segments:
-                # Fusionner les segments proches
-                merged = self._merge_segments(voice_segments, max_gap=frame_size * 2)
-                
-                # Extraire l'audio des segments vocaux
-                mask = np.zeros(len(audio), dtype=bool)
-                for start, end in merged:
-                    mask[start:end] = True
-                
-                audio = audio[mask]
-                logger.debug(f"VAD: {len(voice_segments)} segments vocaux détectés")
-            else:
+            trimmed, timeline = self.trim_silence(audio, sr, spectrogram=spectrogram)
+            if not timeline.segments:
                 logger.warning("VAD: Aucun segment vocal détecté")
-            
-            return audio
-            
-        except ImportError:
-            logger.warning("webrtcvad non disponible, VAD désactivé")
-            return audio
+                return audio
+            logger.debug(f"VAD: {len(timeline.segments)} segments vocaux détectés")
+            return trimmed
         except Exception as e:
             logger.warning(f"Erreur VAD: {e}")
             return audio
     
-    def _merge_segments(self, segments: list, max_gap: int) -> list:
-        """Fusionne les segments proches"""
-        if not segments:
-            return []
+    def detect_speech_segments(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        spectrogram: Optional[Spectrogram] = None
+    ) -> List[SpeechSegment]:
+        """
+        Détecte les segments de parole sans modifier l'audio
         
-        merged = [segments[0]]
-        for current in segments[1:]:
-            last = merged[-1]
-            if current[0] - last[1] <= max_gap:
-                merged[-1] = (last[0], current[1])
-            else:
-                merged.append(current)
+        Args:
+            spectrogram: STFT déjà calculée par analyze() (optionnel)
         
-        return merged
+        Returns:
+            Liste de SpeechSegment (start, end en échantillons)
+        """
+        with stage_timer("vad"):
+            return self.vad.detect(audio, sr, spectrogram=spectrogram)
     
-    def _apply_lowpass_filter(self, audio: np.ndarray, sr: int, cutoff: int = 8000) -> np.ndarray:
-        """Filtre passe-bas pour supprimer les hautes fréquences"""
-        nyquist = sr / 2
-        
-        # S'assurer que cutoff est valide
-        if cutoff >= nyquist:
-            cutoff = nyquist * 0.95  # Utiliser 95% de la fréquence de Nyquist
-        
-        normal_cutoff = cutoff / nyquist
+    def trim_silence(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        spectrogram: Optional[Spectrogram] = None
+    ) -> Tuple[np.ndarray, SpeechTimeline]:
+        """
+        Supprime les silences et conserve la correspondance avec l'audio original
         
-        # Vérifier que normal_cutoff est dans la plage valide (0 < Wn < 1)
-        if normal_cutoff >= 1.0:
-            normal_cutoff = 0.95
-        elif normal_cutoff <= 0:
-            normal_cutoff = 0.01
+        Args:
+            spectrogram: STFT déjà calculée par analyze() (optionnel)
         
+        Returns:
+            Tuple (audio réduit, timeline) ; timeline.to_original(t) reporte un
+            timestamp de l'audio réduit sur la chronologie d'origine
+        """
+        segments = self.detect_speech_segments(audio, sr, spectrogram=spectrogram)
+        timeline = self.vad.timeline(audio, sr, segments)
+        return timeline.trim(audio), timeline
+    
+    def _apply_lowpass_filter(self, audio: np.ndarray, sr: int, cutoff: int = 8000) -> np.ndarray:
+        """Filtre passe-bas pour supprimer les hautes fréquences"""
         # Filtre Butterworth
-        b, a = signal.butter(4, normal_cutoff, btype='low', analog=False)
+        b, a = signal.butter(4, lowpass_cutoff(sr, cutoff), btype='low', analog=False)
         filtered = signal.filtfilt(b, a, audio)
         
         return filtered
@@ -201,22 +259,25 @@ class AudioPreprocessor:
         sr: int,
         n_mfcc: int = 13,
         n_fft: int = 2048,
-        hop_length: int = 512
+        hop_length: int = 512,
+        n_mels: int = 128,
+        spectrogram: Optional[Spectrogram] = None
     ) -> np.ndarray:
         """
         Extrait les caractéristiques MFCC (Mel-Frequency Cepstral Coefficients)
         
+        Args:
+            n_fft, hop_length: Paramètres de la STFT (ceux de librosa par défaut ;
+                WHISPER_N_FFT/WHISPER_HOP_LENGTH pour réutiliser la STFT de Whisper)
+            n_mels: Nombre de bandes Mel avant la DCT
+            spectrogram: STFT déjà calculée par analyze() (n_fft/hop_length ignorés ;
+                par défaut, analyze() complète les bords par réflexion et non par des zéros)
+        
         Returns:
-            Array de shape (n_mfcc, time_frames)
-        """
-        mfccs = librosa.feature.mfcc(
-            y=audio,
-            sr=sr,
-            n_mfcc=n_mfcc,
-            n_fft=n_fft,
-            hop_length=hop_length
-        )
-        return mfccs
+            Array float32 de shape (n_mfcc, time_frames), valeurs de librosa.feature.mfcc
+        """
+        spec = spectrogram or SpectralFrontend.get(sr, n_fft, hop_length).analyze(audio, pad_mode="constant")
+        return spec.mfcc(n_mfcc=n_mfcc, n_mels=n_mels)
     
     def extract_log_mel_spectrogram(
         self,
@@ -224,22 +285,188 @@ class AudioPreprocessor:
         sr: int,
         n_mels: int = 80,
         n_fft: int = 2048,
-        hop_length: int = 512
+        hop_length: int = 512,
+        spectrogram: Optional[Spectrogram] = None
     ) -> np.ndarray:
         """
-        Extrait le spectrogramme log-Mel
+        Extrait le spectrogramme log-Mel (dB relatifs au maximum)
+        
+        Args:
+            n_fft, hop_length: Paramètres de la STFT (ceux de librosa par défaut ;
+                WHISPER_N_FFT/WHISPER_HOP_LENGTH pour réutiliser la STFT de Whisper)
+            spectrogram: STFT déjà calculée par analyze() (n_fft/hop_length ignorés ;
+                par défaut, analyze() complète les bords par réflexion et non par des zéros)
         
         Returns:
-            Array de shape (n_mels, time_frames)
-        """
-        mel_spec = librosa.feature.melspectrogram(
-            y=audio,
-            sr=sr,
-            n_mels=n_mels,
-            n_fft=n_fft,
-            hop_length=hop_length
-        )
-        log_mel = librosa.power_to_db(mel_spec, ref=np.max)
-        return log_mel
+            Array float32 de shape (n_mels, time_frames), valeurs de
+            librosa.power_to_db(librosa.feature.melspectrogram(...), ref=np.max)
+        """
+        spec = spectrogram or SpectralFrontend.get(sr, n_fft, hop_length).analyze(audio, pad_mode="constant")
+        return spec.log_mel(n_mels=n_mels)
+    
+    def extract_features_batch(
+        self,
+        clips,
+        sr: int,
+        kind: str = "mfcc",
+        lengths: Optional[List[int]] = None,
+        output_path: Optional[str] = None,
+        n_mfcc: int = 13,
+        n_mels: int = 80
+    ) -> PackedFeatures:
+        """
+        Extrait MFCC ou log-Mel de nombreux extraits en une fois (float32)
+        
+        STFT de Whisper (25 ms / 10 ms) : mêmes valeurs que extract_mfcc(...,
+        n_fft=WHISPER_N_FFT, hop_length=WHISPER_HOP_LENGTH, n_mels=80), pas que
+        ses paramètres par défaut (ceux de librosa).
+        
+        Args:
+            clips: Liste de signaux, ou matrice (n_clips, max_len) avec `lengths`
+            kind: "mfcc" ou "log_mel"
+            output_path: Fichier .npy mappé en mémoire pour les grands corpus
+        
+        Returns:
+            PackedFeatures : tableau (total_frames, n_features) + offsets par extrait
+        """
+        extractor = BatchFeatureExtractor(sample_rate=sr, n_mels=n_mels, n_mfcc=n_mfcc)
+        return extractor.extract(clips, kind=kind, lengths=lengths, output_path=output_path)
+
+
+def lowpass_cutoff(sr: int, cutoff: float) -> float:
+    """Fréquence de coupure normalisée (0 < Wn < 1) d'un filtre passe-bas"""
+    nyquist = sr / 2
+    
+    # S'assurer que cutoff est valide
+    if cutoff >= nyquist:
+        cutoff = nyquist * 0.95  # Utiliser 95% de la fréquence de Nyquist
+    
+    normal_cutoff = cutoff / nyquist
+    
+    # Vérifier que normal_cutoff est dans la plage valide (0 < Wn < 1)
+    if normal_cutoff >= 1.0:
+        normal_cutoff = 0.95
+    elif normal_cutoff <= 0:
+        normal_cutoff = 0.01
+    
+    return normal_cutoff
 
 
+class StreamingPreprocessor:
+    """
+    État du pré-traitement en flux (un objet par flux)
+    
+    - Porte de bruit : RMS par trame de 20 ms, plancher de bruit adaptatif ; les
+      trames sous le seuil sont atténuées (gain interpolé, pas de clics), avec un
+      maintien de 200 ms après la parole.
+    - Normalisation : niveau de parole suivi par moyenne mobile sur les trames
+      ouvertes, gain plafonné et lissé sur chaque bloc.
+    - Passe-bas Butterworth causal en sections d'ordre 2 (sosfilt), état zi conservé.
+    
+    La mémoire utilisée ne dépend que de la taille des blocs.
+    """
+    
+    def __init__(
+        self,
+        sr: int,
+        normalize: bool = True,
+        noise_gate: bool = True,
+        cutoff: int = 8000,
+        target_rms: float = 0.1,
+        max_gain: float = 10.0,
+        gate_ratio: float = 2.0,
+        gate_attenuation: float = 0.8,
+        hold_ms: float = 200.0
+    ):
+        """
+        Args:
+            sr: Taux d'échantillonnage du flux
+            normalize: Normaliser le niveau de la parole
+            noise_gate: Atténuer les trames de bruit
+            cutoff: Fréquence de coupure du passe-bas (Hz)
+            target_rms: Niveau RMS cible de la parole
+            max_gain: Gain maximal de normalisation
+            gate_ratio: Seuil d'ouverture de la porte (multiple du plancher de bruit)
+            gate_attenuation: Atténuation des trames de bruit (comme prop_decrease de noisereduce)
+            hold_ms: Maintien de la porte ouverte après la parole
+        """
+        self.sr = sr
+        self.normalize = normalize
+        self.noise_gate = noise_gate
+        self.target_rms = target_rms
+        self.max_gain = max_gain
+        self.gate_ratio = gate_ratio
+        self.closed_gain = 1.0 - gate_attenuation
+        self.frame_size = max(1, int(0.02 * sr))
+        self.hold_frames = int(hold_ms / 20)
+        
+        self._sos = signal.butter(4, lowpass_cutoff(sr, cutoff), btype='low', output='sos')
+        self._zi = np.zeros((self._sos.shape[0], 2))
+        
+        self._noise_floor = None
+        self._hold = 0
+        self._gate_gain = 1.0
+        self._speech_level = None
+        self._norm_gain = 1.0
+    
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Traite un bloc et retourne un bloc de même longueur"""
+        block = np.asarray(block, dtype=np.float32)
+        if len(block) == 0:
+            return block
+        
+        open_mask, frame_rms, bounds = self._analyze(block)
+        
+        if self.noise_gate:
+            block = block * self._gate_curve(open_mask, bounds)
+        
+        if self.normalize:
+            block = self._normalize_block(block, open_mask, frame_rms)
+        
+        filtered, self._zi = signal.sosfilt(self._sos, block, zi=self._zi)
+        return filtered.astype(np.float32)
+    
+    def _analyze(self, block: np.ndarray):
+        """RMS par trame (la dernière peut être partielle) et état ouvert/fermé de la porte"""
+        bounds = np.arange(0, len(block), self.frame_size)
+        sq = np.square(block, dtype=np.float64)
+        lengths = np.diff(np.append(bounds, len(block)))
+        frame_rms = np.sqrt(np.add.reduceat(sq, bounds) / lengths + 1e-12)
+        
+        if self._noise_floor is None:
+            self._noise_floor = max(float(np.min(frame_rms)), 1e-4)
+        
+        open_mask = np.empty(len(frame_rms), dtype=bool)
+        for i, value in enumerate(frame_rms):
+            # Le plancher suit vite les baisses et lentement les hausses
+            self._noise_floor = max(min(value, self._noise_floor * 1.02), 1e-5)
+            if value > self.gate_ratio * self._noise_floor:
+                self._hold = self.hold_frames
+                open_mask[i] = True
+            elif self._hold > 0:
+                self._hold -= 1
+                open_mask[i] = True
+            else:
+                open_mask[i] = False
+        return open_mask, frame_rms, np.append(bounds, len(block))
+    
+    def _gate_curve(self, open_mask: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+        """Gain par échantillon, interpolé linéairement entre les fins de trame"""
+        gains = np.where(open_mask, 1.0, self.closed_gain)
+        positions = np.concatenate([[0], bounds[1:]])
+        curve = np.interp(np.arange(bounds[-1]), positions, np.concatenate([[self._gate_gain], gains]))
+        self._gate_gain = float(gains[-1])
+        return curve.astype(np.float32)
+    
+    def _normalize_block(self, block: np.ndarray, open_mask: np.ndarray, frame_rms: np.ndarray) -> np.ndarray:
+        if open_mask.any():
+            level = float(np.sqrt(np.mean(np.square(frame_rms[open_mask]))))
+            self._speech_level = level if self._speech_level is None else 0.9 * self._speech_level + 0.1 * level
+        
+        if self._speech_level is None:
+            return block
+        
+        target_gain = min(self.max_gain, self.target_rms / max(self._speech_level, 1e-6))
+        ramp = np.linspace(self._norm_gain, target_gain, len(block), dtype=np.float32)
+        self._norm_gain = target_gain
+        return np.clip(block * ramp, -1.0, 1.0)
@@ -0,0 +1,186 @@
+"""
+Ordonnanceur de micro-lots pour la transcription
+Regroupe les requêtes courtes arrivant dans une même fenêtre temporelle et les
+transcrit en un seul passage Whisper (encodeur en lot, voir transcribe_batch).
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Durée maximale d'un extrait pouvant être mis en lot (fenêtre Whisper)
+MAX_BATCH_AUDIO_SECONDS = 30.0
+
+
+class MicroBatchScheduler:
+    """
+    Regroupe les transcriptions concurrentes en micro-lots
+
+    Le premier extrait reçu ouvre une fenêtre de `window_ms` ; le lot part à la fin de
+    la fenêtre ou dès que `max_batch_size` extraits sont réunis. Le surcoût de latence
+    est donc borné par la fenêtre. Seuls les extraits partageant les mêmes options de
+    décodage sont décodés ensemble.
+    """
+
+    def __init__(
+        self,
+        stt_service,
+        window_ms: float = 20.0,
+        max_batch_size: int = 8,
+        sample_rate: int = 16000
+    ):
+        """
+        Args:
+            stt_service: SpeechToTextService exposant transcribe_batch()
+            window_ms: Fenêtre de regroupement (ms)
+            max_batch_size: Nombre maximal d'extraits par lot
+            sample_rate: Taux d'échantillonnage des signaux soumis
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size doit être >= 1")
+
+        self.stt_service = stt_service
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_samples = int(MAX_BATCH_AUDIO_SECONDS * sample_rate)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_observed_batch = 0
+        self._total_wait = 0.0
+
+    def start(self):
+        """Démarre le thread d'ordonnancement"""
+        self._thread = threading.Thread(target=self._run, name="stt-batch-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Micro-batching STT activé (fenêtre {self.window * 1000:.0f} ms, "
+            f"lots de {self.max_batch_size} max)"
+        )
+
+    def can_batch(self, audio: np.ndarray) -> bool:
+        """Un extrait est éligible s'il tient dans une seule fenêtre Whisper"""
+        return 0 < len(audio) <= self.max_samples
+
+    def submit(self, audio: np.ndarray, **decode_options) -> Future:
+        """
+        Soumet un extrait (mono 16 kHz, <= 30 s)
+
+        Args:
+            audio: Signal float32
+            **decode_options: Options passées à transcribe_batch (task, beam_size, ...)
+
+        Returns:
+            Future résolu avec le résultat de transcription
+        """
+        if self._closed:
+            raise RuntimeError("Ordonnanceur arrêté")
+        if not self.can_batch(audio):
+            raise ValueError("Extrait vide ou plus long que 30 s : utiliser transcribe()")
+
+        future: Future = Future()
+        options_key = tuple(sorted(decode_options.items()))
+        self._queue.put((audio, options_key, future, time.perf_counter()))
+        return future
+
+    def _collect_batch(self) -> List[Tuple]:
+        """Attend un premier extrait puis regroupe ceux qui arrivent dans la fenêtre"""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._closed = True
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._closed:
+            batch = self._collect_batch()
+            if not batch:
+                break
+
+            # Regrouper par options de décodage compatibles
+            groups: Dict[Tuple, List[Tuple]] = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+
+            for options_key, items in groups.items():
+                self._run_group(dict(options_key), items)
+
+    def _run_group(self, decode_options: Dict, items: List[Tuple]):
+        dispatched_at = time.perf_counter()
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(items)
+            self._max_observed_batch = max(self._max_observed_batch, len(items))
+            self._total_wait += sum(dispatched_at - submitted_at for _, _, _, submitted_at in items)
+
+        try:
+            results = self.stt_service.transcribe_batch(
+                [audio for audio, _, _, _ in items],
+                **decode_options
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors du décodage du lot: {e}")
+            results = [e] * len(items)
+
+        for (_, _, future, _), result in zip(items, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        """Retourne les statistiques de regroupement"""
+        with self._stats_lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "pending": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+                "max_observed_batch_size": self._max_observed_batch,
+                "avg_queue_wait_ms": 1000 * self._total_wait / self._items if self._items else 0.0
+            }
+
+    def shutdown(self):
+        """Arrête l'ordonnanceur (les extraits en attente sont rejetés)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and not item[2].done():
+                item[2].set_exception(RuntimeError("Ordonnanceur arrêté"))
@@ -0,0 +1,194 @@
+"""
+Extraction de caractéristiques par lots (MFCC, log-Mel)
+Pour l'analytique hors ligne sur de grands corpus : de nombreux extraits traités
+ensemble en float32, résultat compacté (tableau + offsets), éventuellement écrit
+dans un fichier .npy mappé en mémoire.
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft as sp_fft
+
+from .spectral_frontend import SpectralFrontend
+
+logger = logging.getLogger(__name__)
+
+
+class PackedFeatures:
+    """
+    Caractéristiques de plusieurs extraits, concaténées le long du temps
+
+    data a la forme (total_frames, n_features) ; les trames de l'extrait i sont
+    data[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        """Caractéristiques de l'extrait `index`, forme (n_frames, n_features)"""
+        return self.data[self.offsets[index]:self.offsets[index + 1]]
+
+    @staticmethod
+    def offsets_path(path: Union[str, Path]) -> Path:
+        path = Path(path)
+        return path.with_name(path.stem + ".offsets.npy")
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "PackedFeatures":
+        """Ouvre un magasin écrit par BatchFeatureExtractor (mappé en mémoire par défaut)"""
+        data = np.load(path, mmap_mode="r" if mmap else None)
+        offsets = np.load(cls.offsets_path(path))
+        return cls(data, offsets)
+
+
+class BatchFeatureExtractor:
+    """
+    MFCC / log-Mel pour de nombreux extraits à la fois
+
+    Les extraits sont triés par longueur puis regroupés en blocs d'environ
+    `max_block_frames` trames : une seule STFT batchée par bloc (vue à pas, rfft
+    float32) et un produit matriciel avec les filtres Mel et la matrice DCT
+    précalculés du front-end partagé. Les blocs restent assez petits pour tenir en
+    cache ; les extraits courts sont ainsi traités par centaines en un appel. Les
+    valeurs sont celles de Spectrogram.log_mel() / Spectrogram.mfcc() pour chaque extrait.
+    """
+
+    KINDS = ("mfcc", "log_mel")
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        n_fft: Optional[int] = None,
+        hop_length: Optional[int] = None,
+        n_mels: int = 80,
+        n_mfcc: int = 13,
+        top_db: float = 80.0,
+        max_block_frames: int = 4096,
+        workers: Optional[int] = None
+    ):
+        """
+        Args:
+            sample_rate: Taux d'échantillonnage des extraits
+            n_fft, hop_length: Paramètres de la STFT (défaut : ceux de Whisper)
+            n_mels: Nombre de bandes Mel
+            n_mfcc: Nombre de coefficients MFCC
+            top_db: Dynamique maximale du log-Mel sous le maximum de chaque extrait
+            max_block_frames: Nombre de trames (remplissage compris) par bloc
+            workers: Threads pour les FFT (scipy.fft, -1 = tous les cœurs)
+        """
+        self.frontend = SpectralFrontend.get(sample_rate, n_fft, hop_length)
+        self.n_mels = n_mels
+        self.n_mfcc = n_mfcc
+        self.top_db = top_db
+        self.max_block_frames = max(1, max_block_frames)
+        self.workers = workers
+
+    def num_frames(self, length: int) -> int:
+        """Nombre de trames d'un extrait de `length` échantillons (STFT centrée)"""
+        return 1 + length // self.frontend.hop_length
+
+    def extract(
+        self,
+        clips: Union[Sequence[np.ndarray], np.ndarray],
+        kind: str = "mfcc",
+        lengths: Optional[Sequence[int]] = None,
+        output_path: Optional[Union[str, Path]] = None
+    ) -> PackedFeatures:
+        """
+        Extrait les caractéristiques de tous les extraits
+
+        Args:
+            clips: Liste de signaux mono, ou matrice (n_clips, max_len) complétée par des zéros
+            kind: "mfcc" ou "log_mel"
+            lengths: Longueur réelle de chaque ligne quand `clips` est une matrice
+            output_path: Fichier .npy à écrire (mappé en mémoire) ; les offsets sont
+                écrits à côté dans <nom>.offsets.npy
+
+        Returns:
+            PackedFeatures (données en mémoire, ou mappées sur output_path)
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Type de caractéristiques inconnu: {kind} (attendu: {', '.join(self.KINDS)})")
+
+        if lengths is None:
+            lengths = [len(clip) for clip in clips]
+        lengths = np.asarray(lengths, dtype=np.int64)
+
+        frames_per_clip = 1 + lengths // self.frontend.hop_length
+        offsets = np.concatenate([[0], np.cumsum(frames_per_clip)]).astype(np.int64)
+        n_features = self.n_mfcc if kind == "mfcc" else self.n_mels
+        shape = (int(offsets[-1]), n_features)
+
+        if output_path is not None:
+            output_path = Path(output_path)
+            data = np.lib.format.open_memmap(output_path, mode="w+", dtype=np.float32, shape=shape)
+        else:
+            data = np.empty(shape, dtype=np.float32)
+
+        # Trier par longueur : chaque bloc contient des extraits de tailles proches,
+        # ce qui limite le remplissage inutile
+        order = np.argsort(lengths, kind="stable")
+        for indices in self._blocks(order, frames_per_clip):
+            features = self._extract_block([clips[i] for i in indices], lengths[indices], kind)
+            for i, clip_features in zip(indices, features):
+                data[offsets[i]:offsets[i + 1]] = clip_features
+
+        if output_path is not None:
+            data.flush()
+            np.save(PackedFeatures.offsets_path(output_path), offsets)
+            logger.info(f"Caractéristiques {kind}: {len(lengths)} extraits -> {output_path} {shape}")
+
+        return PackedFeatures(data, offsets)
+
+    def _blocks(self, order: np.ndarray, frames_per_clip: np.ndarray):
+        """Découpe les indices triés en blocs de max_block_frames trames au plus"""
+        start = 0
+        for end in range(1, len(order) + 1):
+            # Les extraits sont triés : le dernier du bloc fixe la taille de remplissage
+            if end == len(order) or (end + 1 - start) * frames_per_clip[order[end]] > self.max_block_frames:
+                yield order[start:end]
+                start = end
+
+    def _extract_block(self, clips: List[np.ndarray], lengths: np.ndarray, kind: str) -> List[np.ndarray]:
+        """STFT batchée d'un bloc d'extraits ; retourne (n_frames, n_features) par extrait"""
+        n_fft = self.frontend.n_fft
+        hop = self.frontend.hop_length
+        pad = n_fft // 2
+        max_len = int(lengths.max())
+
+        # Bords complétés par des zéros comme librosa (analyze(..., pad_mode="constant"))
+        padded = np.zeros((len(clips), max_len + 2 * pad), dtype=np.float32)
+        for row, (clip, length) in enumerate(zip(clips, lengths)):
+            padded[row, pad:pad + length] = np.asarray(clip[:length], dtype=np.float32)
+
+        frames = sliding_window_view(padded, n_fft, axis=1)[:, ::hop]
+        stft = sp_fft.rfft(frames * self.frontend.window, axis=-1, workers=self.workers)
+        power = (stft.real ** 2 + stft.imag ** 2).astype(np.float32)
+
+        # (B * T, n_freq) @ (n_freq, n_mels) : un seul produit matriciel pour tout le bloc
+        mel = (power.reshape(-1, power.shape[-1]) @ self.frontend.mel_filters(self.n_mels).T)
+        mel = mel.reshape(power.shape[0], power.shape[1], -1)
+        log_mel = 10.0 * np.log10(np.maximum(mel, 1e-10))
+
+        results = []
+        for row, length in enumerate(lengths):
+            n_frames = 1 + int(length) // hop
+            clip_log_mel = log_mel[row, :n_frames]
+            if kind == "log_mel":
+                # Référence = maximum de l'extrait (librosa.power_to_db(ref=np.max))
+                clip_log_mel = clip_log_mel - clip_log_mel.max()
+            clip_log_mel = np.maximum(clip_log_mel, clip_log_mel.max() - self.top_db)
+            if kind == "mfcc":
+                results.append(clip_log_mel @ self.frontend.dct_matrix(self.n_mels, self.n_mfcc).T)
+            else:
+                results.append(clip_log_mel)
+        return results
@@ -0,0 +1,154 @@
+"""
+Exécution non bloquante des inférences pour l'API asynchrone
+Les appels bloquants (Whisper, pyttsx3, gTTS) tournent dans un pool de threads
+dédié, avec une limite de concurrence et une file d'attente bornée.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """La file d'attente est pleine : la requête doit être rejetée immédiatement"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"Service {name} saturé, réessayer dans {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Pool de threads avec concurrence limitée et file d'attente bornée
+
+    Au plus `max_concurrency` appels s'exécutent en même temps et au plus `max_queue`
+    attendent. Au-delà, run() lève QueueFullError avec un délai Retry-After estimé
+    à partir du temps de service moyen.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        max_queue: int = 16,
+        name: str = "inference"
+    ):
+        """
+        Args:
+            max_concurrency: Nombre maximal d'appels simultanés
+            max_queue: Nombre maximal d'appels en attente
+            name: Nom du pool (logs et noms de threads)
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.name = name
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix=f"{name}-executor"
+        )
+        self._capacity = self.max_concurrency + self.max_queue
+        self._slots = asyncio.Semaphore(self._capacity)
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._avg_service_time = None  # moyenne mobile exponentielle (s)
+
+    def _retry_after(self) -> int:
+        """Estime le délai avant qu'une place se libère (secondes, >= 1)"""
+        service_time = self._avg_service_time or 1.0
+        waves = (self._in_flight - self.max_concurrency) / self.max_concurrency + 1
+        return max(1, math.ceil(service_time * max(1.0, waves)))
+
+    @asynccontextmanager
+    async def slot(self, wait: bool = False):
+        """
+        Réserve une place (exécution ou file d'attente)
+
+        Args:
+            wait: Attendre qu'une place se libère au lieu d'échouer immédiatement
+
+        Raises:
+            QueueFullError: plus aucune place et wait=False
+        """
+        if not wait and self._slots.locked():
+            with self._lock:
+                self._rejected += 1
+                retry_after = self._retry_after()
+            raise QueueFullError(self.name, retry_after)
+
+        async with self._slots:
+            with self._lock:
+                self._in_flight += 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Exécute fn(*args, **kwargs) dans le pool ; échoue immédiatement si saturé"""
+        async with self.slot():
+            return await self._submit(fn, *args, **kwargs)
+
+    async def run_waiting(self, fn: Callable, *args, **kwargs):
+        """Comme run(), mais attend une place libre au lieu d'échouer"""
+        async with self.slot(wait=True):
+            return await self._submit(fn, *args, **kwargs)
+
+    async def _submit(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self._timed, fn, *args, **kwargs))
+
+    def _timed(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            self._running += 1
+        start_time = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                if self._avg_service_time is None:
+                    self._avg_service_time = elapsed
+                else:
+                    self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * elapsed
+
+    def record_service_time(self, elapsed: float):
+        """Enregistre la durée d'un appel exécuté hors du pool (ex: pool de processus)"""
+        with self._lock:
+            self._completed += 1
+            if self._avg_service_time is None:
+                self._avg_service_time = elapsed
+            else:
+                self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * elapsed
+
+    def get_stats(self) -> Dict:
+        """Retourne l'état de la file et des appels en cours"""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "running": self._running,
+                "queued": max(0, self._in_flight - self._running),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_service_time": self._avg_service_time
+            }
+
+    def shutdown(self):
+        """Arrête le pool de threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,194 @@
+"""
+Transcription des enregistrements longs
+Découpe aux silences (VAD) en morceaux de 30 s au plus, transcription parallèle
+des morceaux puis recollage des segments sur la chronologie d'origine.
+"""
+
+import logging
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .audio_preprocessor import AudioPreprocessor
+from .vad import SpeechSegment
+
+logger = logging.getLogger(__name__)
+
+
+class LongAudioTranscriber:
+    """
+    Transcription parallèle d'un long enregistrement
+
+    Les segments de parole détectés par le VAD de l'AudioPreprocessor sont regroupés
+    en morceaux d'au plus `max_chunk_s` (coupés au milieu des silences ; un segment
+    de parole trop long est coupé sur la trame la plus calme). Chaque morceau est
+    soumis via `submit`, puis les segments et les timestamps des mots sont décalés
+    de la position du morceau dans l'audio original.
+    """
+
+    def __init__(
+        self,
+        submit: Callable[..., Future],
+        preprocessor: Optional[AudioPreprocessor] = None,
+        sample_rate: int = 16000,
+        max_chunk_s: float = 30.0,
+        padding_s: float = 0.2
+    ):
+        """
+        Args:
+            submit: Fonction (audio, **options) -> Future du résultat au format
+                transcribe_array(), ex: functools.partial(pool.submit, "transcribe_array")
+            preprocessor: Pré-processeur fournissant le VAD (par défaut AudioPreprocessor())
+            sample_rate: Taux d'échantillonnage des signaux
+            max_chunk_s: Durée maximale d'un morceau (fenêtre Whisper : 30 s)
+            padding_s: Marge de silence conservée autour de la parole
+        """
+        self.submit = submit
+        self.preprocessor = preprocessor or AudioPreprocessor(target_sr=sample_rate)
+        self.sample_rate = sample_rate
+        self.max_chunk = int(max_chunk_s * sample_rate)
+        self.padding = int(padding_s * sample_rate)
+
+    def plan_chunks(self, audio: np.ndarray) -> List[SpeechSegment]:
+        """
+        Calcule les morceaux à transcrire
+
+        Returns:
+            Liste de SpeechSegment (positions en échantillons), triée, sans chevauchement
+        """
+        segments = self.preprocessor.detect_speech_segments(audio, self.sample_rate)
+        if not segments:
+            return []
+
+        # Couper les segments de parole plus longs qu'un morceau
+        max_speech = self.max_chunk - 2 * self.padding
+        pieces = []
+        for start, end in segments:
+            while end - start > max_speech:
+                cut = self._quiet_cut(audio, start + max_speech // 2, start + max_speech)
+                pieces.append((start, cut))
+                start = cut
+            pieces.append((start, end))
+
+        # Regrouper les segments consécutifs tant que le morceau tient dans la fenêtre
+        groups = []
+        group_start, group_end = pieces[0]
+        for start, end in pieces[1:]:
+            if end - group_start + 2 * self.padding <= self.max_chunk:
+                group_end = end
+            else:
+                groups.append((group_start, group_end))
+                group_start, group_end = start, end
+        groups.append((group_start, group_end))
+
+        # Marges : au plus la moitié du silence qui sépare deux morceaux
+        chunks = []
+        for i, (start, end) in enumerate(groups):
+            lower = groups[i - 1][1] if i > 0 else 0
+            upper = groups[i + 1][0] if i + 1 < len(groups) else len(audio)
+            chunks.append(SpeechSegment(
+                max(start - self.padding, (lower + start) // 2 if i > 0 else 0),
+                min(end + self.padding, (end + upper) // 2 if i + 1 < len(groups) else len(audio))
+            ))
+        return chunks
+
+    def _quiet_cut(self, audio: np.ndarray, low: int, high: int) -> int:
+        """Position de la trame de 20 ms la moins énergétique entre low et high"""
+        frame = int(0.02 * self.sample_rate)
+        region = np.asarray(audio[low:high], dtype=np.float32)
+        if len(region) < frame:
+            return high
+        frames = sliding_window_view(region, frame)[::frame]
+        energy = np.einsum("ij,ij->i", frames, frames)
+        return low + int(np.argmin(energy)) * frame + frame // 2
+
+    def transcribe(self, audio: np.ndarray, **decode_options) -> Dict:
+        """
+        Transcrit un long signal mono (sample_rate) en parallèle
+
+        Returns:
+            Dict au format transcribe(), avec en plus "chunks", "audio_duration" et
+            "failed" (index, début, fin et erreur des morceaux absents du texte)
+        """
+        start_time = time.time()
+        chunks = self.plan_chunks(audio)
+        logger.info(
+            f"Audio long: {len(audio) / self.sample_rate:.1f}s découpé en {len(chunks)} morceaux"
+        )
+
+        # Soumettre tous les morceaux avant d'attendre le premier résultat
+        futures = [self.submit(audio[start:end], **decode_options) for start, end in chunks]
+
+        results = []
+        errors = []
+        failed = []
+        for index, ((start, end), future) in enumerate(zip(chunks, futures)):
+            try:
+                results.append((start, future.result()))
+            except Exception as e:
+                # Un morceau illisible (ex: répétitions) ne fait pas échouer tout le fichier
+                logger.warning(f"Audio long: morceau {start / self.sample_rate:.1f}s ignoré ({e})")
+                errors.append(e)
+                failed.append({
+                    "index": index,
+                    "start": start / self.sample_rate,
+                    "end": end / self.sample_rate,
+                    "error": f"{type(e).__name__}: {e}"
+                })
+        if errors and not results:
+            raise errors[0]
+
+        return self._stitch(results, len(audio), len(chunks), failed, start_time)
+
+    def _stitch(
+        self,
+        results: List,
+        num_samples: int,
+        num_chunks: int,
+        failed: List[Dict],
+        start_time: float
+    ) -> Dict:
+        """Recolle les résultats des morceaux sur la chronologie d'origine"""
+        texts = []
+        segments = []
+        language = None
+        model_size = None
+        device = None
+
+        for chunk_start, result in results:
+            offset = chunk_start / self.sample_rate
+            if result.get("text"):
+                texts.append(result["text"])
+            language = language or result.get("language")
+            model_size = model_size or result.get("model_size")
+            device = device or result.get("device")
+
+            for segment in result.get("segments", []):
+                shifted = dict(segment)
+                shifted["id"] = len(segments)
+                shifted["start"] = segment.get("start", 0.0) + offset
+                shifted["end"] = segment.get("end", 0.0) + offset
+                if segment.get("words"):
+                    shifted["words"] = [
+                        {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+                        for word in segment["words"]
+                    ]
+                segments.append(shifted)
+
+        text = " ".join(texts)
+        return {
+            "text": text,
+            "language": language,
+            "segments": segments,
+            "latency": time.time() - start_time,
+            "word_count": len(text.split()),
+            "model_size": model_size,
+            "device": device,
+            "chunks": num_chunks,
+            "failed_chunks": len(failed),
+            "failed": failed,
+            "audio_duration": num_samples / self.sample_rate
+        }
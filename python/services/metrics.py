@@ -0,0 +1,357 @@
+"""
+Métriques au format texte Prometheus
+Registre minimal (compteurs, jauges, histogrammes) sans dépendance externe. Les
+mesures faites dans les workers d'un WorkerPool sont renvoyées au processus
+parent (drain/merge) et exposées par le même endpoint /metrics.
+"""
+
+import logging
+import math
+from abc import ABC, abstractmethod
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bornes des histogrammes de durée (s) : de 5 ms à 1 min
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """Base des métriques : valeurs indexées par les valeurs des labels"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels attendus {self.labelnames}, reçus {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Lignes d'échantillons au format texte"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+    def drain(self) -> Dict:
+        """Variation depuis le dernier appel (transmise au processus parent)"""
+        return {}
+
+    def merge(self, delta: Dict):
+        """Ajoute une variation reçue d'un autre processus"""
+
+
+class Counter(Metric):
+    """Compteur monotone"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._sent: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in self._values.items()
+            ]
+
+    def drain(self) -> Dict:
+        with self._lock:
+            delta = {
+                key: value - self._sent.get(key, 0.0)
+                for key, value in self._values.items()
+                if value != self._sent.get(key, 0.0)
+            }
+            self._sent = dict(self._values)
+        return delta
+
+    def merge(self, delta: Dict):
+        with self._lock:
+            for key, amount in delta.items():
+                self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """
+    Valeur instantanée, fixée explicitement ou lue à chaque export
+
+    Avec `callback`, la fonction retourne {valeurs des labels: valeur} au moment
+    de l'export (ex: profondeur d'une file).
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._changed = set()
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+            self._changed.add(key)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+            self._changed.add(key)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Incrémente la jauge pendant la durée du bloc (ex: requêtes en cours)"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self.callback is not None:
+            try:
+                values.update(self.callback())
+            except Exception as e:
+                # Une jauge illisible ne doit pas faire échouer /metrics
+                logger.debug(f"Jauge {self.name}: lecture impossible ({e})")
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values.items()
+        ]
+
+    def drain(self) -> Dict:
+        with self._lock:
+            delta = {key: self._values[key] for key in self._changed}
+            self._changed.clear()
+        return delta
+
+    def merge(self, delta: Dict):
+        with self._lock:
+            self._values.update(delta)
+
+
+class Histogram(Metric):
+    """Distribution de durées : comptes cumulés par borne, somme et nombre"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._sent: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def timer(self, **labels):
+        """Mesure la durée du bloc (enregistrée aussi en cas d'exception)"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def drain(self) -> Dict:
+        delta = {}
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                sent_counts, sent_total, sent_count = self._sent.get(key) or ([0] * len(counts), 0.0, 0)
+                if count != sent_count:
+                    delta[key] = (
+                        [a - b for a, b in zip(counts, sent_counts)],
+                        total - sent_total,
+                        count - sent_count
+                    )
+                self._sent[key] = (list(counts), total, count)
+        return delta
+
+    def merge(self, delta: Dict):
+        with self._lock:
+            for key, (counts, total, count) in delta.items():
+                current_counts, current_total, current_count = \
+                    self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+                self._values[key] = (
+                    [a + b for a, b in zip(current_counts, counts)],
+                    current_total + total,
+                    current_count + count
+                )
+
+
+class MetricsRegistry:
+    """Ensemble des métriques d'un processus, exportées ensemble"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrique {name} déjà enregistrée comme {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ) -> Gauge:
+        gauge = self._register(Gauge, name, documentation, labelnames)
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self) -> str:
+        """Export au format texte Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def drain(self) -> Dict[str, Dict]:
+        """Variations de toutes les métriques depuis le dernier appel"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        deltas = {}
+        for metric in metrics:
+            delta = metric.drain()
+            if delta:
+                deltas[metric.name] = delta
+        return deltas
+
+    def merge(self, deltas: Dict[str, Dict]):
+        """Intègre les variations reçues d'un worker"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        for name, delta in deltas.items():
+            if name in metrics:
+                metrics[name].merge(delta)
+
+
+# Registre du processus et métriques communes aux services
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "transvoicer_stage_duration_seconds",
+    "Durée de chaque étape du traitement (lecture, décodage, pré-traitement, inférence, synthèse...)",
+    ("stage",)
+)
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    "transvoicer_model_load_seconds",
+    "Durée du dernier chargement de modèle",
+    ("model",)
+)
+MODEL_LOADS = REGISTRY.counter(
+    "transvoicer_model_loads_total",
+    "Nombre de chargements de modèle (démarrage et rechargements)",
+    ("model",)
+)
+MODEL_RELOADS = REGISTRY.counter(
+    "transvoicer_model_reloads_total",
+    "Nombre de rechargements de modèle pendant le service (STT_RELOAD_MODEL)",
+    ("model",)
+)
+
+
+def stage_timer(stage: str):
+    """Mesure la durée d'une étape : with stage_timer("inference"): ..."""
+    return STAGE_SECONDS.timer(stage=stage)
+
+
+def observe_stage(stage: str, seconds: float):
+    """Enregistre la durée d'une étape mesurée hors d'un bloc with (attente en file...)"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
@@ -0,0 +1,250 @@
+"""
+Profilage à la demande d'une requête
+Profil CPU (cProfile) et profil des opérateurs PyTorch (torch.profiler) enregistrés
+pour une seule requête, sur disque sous un identifiant : les workers d'un
+WorkerPool écrivent dans le même dossier que l'API qui les sert.
+"""
+
+import cProfile
+import hmac
+import io
+import logging
+import pstats
+import random
+import shutil
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Suffixes des fichiers produits pour chaque étape profilée
+PSTATS_SUFFIX = ".pstats"
+SUMMARY_SUFFIX = ".txt"
+TORCH_TRACE_SUFFIX = ".torch.json"
+
+# cProfile (depuis Python 3.12) et torch.profiler sont globaux au processus :
+# une seule capture à la fois
+_CAPTURE_LOCK = threading.Lock()
+_capture_state = threading.local()
+
+
+@contextmanager
+def capture_profile(output_dir: str, profile_id: str, label: str = "request", top: int = 40):
+    """
+    Profile le bloc dans le thread courant
+
+    Écrit dans <output_dir>/<profile_id>/ : <label>.pstats (cProfile), <label>.txt
+    (fonctions les plus coûteuses et opérateurs PyTorch) et <label>.torch.json
+    (trace Chrome des opérateurs, si PyTorch est chargé dans ce processus).
+
+    Les captures concurrentes d'un même processus attendent leur tour ; une capture
+    PyTorch enregistre néanmoins les opérateurs de tous les threads, donc aussi ceux
+    des requêtes non profilées traitées au même moment. Une capture imbriquée dans
+    le même thread est déjà couverte par la capture englobante.
+    """
+    if getattr(_capture_state, "active", False):
+        yield
+        return
+
+    directory = Path(output_dir) / profile_id
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with _CAPTURE_LOCK:
+        _capture_state.active = True
+        torch_profile = None
+        cpu_profile = None
+        start_time = time.perf_counter()
+        try:
+            torch_profile = _start_torch_profile()
+            cpu_profile = _start_cpu_profile()
+            start_time = time.perf_counter()
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            if cpu_profile is not None:
+                cpu_profile.disable()
+            if torch_profile is not None:
+                try:
+                    torch_profile.__exit__(None, None, None)
+                except Exception as e:
+                    logger.warning(f"Arrêt du profilage PyTorch impossible: {e}")
+                    torch_profile = None
+            _capture_state.active = False
+            _save_profile(directory, profile_id, label, elapsed, cpu_profile, torch_profile, top)
+
+
+def _start_torch_profile():
+    """Profileur PyTorch démarré, ou None (PyTorch non importé, ex: workers TTS)"""
+    if "torch" not in sys.modules:
+        return None
+    try:
+        from torch.profiler import ProfilerActivity, profile
+        torch_profile = profile(activities=[ProfilerActivity.CPU], record_shapes=True)
+        torch_profile.__enter__()
+        return torch_profile
+    except Exception as e:
+        logger.warning(f"Profilage PyTorch indisponible: {e}")
+        return None
+
+
+def _start_cpu_profile() -> Optional[cProfile.Profile]:
+    """Profileur cProfile démarré, ou None si un autre outil de profilage est actif"""
+    cpu_profile = cProfile.Profile()
+    try:
+        cpu_profile.enable()
+    except ValueError as e:
+        logger.warning(f"Profilage CPU indisponible: {e}")
+        return None
+    return cpu_profile
+
+
+def _save_profile(directory: Path, profile_id: str, label: str, elapsed: float, cpu_profile, torch_profile,
+                  top: int):
+    """Écrit les fichiers d'une capture (les échecs sont consignés sans être propagés)"""
+    if cpu_profile is None and torch_profile is None:
+        return
+    try:
+        summary = io.StringIO()
+        summary.write(f"Profil {profile_id} / {label} : {elapsed:.3f}s\n\n")
+        if cpu_profile is not None:
+            cpu_profile.dump_stats(str(directory / f"{label}{PSTATS_SUFFIX}"))
+            pstats.Stats(cpu_profile, stream=summary).sort_stats("cumulative").print_stats(top)
+
+        # Pas de trace pour une étape sans opérateur PyTorch (décodage, traduction...)
+        operators = torch_profile.key_averages() if torch_profile is not None else []
+        if len(operators) > 0:
+            torch_profile.export_chrome_trace(str(directory / f"{label}{TORCH_TRACE_SUFFIX}"))
+            summary.write("\nOpérateurs PyTorch\n\n")
+            summary.write(operators.table(sort_by="self_cpu_time_total", row_limit=top))
+
+        (directory / f"{label}{SUMMARY_SUFFIX}").write_text(summary.getvalue(), encoding="utf-8")
+        logger.info(f"🔬 Profil {profile_id}/{label} enregistré ({elapsed:.3f}s)")
+    except Exception as e:
+        logger.warning(f"Échec de l'enregistrement du profil {profile_id}: {e}")
+
+
+class RequestProfiler:
+    """
+    Décide quelles requêtes profiler et gère les profils enregistrés
+
+    Une requête est profilée si elle porte l'en-tête X-Profile égal à `token` ou si
+    elle est tirée au sort (`sample_rate`) ; sans `token`, rien n'est profilé. Les
+    autres requêtes ne paient qu'un tirage aléatoire : aucun profileur n'est installé.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        sample_rate: float = 0.0,
+        max_profiles: int = 50,
+        token: Optional[str] = None
+    ):
+        """
+        Args:
+            output_dir: Dossier des profils (partagé avec les workers)
+            sample_rate: Fraction des requêtes profilées sans en-tête (0 = aucune)
+            max_profiles: Nombre de profils conservés (les plus anciens sont supprimés)
+            token: Valeur exigée pour l'en-tête X-Profile et la consultation des profils
+                (None = profilage désactivé : personne ne pourrait lire les profils)
+        """
+        self.output_dir = Path(output_dir)
+        self.sample_rate = sample_rate
+        self.max_profiles = max(1, max_profiles)
+        self.token = token
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if token is None and sample_rate > 0:
+            logger.warning("Profilage désactivé: PROFILE_SAMPLE_RATE est ignoré sans PROFILE_TOKEN")
+
+    def should_profile(self, header_value: Optional[str] = None) -> bool:
+        """La requête doit-elle être profilée ?"""
+        if self.token is None:
+            return False
+        if header_value:
+            return self.authorize(header_value)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def authorize(self, token: Optional[str]) -> bool:
+        """Accès aux profils enregistrés : exige le jeton (refusé si aucun n'est configuré)"""
+        if self.token is None or not token:
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8"))
+
+    def new_profile(self) -> str:
+        """Réserve un identifiant de profil"""
+        return uuid.uuid4().hex[:16]
+
+    def wrap(self, fn: Callable, profile_id: str, label: str) -> Callable:
+        """fn exécutée sous capture_profile (dans le thread qui l'appelle)"""
+        def profiled(*args, **kwargs):
+            with capture_profile(str(self.output_dir), profile_id, label):
+                return fn(*args, **kwargs)
+        return profiled
+
+    def _directory(self, profile_id: str) -> Path:
+        # Identifiant hexadécimal uniquement : pas de chemin arbitraire
+        if not profile_id.isalnum():
+            raise ValueError(f"Identifiant de profil invalide: {profile_id}")
+        return self.output_dir / profile_id
+
+    def files(self, profile_id: str) -> Optional[List[str]]:
+        """Fichiers d'un profil, ou None s'il n'existe pas"""
+        directory = self._directory(profile_id)
+        if not directory.is_dir():
+            return None
+        return sorted(path.name for path in directory.iterdir())
+
+    def file_path(self, profile_id: str, filename: str) -> Optional[Path]:
+        """Chemin d'un fichier de profil, ou None s'il n'existe pas"""
+        path = self._directory(profile_id) / Path(filename).name
+        return path if path.is_file() else None
+
+    def summary(self, profile_id: str) -> Optional[Dict]:
+        """Description d'un profil et résumés texte de chaque étape"""
+        files = self.files(profile_id)
+        if files is None:
+            return None
+        directory = self._directory(profile_id)
+        return {
+            "id": profile_id,
+            "created": directory.stat().st_mtime,
+            "files": files,
+            "summaries": {
+                name[:-len(SUMMARY_SUFFIX)]: (directory / name).read_text(encoding="utf-8")
+                for name in files if name.endswith(SUMMARY_SUFFIX)
+            }
+        }
+
+    def list_profiles(self) -> List[Dict]:
+        """Profils enregistrés, du plus récent au plus ancien"""
+        directories = sorted(
+            (path for path in self.output_dir.iterdir() if path.is_dir()),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True
+        )
+        return [
+            {"id": path.name, "created": path.stat().st_mtime, "files": sorted(p.name for p in path.iterdir())}
+            for path in directories
+        ]
+
+    def prune(self):
+        """Supprime les profils au-delà de max_profiles"""
+        directories = sorted(
+            (path for path in self.output_dir.iterdir() if path.is_dir()),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True
+        )
+        for path in directories[self.max_profiles:]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def get_info(self) -> Dict:
+        return {
+            "output_dir": str(self.output_dir),
+            "sample_rate": self.sample_rate,
+            "max_profiles": self.max_profiles,
+            "enabled": self.token is not None
+        }
@@ -0,0 +1,166 @@
+"""
+Cache de résultats adressé par contenu
+Niveau mémoire LRU borné + niveau disque optionnel (persistant entre redémarrages).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Cache LRU en mémoire avec niveau disque optionnel
+
+    Les valeurs sont sérialisées en JSON sur disque ; les sous-classes peuvent
+    redéfinir _serialize/_deserialize pour d'autres types de valeurs.
+    """
+
+    file_suffix = ".json"
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        disk_dir: Optional[str] = None,
+        name: str = "cache"
+    ):
+        """
+        Args:
+            max_entries: Nombre maximal d'entrées en mémoire (0 = pas de niveau mémoire)
+            disk_dir: Dossier du niveau disque (None = désactivé)
+            name: Nom du cache (logs)
+        """
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.name = name
+
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Cache {name}: niveau disque dans {self.disk_dir}")
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Construit une clé stable à partir d'éléments sérialisables en JSON"""
+        payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne la valeur associée à la clé, ou None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._memory_hits += 1
+                return self._entries[key]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._store_memory(key, value)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Enregistre une valeur dans les deux niveaux"""
+        with self._lock:
+            self._store_memory(key, value)
+        self._write_disk(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                return True
+        path = self._disk_path(key)
+        return path is not None and path.exists()
+
+    def _store_memory(self, key: str, value: Any):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        return self.disk_dir / key[:2] / f"{key}{self.file_suffix}"
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            return self._deserialize(path.read_bytes())
+        except Exception as e:
+            logger.warning(f"Cache {self.name}: entrée disque illisible {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, value: Any):
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(exist_ok=True)
+            # Écriture atomique : un lecteur concurrent ne voit jamais de fichier partiel
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._serialize(value))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Cache {self.name}: écriture disque impossible pour {key[:16]}: {e}")
+
+    def _serialize(self, value: Any) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+    def _deserialize(self, data: bytes) -> Any:
+        return json.loads(data.decode("utf-8"))
+
+    def clear(self):
+        """Vide le niveau mémoire (le niveau disque est conservé)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Retourne les compteurs de hits/miss"""
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk": str(self.disk_dir) if self.disk_dir else None,
+                "hits": hits,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
+
+    @staticmethod
+    def merge_stats(stats: List[Dict]) -> Dict:
+        """Additionne les compteurs de plusieurs caches (un par worker)"""
+        counters = ("entries", "max_entries", "hits", "memory_hits", "disk_hits", "misses", "evictions")
+        merged = {name: sum(item[name] for item in stats) for name in counters}
+        lookups = merged["hits"] + merged["misses"]
+        merged["disk"] = stats[0]["disk"] if stats else None
+        merged["hit_rate"] = merged["hits"] / lookups if lookups else 0.0
+        return merged
@@ -0,0 +1,174 @@
+"""
+Poids Whisper partagés entre processus via un checkpoint mappé en mémoire
+
+whisper.load_model copie les poids dans chaque processus : N workers (pool STT ou
+workers uvicorn) gardent N copies du modèle. Ici le checkpoint est converti une
+fois en float32 (le type utilisé pour l'inférence, les checkpoints officiels
+sont en float16), puis chargé avec torch.load(mmap=True) et
+load_state_dict(assign=True) : les paramètres pointent directement sur les pages
+du fichier, que le noyau partage entre tous les processus qui le lisent.
+"""
+
+import functools
+import gc
+import hashlib
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import torch
+import whisper
+from whisper.model import ModelDimensions, Whisper
+
+logger = logging.getLogger(__name__)
+
+# Version du format (dims, poids float32, buffers non persistants)
+CHECKPOINT_FORMAT = 1
+
+# Initialisations aléatoires sautées par _skip_init, dans le thread qui l'utilise seulement
+_SKIPPED_INITS = ("kaiming_uniform_", "uniform_", "normal_")
+_skip_state = threading.local()
+_skip_install_lock = threading.Lock()
+_skip_installed = False
+
+
+def default_weights_dir() -> Path:
+    """Dossier des checkpoints partagés (à côté du cache de téléchargement de Whisper)"""
+    cache = os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return Path(cache) / "whisper" / "shared"
+
+
+def checkpoint_path(model_size: str, weights_dir: Optional[str] = None) -> Path:
+    """
+    Chemin du checkpoint partagé d'un modèle (nom officiel ou chemin d'un .pt)
+
+    Pour un fichier, le nom inclut une empreinte du chemin complet : deux
+    checkpoints de même nom dans des dossiers différents ne se confondent pas.
+    """
+    if os.path.isfile(model_size):
+        digest = hashlib.sha256(str(Path(model_size).resolve()).encode("utf-8")).hexdigest()[:12]
+        name = f"{Path(model_size).stem}-{digest}"
+    else:
+        name = model_size
+    return Path(weights_dir or default_weights_dir()) / f"{name}-float32.pt"
+
+
+def save_checkpoint(model: Whisper, path: Path):
+    """
+    Écrit un modèle au format partagé (écriture atomique : un lecteur ne voit
+    jamais un fichier incomplet)
+    """
+    state = {name: tensor.detach().float().cpu() for name, tensor in model.state_dict().items()}
+
+    # Buffers non persistants (masque causal, têtes d'alignement propres à chaque
+    # modèle officiel) : absents du state_dict, ils sont conservés à part
+    buffers = {}
+    sparse_buffers = []
+    for name, buffer in model.named_buffers():
+        if name in state:
+            continue
+        if buffer.is_sparse:
+            sparse_buffers.append(name)
+            buffer = buffer.to_dense()
+        buffers[name] = buffer.cpu()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    torch.save({
+        "format": CHECKPOINT_FORMAT,
+        "dims": vars(model.dims),
+        "model_state_dict": state,
+        "buffers": buffers,
+        "sparse_buffers": sparse_buffers
+    }, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def ensure_checkpoint(model_size: str, weights_dir: Optional[str] = None) -> Path:
+    """
+    Retourne le checkpoint partagé d'un modèle, en le créant au premier appel
+    (téléchargement éventuel et conversion en float32)
+    """
+    path = checkpoint_path(model_size, weights_dir)
+    if path.exists():
+        return path
+
+    logger.info(f"Conversion du modèle Whisper {model_size} en checkpoint partagé: {path}")
+    model = whisper.load_model(model_size, device="cpu")
+    save_checkpoint(model, path)
+    del model
+    gc.collect()
+    return path
+
+
+def load_checkpoint(path: Path, device: str = "cpu") -> Whisper:
+    """
+    Charge un checkpoint partagé sans copier les poids
+
+    Sur CPU, les paramètres restent adossés au fichier mappé (pages partagées
+    entre processus) ; sur GPU, le mappage évite seulement la copie intermédiaire
+    en mémoire hôte.
+    """
+    checkpoint = torch.load(path, mmap=True, map_location="cpu", weights_only=True)
+    if checkpoint.get("format") != CHECKPOINT_FORMAT:
+        raise ValueError(f"Format de checkpoint partagé non supporté: {path}")
+
+    # Modèle construit sans initialiser ses poids, puis branché sur les tenseurs mappés
+    with _skip_init():
+        model = Whisper(ModelDimensions(**checkpoint["dims"]))
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+
+    sparse_buffers = set(checkpoint["sparse_buffers"])
+    for name, buffer in checkpoint["buffers"].items():
+        module_name, _, buffer_name = name.rpartition(".")
+        if name in sparse_buffers:
+            buffer = buffer.to_sparse()
+        model.get_submodule(module_name).register_buffer(buffer_name, buffer, persistent=False)
+
+    return model.to(device).eval()
+
+
+@contextmanager
+def _skip_init():
+    """
+    Construction de modules sans initialisation aléatoire : les poids restent
+    des torch.empty dont les pages ne sont jamais touchées (donc non résidentes)
+    avant d'être remplacés par les tenseurs mappés
+
+    Le device "meta" éviterait aussi l'allocation, mais ses opérations importent
+    torch._dynamo (~150 Mo de RSS par processus), plus que le gain sur un petit modèle.
+
+    Les fonctions de torch.nn.init sont enveloppées une fois pour toutes et ne
+    sautent l'initialisation que dans le thread courant : un module construit en
+    même temps dans un autre thread est initialisé normalement.
+    """
+    _install_skippable_inits()
+    previous = getattr(_skip_state, "active", False)
+    _skip_state.active = True
+    try:
+        yield
+    finally:
+        _skip_state.active = previous
+
+
+def _install_skippable_inits():
+    """Enveloppe les initialisations de torch.nn.init (une seule fois par processus)"""
+    global _skip_installed
+    with _skip_install_lock:
+        if _skip_installed:
+            return
+        for name in _SKIPPED_INITS:
+            setattr(torch.nn.init, name, _skippable(getattr(torch.nn.init, name)))
+        _skip_installed = True
+
+
+def _skippable(init_fn):
+    @functools.wraps(init_fn)
+    def init(tensor, *args, **kwargs):
+        if getattr(_skip_state, "active", False):
+            return tensor
+        return init_fn(tensor, *args, **kwargs)
+    return init
@@ -0,0 +1,264 @@
+"""
+Front-end spectral partagé
+La STFT d'un signal est calculée une seule fois ; porte de bruit spectrale,
+caractéristiques du VAD, MFCC, log-Mel et entrée de Whisper en sont dérivés.
+Fenêtres et bancs de filtres Mel sont mis en cache par instance.
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft as sp_fft
+from scipy import signal
+
+logger = logging.getLogger(__name__)
+
+# Paramètres de Whisper (whisper.audio) : fenêtres de 25 ms, pas de 10 ms à 16 kHz
+WHISPER_SAMPLE_RATE = 16000
+WHISPER_N_FFT = 400
+WHISPER_HOP_LENGTH = 160
+
+# Complément des bords de la STFT centrée : réflexion comme torch.stft (Whisper),
+# zéros comme librosa >= 0.10 (MFCC, log-Mel)
+PAD_MODES = ("reflect", "constant")
+
+
+def _stft_lengths(sample_rate: int, n_fft: Optional[int], hop_length: Optional[int]) -> Tuple[int, int]:
+    """n_fft et hop_length effectifs (défaut : 25 ms et 10 ms, comme Whisper à 16 kHz)"""
+    return (
+        n_fft or int(round(sample_rate * WHISPER_N_FFT / WHISPER_SAMPLE_RATE)),
+        hop_length or int(round(sample_rate * WHISPER_HOP_LENGTH / WHISPER_SAMPLE_RATE))
+    )
+
+
+class SpectralFrontend:
+    """
+    STFT centrée (fenêtre de Hann périodique, réflexion aux bords par défaut) comme
+    torch.stft dans Whisper, avec fenêtre et bancs de filtres Mel en cache
+    """
+
+    _instances: Dict[Tuple[int, int, int], "SpectralFrontend"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        sample_rate: int = WHISPER_SAMPLE_RATE,
+        n_fft: Optional[int] = None,
+        hop_length: Optional[int] = None
+    ):
+        """
+        Args:
+            sample_rate: Taux d'échantillonnage des signaux
+            n_fft: Taille de la FFT (défaut : 25 ms, soit 400 à 16 kHz comme Whisper)
+            hop_length: Pas entre trames (défaut : 10 ms, soit 160 à 16 kHz)
+        """
+        self.sample_rate = sample_rate
+        self.n_fft, self.hop_length = _stft_lengths(sample_rate, n_fft, hop_length)
+
+        n = np.arange(self.n_fft)
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * n / self.n_fft)).astype(np.float32)
+        self.freqs = np.fft.rfftfreq(self.n_fft, 1.0 / sample_rate)
+        self._mel_filters: Dict[int, np.ndarray] = {}
+        self._dct_matrices: Dict[Tuple[int, int], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, sample_rate: int = WHISPER_SAMPLE_RATE, n_fft: Optional[int] = None,
+            hop_length: Optional[int] = None) -> "SpectralFrontend":
+        """Instance partagée pour ces paramètres (filtres calculés une seule fois)"""
+        key = (sample_rate, *_stft_lengths(sample_rate, n_fft, hop_length))
+        with cls._instances_lock:
+            frontend = cls._instances.get(key)
+            if frontend is None:
+                frontend = cls._instances[key] = cls(*key)
+            return frontend
+
+    def mel_filters(self, n_mels: int = 80) -> np.ndarray:
+        """Banc de filtres Mel (n_mels, n_fft // 2 + 1), identique à celui de Whisper à 16 kHz"""
+        with self._lock:
+            if n_mels not in self._mel_filters:
+                import librosa
+                self._mel_filters[n_mels] = librosa.filters.mel(
+                    sr=self.sample_rate, n_fft=self.n_fft, n_mels=n_mels
+                ).astype(np.float32)
+            return self._mel_filters[n_mels]
+
+    def dct_matrix(self, n_mels: int, n_mfcc: int) -> np.ndarray:
+        """Matrice DCT-II orthonormée (n_mfcc, n_mels) : MFCC = dct @ log_mel"""
+        with self._lock:
+            key = (n_mels, n_mfcc)
+            if key not in self._dct_matrices:
+                self._dct_matrices[key] = sp_fft.dct(
+                    np.eye(n_mels), type=2, norm="ortho", axis=0
+                )[:n_mfcc].astype(np.float32)
+            return self._dct_matrices[key]
+
+    def analyze(self, audio: np.ndarray, pad_mode: str = "reflect") -> "Spectrogram":
+        """
+        Calcule la STFT d'un signal mono
+
+        Args:
+            pad_mode: Complément des bords, "reflect" (Whisper) ou "constant" (librosa)
+        """
+        if pad_mode not in PAD_MODES:
+            raise ValueError(f"pad_mode invalide: {pad_mode} (attendu: {', '.join(PAD_MODES)})")
+        audio = np.asarray(audio, dtype=np.float32)
+        pad = self.n_fft // 2
+        if pad_mode == "reflect" and len(audio) > pad:
+            padded = np.pad(audio, pad, mode="reflect")
+        else:
+            padded = np.pad(audio, pad)
+        frames = sliding_window_view(padded, self.n_fft)[::self.hop_length]
+        stft = np.fft.rfft(frames * self.window, axis=1).astype(np.complex64)
+        return Spectrogram(self, stft, len(audio))
+
+
+class Spectrogram:
+    """
+    STFT d'un signal, de forme (n_frames, n_freq) ; la trame i est centrée sur
+    l'échantillon i * hop_length. Les représentations dérivées sont calculées à la demande.
+    """
+
+    def __init__(self, frontend: SpectralFrontend, stft: np.ndarray, num_samples: int):
+        self.frontend = frontend
+        self.stft = stft
+        self.num_samples = num_samples
+        self._power = None
+
+    @property
+    def num_frames(self) -> int:
+        return self.stft.shape[0]
+
+    @property
+    def power(self) -> np.ndarray:
+        """Spectre de puissance |X|^2 (n_frames, n_freq)"""
+        if self._power is None:
+            self._power = (self.stft.real ** 2 + self.stft.imag ** 2).astype(np.float32)
+        return self._power
+
+    def scaled(self, gain: float) -> "Spectrogram":
+        """Spectrogramme du signal multiplié par un gain constant"""
+        return Spectrogram(self.frontend, self.stft * np.float32(gain), self.num_samples)
+
+    # --- Caractéristiques par trame (VAD) ---
+
+    def frame_energy(self) -> np.ndarray:
+        """Énergie moyenne par échantillon de chaque trame (Parseval, fenêtre compensée)"""
+        power = self.power
+        total = 2.0 * power.sum(axis=1) - power[:, 0]
+        if self.frontend.n_fft % 2 == 0:
+            total -= power[:, -1]
+        window = self.frontend.window
+        return total / (self.frontend.n_fft * float(np.dot(window, window)))
+
+    def band_ratio(self, low_hz: float, high_hz: float) -> np.ndarray:
+        """Part de l'énergie de chaque trame comprise entre low_hz et high_hz"""
+        power = self.power + 1e-12
+        band = (self.frontend.freqs >= low_hz) & (self.frontend.freqs <= high_hz)
+        return power[:, band].sum(axis=1) / power.sum(axis=1)
+
+    def flatness(self) -> np.ndarray:
+        """Planéité spectrale de chaque trame (0 = tonal, 1 = bruit blanc)"""
+        power = self.power + 1e-12
+        return np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    # --- Représentations Mel ---
+
+    def mel(self, n_mels: int = 80) -> np.ndarray:
+        """Spectrogramme Mel en puissance (n_mels, n_frames), float32"""
+        return self.frontend.mel_filters(n_mels) @ self.power.T
+
+    def log_mel(self, n_mels: int = 80, top_db: float = 80.0) -> np.ndarray:
+        """Log-Mel en dB relatif au maximum (équivalent à librosa.power_to_db(ref=np.max))"""
+        return power_to_db(self.mel(n_mels), ref=None, top_db=top_db)
+
+    def mfcc(self, n_mfcc: int = 13, n_mels: int = 80) -> np.ndarray:
+        """MFCC (n_mfcc, n_frames) : DCT-II orthonormée du log-Mel (convention librosa)"""
+        log_mel = power_to_db(self.mel(n_mels), ref=1.0, top_db=80.0)
+        return self.frontend.dct_matrix(n_mels, n_mfcc) @ log_mel
+
+    def whisper_log_mel(self, n_mels: int = 80) -> np.ndarray:
+        """Entrée de Whisper (n_mels, n_frames - 1), mêmes valeurs que whisper.log_mel_spectrogram"""
+        mel = self.frontend.mel_filters(n_mels) @ self.power[:-1].T
+        log_spec = np.log10(np.maximum(mel, 1e-10))
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return ((log_spec + 4.0) / 4.0).astype(np.float32)
+
+    # --- Réduction de bruit ---
+
+    def spectral_gate(
+        self,
+        prop_decrease: float = 0.8,
+        n_std: float = 1.5,
+        smooth_hz: float = 500.0,
+        smooth_ms: float = 50.0
+    ) -> "Spectrogram":
+        """
+        Porte de bruit spectrale stationnaire (même principe que noisereduce)
+
+        Le seuil de chaque bande est la moyenne + n_std écarts-types de son niveau en dB
+        sur tout le signal ; les cellules sous le seuil sont atténuées de prop_decrease,
+        avec un masque lissé en temps et en fréquence.
+        """
+        if self.num_frames == 0:
+            return self
+        db = 10.0 * np.log10(self.power + 1e-10)
+        threshold = db.mean(axis=0) + n_std * db.std(axis=0)
+        mask = (db > threshold).astype(np.float32)
+
+        bin_hz = self.frontend.sample_rate / self.frontend.n_fft
+        frame_ms = 1000.0 * self.frontend.hop_length / self.frontend.sample_rate
+        n_freq = max(1, int(smooth_hz / bin_hz))
+        n_time = max(1, int(smooth_ms / frame_ms))
+        kernel = np.outer(
+            np.bartlett(2 * n_time + 1)[1:-1],
+            np.bartlett(2 * n_freq + 1)[1:-1]
+        ).astype(np.float32)
+        kernel /= kernel.sum()
+        mask = np.clip(signal.fftconvolve(mask, kernel, mode="same"), 0.0, 1.0)
+
+        gain = 1.0 - prop_decrease * (1.0 - mask)
+        return Spectrogram(self.frontend, self.stft * gain.astype(np.float32), self.num_samples)
+
+    # --- Resynthèse ---
+
+    def to_audio(self) -> np.ndarray:
+        """Resynthèse par addition-recouvrement (inverse de analyze)"""
+        n_fft = self.frontend.n_fft
+        hop = self.frontend.hop_length
+        window = self.frontend.window
+        frames = np.fft.irfft(self.stft, n=n_fft, axis=1).astype(np.float32) * window
+
+        length = (self.num_frames - 1) * hop + n_fft
+        output = np.zeros(length + hop, dtype=np.float32)
+        norm = np.zeros(length + hop, dtype=np.float32)
+        # Les trames sont additionnées par tranches de `hop` colonnes : chaque tranche
+        # tombe sur des positions disjointes, l'addition est donc entièrement vectorisée
+        for offset in range(0, n_fft, hop):
+            width = min(hop, n_fft - offset)
+            span = slice(offset, offset + self.num_frames * hop)
+            output[span].reshape(self.num_frames, hop)[:, :width] += frames[:, offset:offset + width]
+            norm[span].reshape(self.num_frames, hop)[:, :width] += window[offset:offset + width] ** 2
+
+        pad = n_fft // 2
+        audio = output[pad:pad + self.num_samples]
+        return audio / np.maximum(norm[pad:pad + self.num_samples], 1e-8)
+
+
+def power_to_db(power: np.ndarray, ref: Optional[float] = 1.0, top_db: Optional[float] = 80.0,
+                amin: float = 1e-10) -> np.ndarray:
+    """
+    Conversion puissance -> dB (convention librosa.power_to_db)
+
+    Args:
+        ref: Référence (None = maximum du tableau)
+        top_db: Dynamique maximale sous le maximum
+    """
+    reference = np.max(power) if ref is None else ref
+    db = 10.0 * np.log10(np.maximum(power, amin)) - 10.0 * np.log10(max(reference, amin))
+    if top_db is not None:
+        db = np.maximum(db, db.max() - top_db)
+    return db.astype(np.float32)
@@ -7,10 +7,7 @@ Note: Le package 'openai-whisper' est le modèle Whisper utilisé localement, pa
 import whisper
 import torch
 import numpy as np
-import librosa
-import soundfile as sf
-from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Union
 import logging
 import time
 import os
@@ -19,6 +16,11 @@ import threading
 import gc
 
 from .audio_preprocessor import AudioPreprocessor
+from .audio_io import DecodedAudio
+from .result_cache import ResultCache
+from .shared_weights import ensure_checkpoint, load_checkpoint
+from .spectral_frontend import SpectralFrontend
+from .metrics import MODEL_LOAD_SECONDS, MODEL_LOADS, MODEL_RELOADS, stage_timer
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +33,13 @@ class SpeechToTextService:
         model_size: str = "base",
         device: Optional[str] = None,
         language: str = "pt",
-        preprocess: bool = True
+        preprocess: bool = True,
+        reload_per_request: bool = False,
+        cache_size: int = 0,
+        cache_dir: Optional[str] = None,
+        warm_up: bool = False,
+        mmap_weights: bool = False,
+        weights_dir: Optional[str] = None
     ):
         """
         Args:
@@ -39,10 +47,30 @@ class SpeechToTextService:
             device: Device PyTorch ("cpu", "cuda", "mps")
             language: Code langue ISO 639-1 (ex: "pt", "fr", "en")
             preprocess: Activer le pré-traitement audio
+            reload_per_request: Recharger le modèle avant chaque transcription
+                (ancien comportement). Par défaut le modèle reste résident en mémoire
+                et seul l'état de décodage est réinitialisé entre les appels.
+            cache_size: Nombre de transcriptions gardées en mémoire (0 = pas de cache mémoire)
+            cache_dir: Dossier du cache disque des transcriptions (optionnel)
+            warm_up: Transcrire un extrait synthétique dès l'initialisation (voir warm_up())
+            mmap_weights: Charger les poids depuis un checkpoint mappé en mémoire,
+                partagé par tous les processus de la machine (voir shared_weights)
+            weights_dir: Dossier des checkpoints partagés (défaut: ~/.cache/whisper/shared)
         """
         self.model_size = model_size
         self.language = language
         self.preprocess = preprocess
+        self.reload_per_request = reload_per_request
+        self.reload_count = 0
+        self.mmap_weights = mmap_weights
+        self.weights_dir = weights_dir
+        self.checkpoint_path = None
+        
+        # Cache des résultats, indexé par le hash du signal + options de décodage
+        if cache_size > 0 or cache_dir:
+            self.cache = ResultCache(max_entries=cache_size, disk_dir=cache_dir, name="stt")
+        else:
+            self.cache = None
         
         # Déterminer le device
         # NOTE: Désactiver MPS temporairement car il cause des problèmes avec Whisper
@@ -64,6 +92,9 @@ class SpeechToTextService:
         self.model = None
         self._load_model()
         
+        # Front-end spectral partagé (STFT et filtres Mel de Whisper en cache)
+        self.frontend = SpectralFrontend.get(16000)
+        
         # Lock pour s'assurer qu'une seule transcription se fait à la fois
         # Cela évite les problèmes d'état partagé dans Whisper
         self._transcribe_lock = threading.Lock()
@@ -78,13 +109,45 @@ class SpeechToTextService:
             )
         else:
             self.preprocessor = None
+        
+        if warm_up:
+            self.warm_up()
+    
+    def warm_up(self, duration: float = 2.0) -> float:
+        """
+        Transcrit un extrait synthétique (hors cache) : allocations et noyaux PyTorch
+        sont prêts avant la première vraie requête
+        
+        Returns:
+            Durée du pré-chauffage (s)
+        """
+        start = time.perf_counter()
+        sr = whisper.audio.SAMPLE_RATE
+        t = np.arange(int(duration * sr)) / sr
+        clip = 0.1 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+        try:
+            self._transcribe_audio(clip.astype(np.float32), time.time())
+        except Exception as e:
+            # Le modèle est chargé : un résultat inexploitable ne l'empêche pas de servir
+            logger.warning(f"Pré-chauffage STT: {e}")
+        elapsed = time.perf_counter() - start
+        logger.info(f"🔥 Modèle Whisper pré-chauffé ({elapsed:.2f}s)")
+        return elapsed
     
     def _load_model(self):
         """Charge le modèle Whisper"""
         try:
             logger.info(f"Chargement du modèle Whisper {self.model_size}...")
-            self.model = whisper.load_model(self.model_size, device=self.device)
-            logger.info("Modèle Whisper chargé avec succès")
+            load_start = time.perf_counter()
+            if self.mmap_weights:
+                self.checkpoint_path = ensure_checkpoint(self.model_size, self.weights_dir)
+                self.model = load_checkpoint(self.checkpoint_path, device=self.device)
+            else:
+                self.model = whisper.load_model(self.model_size, device=self.device)
+            load_time = time.perf_counter() - load_start
+            MODEL_LOAD_SECONDS.set(load_time, model=f"whisper-{self.model_size}")
+            MODEL_LOADS.inc(model=f"whisper-{self.model_size}")
+            logger.info(f"Modèle Whisper chargé avec succès ({load_time:.2f}s)")
         except Exception as e:
             logger.error(f"Erreur lors du chargement du modèle: {e}")
             raise
@@ -100,11 +163,39 @@ class SpeechToTextService:
                 torch.mps.empty_cache()
             gc.collect()
             self._load_model()
+            self.reload_count += 1
+            MODEL_RELOADS.inc(model=f"whisper-{self.model_size}")
             logger.info("✅ Modèle Whisper rechargé avec succès")
         except Exception as e:
             logger.error(f"Erreur lors du rechargement du modèle: {e}")
             raise
     
+    def _reset_decoding_state(self):
+        """
+        Garantit un état de décodage vierge sans recharger les poids.
+        
+        Whisper crée à chaque appel de nouvelles DecodingOptions, un tokenizer et un
+        cache KV (installé via des hooks sur le décodeur puis retiré en fin de décodage).
+        Si un décodage précédent a été interrompu, des hooks orphelins pourraient
+        subsister : on les supprime ici pour que l'appel suivant reparte de zéro.
+        Seuls les hooks de cache KV de Whisper sont retirés (ceux des profileurs
+        ou de l'instrumentation restent en place).
+        """
+        self.model.eval()
+        stale_hooks = 0
+        for module in self.model.decoder.modules():
+            for hook_id, hook in list(module._forward_hooks.items()):
+                if self._is_kv_cache_hook(hook):
+                    del module._forward_hooks[hook_id]
+                    stale_hooks += 1
+        if stale_hooks:
+            logger.warning(f"⚠️  {stale_hooks} hook(s) de cache KV orphelin(s) supprimé(s)")
+    
+    @staticmethod
+    def _is_kv_cache_hook(hook) -> bool:
+        """Hook installé par Whisper.install_kv_cache_hooks (fonction save_to_cache)"""
+        return getattr(hook, "__qualname__", "").startswith("Whisper.install_kv_cache_hooks.")
+    
     def transcribe(
         self,
         audio_path: str,
@@ -139,290 +230,511 @@ class SpeechToTextService:
             Dict avec 'text', 'segments', 'language', 'latency', etc.
         """
         start_time = time.time()
-        original_audio_path = audio_path  # Sauvegarder le chemin original
-        preprocessed_path = None
-        converted_path = None
         
+        # Vérifier que le fichier existe et n'est pas vide
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Fichier audio non trouvé: {audio_path}")
+        
+        file_size = os.path.getsize(audio_path)
+        logger.info(f"Transcription de {audio_path} ({file_size} bytes)")
+        
+        if file_size == 0:
+            raise ValueError("Fichier audio vide")
+        
+        # Un seul décodage : durée, amplitude, RMS et hash sont calculés sur le même
+        # signal, réutilisé ensuite pour l'inférence (plus de conversion WAV ni de
+        # rechargements librosa successifs)
+        # Note: le pré-traitement (self.preprocessor) reste désactivé ici, il pouvait
+        # corrompre l'audio et causer les répétitions "A A A A..."
         try:
-            # Vérifier que le fichier existe et n'est pas vide
-            if not os.path.exists(audio_path):
-                raise FileNotFoundError(f"Fichier audio non trouvé: {audio_path}")
-            
-            file_size = os.path.getsize(audio_path)
-            logger.info(f"Transcription de {audio_path} ({file_size} bytes)")
+            with stage_timer("audio_load"):
+                decoded = DecodedAudio.from_file(audio_path, target_sr=16000)
+        except Exception as e:
+            logger.error(f"Erreur lors du décodage du fichier audio: {e}")
+            raise ValueError(f"Fichier audio invalide ou corrompu: {audio_path}")
+        
+        return self._transcribe_decoded(
+            decoded,
+            start_time,
+            task=task,
+            beam_size=beam_size,
+            best_of=best_of,
+            patience=patience,
+            length_penalty=length_penalty,
+            suppress_tokens=suppress_tokens,
+            word_timestamps=word_timestamps
+        )
+    
+    def load_audio(self, audio_path: str) -> np.ndarray:
+        """Charge un fichier audio en signal mono 16 kHz float32"""
+        with stage_timer("audio_load"):
+            decoded = DecodedAudio.from_file(audio_path, target_sr=16000)
+        decoded.validate()
+        return decoded.samples
+    
+    def transcribe_bytes(
+        self,
+        audio_bytes: bytes,
+        format: Optional[str] = None,
+        task: str = "transcribe",
+        beam_size: int = 5,
+        best_of: int = 5,
+        patience: float = 1.0,
+        length_penalty: float = 1.0,
+        suppress_tokens: str = "-1",
+        word_timestamps: bool = False
+    ) -> Dict:
+        """
+        Transcrit un fichier audio reçu en mémoire, sans aller-retour disque
+        
+        Les octets sont décodés directement en signal mono 16 kHz float32
+        puis transmis au modèle.
+        
+        Args:
+            audio_bytes: Contenu du fichier audio
+            format: Extension ou type MIME ("webm", ".wav", "audio/ogg"...), optionnel
+        
+        Returns:
+            Dict au même format que transcribe()
+        """
+        start_time = time.time()
+        if not audio_bytes:
+            raise ValueError("Fichier audio vide")
+        
+        with stage_timer("decode"):
+            decoded = DecodedAudio.from_bytes(audio_bytes, target_sr=16000, format_hint=format)
+        logger.info(f"Audio décodé en mémoire: {len(audio_bytes)} bytes -> {decoded.duration:.2f}s")
+        
+        return self._transcribe_decoded(
+            decoded,
+            start_time,
+            task=task,
+            beam_size=beam_size,
+            best_of=best_of,
+            patience=patience,
+            length_penalty=length_penalty,
+            suppress_tokens=suppress_tokens,
+            word_timestamps=word_timestamps
+        )
+    
+    def _transcribe_decoded(
+        self,
+        decoded: DecodedAudio,
+        start_time: float,
+        **decode_kwargs
+    ) -> Dict:
+        """Valide le signal décodé puis le transcrit (ou le sert depuis le cache)"""
+        decoded.validate()
+        logger.info(
+            f"Audio: {decoded.num_samples} échantillons à {decoded.sample_rate}Hz = "
+            f"{decoded.duration:.2f}s (hash {decoded.content_hash[:16]}...)"
+        )
+        
+        cache_key = self._cache_key(decoded.content_hash, "transcribe", decode_kwargs)
+        cached = self._get_cached(cache_key, start_time)
+        if cached is not None:
+            return cached
+        
+        result = self._transcribe_audio(decoded.samples, start_time, **decode_kwargs)
+        self._put_cached(cache_key, result)
+        return result
+    
+    def _cache_key(self, content_hash: str, mode: str, decode_kwargs: Dict) -> Optional[str]:
+        """Clé de cache : contenu audio + options effectives + modèle"""
+        if self.cache is None:
+            return None
+        return ResultCache.make_key(
+            content_hash,
+            mode,
+            self.model_size,
+            self.language,
+            sorted(decode_kwargs.items())
+        )
+    
+    def _get_cached(self, cache_key: Optional[str], start_time: float) -> Optional[Dict]:
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        logger.info(f"✅ Transcription servie depuis le cache ({cache_key[:16]}...)")
+        # batch_size décrit l'appel d'origine, pas celui-ci
+        cached = {key: value for key, value in cached.items() if key != "batch_size"}
+        return {**cached, "latency": time.time() - start_time, "cached": True}
+    
+    def _put_cached(self, cache_key: Optional[str], result: Dict):
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+    
+    def transcribe_array(
+        self,
+        audio: np.ndarray,
+        task: str = "transcribe",
+        beam_size: int = 5,
+        best_of: int = 5,
+        patience: float = 1.0,
+        length_penalty: float = 1.0,
+        suppress_tokens: str = "-1",
+        word_timestamps: bool = False
+    ) -> Dict:
+        """
+        Transcrit un signal audio déjà chargé (mono, 16 kHz, float32)
+        
+        Returns:
+            Dict au même format que transcribe()
+        """
+        start_time = time.time()
+        if audio is None or len(audio) == 0:
+            raise ValueError("Audio vide")
+        
+        return self._transcribe_decoded(
+            DecodedAudio(audio, 16000),
+            start_time,
+            task=task,
+            beam_size=beam_size,
+            best_of=best_of,
+            patience=patience,
+            length_penalty=length_penalty,
+            suppress_tokens=suppress_tokens,
+            word_timestamps=word_timestamps
+        )
+    
+    def _transcribe_audio(
+        self,
+        audio: np.ndarray,
+        start_time: float,
+        task: str = "transcribe",
+        beam_size: int = 5,
+        best_of: int = 5,
+        patience: float = 1.0,
+        length_penalty: float = 1.0,
+        suppress_tokens: str = "-1",
+        word_timestamps: bool = False
+    ) -> Dict:
+        """Exécute Whisper sur un signal mono 16 kHz avec un contexte vierge"""
+        # Options de transcription - FORCER un contexte vierge pour éviter les problèmes
+        # Utiliser des paramètres stricts pour éviter les répétitions et les hallucinations
+        decode_options = {
+            "language": self.language,
+            "task": task,
+            "temperature": 0.0,  # FORCER à 0.0 pour être déterministe
+            "beam_size": beam_size,
+            "best_of": best_of,
+            "patience": patience,
+            "length_penalty": length_penalty,
+            "suppress_tokens": suppress_tokens,
+            "condition_on_previous_text": False,  # FORCER à False pour éviter le contexte persistant
+            "word_timestamps": word_timestamps,
+            "no_speech_threshold": 0.6,  # Seuil pour détecter si c'est de la parole
+            "compression_ratio_threshold": 2.4,  # Seuil de compression pour détecter les répétitions (plus strict)
+            "logprob_threshold": -1.0,  # Seuil de probabilité de log
+            "initial_prompt": None,  # FORCER à None explicitement
+            # Utiliser suppress_blank=True pour éviter les répétitions de caractères vides
+            "suppress_blank": True,
+        }
+        
+        # Par défaut le modèle reste résident : chaque appel reçoit des options de
+        # décodage, un tokenizer et un cache KV neufs, ce qui garantit un état propre
+        # sans relire les poids depuis le disque. Le rechargement complet reste
+        # disponible via reload_per_request=True (STT_RELOAD_MODEL=true).
+        
+        # Utiliser un lock pour s'assurer qu'une seule transcription se fait à la fois :
+        # le cache KV de Whisper est installé via des hooks sur le modèle partagé
+        with self._transcribe_lock:
+            if self.reload_per_request:
+                logger.info("🔄 Rechargement du modèle Whisper pour garantir un état propre...")
+                self._reload_model()
             
-            if file_size == 0:
-                raise ValueError("Fichier audio vide")
+            self._reset_decoding_state()
             
-            # TOUJOURS convertir le format en premier (même si préprocesseur activé)
-            logger.info(f"Vérification du format pour: {audio_path}")
-            converted_path = self._ensure_format(audio_path)
-            if converted_path != audio_path:
-                audio_path = converted_path
-                logger.info(f"Fichier converti: {audio_path}")
+            # Vider le cache PyTorch avant la transcription pour éviter les problèmes d'état
+            if self.device == "cuda":
+                torch.cuda.empty_cache()
+            elif self.device == "mps" and hasattr(torch.mps, "empty_cache"):
+                torch.mps.empty_cache()
             
-            # Pré-traitement si activé (après conversion)
-            # TEMPORAIREMENT DÉSACTIVÉ pour tester si c'est la cause du problème
-            # Le préprocesseur pourrait corrompre l'audio et causer les répétitions "A A A A..."
-            if False and self.preprocess and self.preprocessor:  # DÉSACTIVÉ temporairement
-                preprocessed_path = self._get_temp_path(audio_path)
-                try:
-                    audio, sr = self.preprocessor.preprocess(audio_path, preprocessed_path)
-                    # Vérifier que le fichier pré-traité est valide
-                    if os.path.exists(preprocessed_path) and os.path.getsize(preprocessed_path) > 0:
-                        # Vérifier rapidement avec librosa
-                        test_audio, test_sr = librosa.load(preprocessed_path, sr=None, duration=0.1)
-                        if len(test_audio) > 0:
-                            audio_path = preprocessed_path
-                            logger.info(f"Fichier pré-traité: {audio_path}")
-                        else:
-                            logger.warning("Fichier pré-traité invalide, utilisation du fichier original")
-                            if os.path.exists(preprocessed_path):
-                                os.remove(preprocessed_path)
-                            preprocessed_path = None
-                    else:
-                        logger.warning("Fichier pré-traité vide, utilisation du fichier original")
-                        if preprocessed_path and os.path.exists(preprocessed_path):
-                            os.remove(preprocessed_path)
-                        preprocessed_path = None
-                except Exception as e:
-                    logger.error(f"Erreur lors du pré-traitement: {e}, utilisation du fichier original")
-                    if preprocessed_path and os.path.exists(preprocessed_path):
-                        try:
-                            os.remove(preprocessed_path)
-                        except:
-                            pass
-                    preprocessed_path = None
+            # Forcer un garbage collection pour nettoyer la mémoire
+            gc.collect()
             
-            # Vérifier que le fichier audio final existe et n'est pas vide
-            if not os.path.exists(audio_path):
-                raise FileNotFoundError(f"Fichier audio final non trouvé: {audio_path}")
+            # IMPORTANT: Créer une copie fraîche des options pour éviter tout état partagé
+            fresh_decode_options = decode_options.copy()
+            logger.info(f"Options de transcription: {list(fresh_decode_options.keys())}")
             
-            final_file_size = os.path.getsize(audio_path)
-            logger.info(f"Fichier audio final pour transcription: {audio_path} ({final_file_size} bytes)")
+            with stage_timer("inference"):
+                result = self.model.transcribe(
+                    audio,
+                    **fresh_decode_options
+                )
             
-            if final_file_size == 0:
-                raise ValueError(f"Fichier audio final vide: {audio_path}")
+            # Vider le cache après la transcription aussi
+            if self.device == "cuda":
+                torch.cuda.empty_cache()
+            elif self.device == "mps" and hasattr(torch.mps, "empty_cache"):
+                torch.mps.empty_cache()
             
-            # Vérifier rapidement le contenu audio avec librosa pour s'assurer qu'il est valide
+            # Forcer un garbage collection après
+            gc.collect()
+        
+        # Vérifier le résultat
+        if not result or "text" not in result:
+            raise ValueError("Whisper n'a retourné aucun résultat")
+        
+        logger.info(f"Résultat Whisper brut: {result.get('text', '')[:100]}")
+        
+        return self._build_result(result, start_time)
+    
+    def transcribe_batch(
+        self,
+        audio_arrays: List[np.ndarray],
+        task: str = "transcribe",
+        beam_size: int = 5,
+        patience: float = 1.0,
+        length_penalty: float = 1.0,
+        suppress_tokens: str = "-1"
+    ) -> List[Union[Dict, Exception]]:
+        """
+        Transcrit plusieurs extraits courts (<= 30 s) en un seul passage encodeur
+        
+        Les fenêtres mel de 30 s de tous les extraits sont empilées et encodées ensemble,
+        puis décodées (sans repli en température, contrairement à transcribe()) : en un
+        seul lot en glouton, extrait par extrait en beam search (voir _decode_windows).
+        
+        Args:
+            audio_arrays: Signaux mono 16 kHz float32
+        
+        Returns:
+            Liste alignée sur audio_arrays : résultat (format transcribe()) ou exception
+        """
+        start_time = time.time()
+        
+        for audio in audio_arrays:
+            if len(audio) == 0:
+                raise ValueError("Audio vide dans le lot")
+            if len(audio) > whisper.audio.N_SAMPLES:
+                raise ValueError("Les extraits d'un lot doivent durer au plus 30 s")
+        
+        decode_kwargs = {
+            "task": task,
+            "beam_size": beam_size,
+            "patience": patience,
+            "length_penalty": length_penalty,
+            "suppress_tokens": suppress_tokens
+        }
+        results: List[Union[Dict, Exception, None]] = [None] * len(audio_arrays)
+        cache_keys: List[Optional[str]] = [None] * len(audio_arrays)
+        if self.cache is not None:
+            for i, audio in enumerate(audio_arrays):
+                cache_keys[i] = self._cache_key(DecodedAudio(audio, 16000).content_hash, "batch", decode_kwargs)
+                results[i] = self._get_cached(cache_keys[i], start_time)
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        decoded = self._decode_windows(
+            [audio_arrays[i] for i in pending],
+            task=task,
+            beam_size=beam_size,
+            patience=patience,
+            length_penalty=length_penalty,
+            suppress_tokens=suppress_tokens
+        )
+        logger.info(f"Lot de {len(pending)} extraits décodé en {time.time() - start_time:.2f}s")
+        
+        for i, decoding in zip(pending, decoded):
             try:
-                test_audio, test_sr = librosa.load(audio_path, sr=None, duration=0.1)  # Charger seulement 0.1s pour vérifier
-                logger.info(f"Fichier audio valide: {len(test_audio)} échantillons à {test_sr}Hz")
-                if len(test_audio) == 0:
-                    raise ValueError(f"Fichier audio ne contient aucun échantillon: {audio_path}")
+                result = self._decoding_to_result(decoding, len(audio_arrays[i]), start_time)
+                self._put_cached(cache_keys[i], result)
+                results[i] = {**result, "batch_size": len(pending)}
             except Exception as e:
-                logger.error(f"Erreur lors de la vérification du fichier audio: {e}")
-                raise ValueError(f"Fichier audio invalide ou corrompu: {audio_path}")
-            
-            # Options de transcription - FORCER un contexte vierge pour éviter les problèmes
-            # Utiliser des paramètres stricts pour éviter les répétitions et les hallucinations
-            decode_options = {
-                "language": self.language,
-                "task": task,
-                "temperature": 0.0,  # FORCER à 0.0 pour être déterministe
-                "beam_size": beam_size,
-                "best_of": best_of,
-                "patience": patience,
-                "length_penalty": length_penalty,
-                "suppress_tokens": suppress_tokens,
-                "condition_on_previous_text": False,  # FORCER à False pour éviter le contexte persistant
-                "word_timestamps": word_timestamps,
-                "no_speech_threshold": 0.6,  # Seuil pour détecter si c'est de la parole
-                "compression_ratio_threshold": 2.4,  # Seuil de compression pour détecter les répétitions (plus strict)
-                "logprob_threshold": -1.0,  # Seuil de probabilité de log
-                "initial_prompt": None,  # FORCER à None explicitement
-            }
-            
-            # Ne pas utiliser initial_prompt pour éviter tout contexte
-            # if initial_prompt:
-            #     decode_options["initial_prompt"] = initial_prompt
-            
-            # Transcription avec lock pour éviter les problèmes d'état partagé
-            logger.info(f"Transcription de {audio_path} avec Whisper...")
-            
-            # SOLUTION RADICALE: Recharger le modèle AVANT chaque transcription
-            # Cela garantit un état propre et évite tous les problèmes d'état persistant
-            # (Même si c'est plus coûteux, c'est la seule solution fiable)
-            logger.info("🔄 Rechargement du modèle Whisper pour garantir un état propre...")
-            self._reload_model()
-            
-            # Utiliser un lock pour s'assurer qu'une seule transcription se fait à la fois
-            # Cela évite que Whisper garde un état entre les appels
-            with self._transcribe_lock:
-                # Vider le cache PyTorch avant la transcription pour éviter les problèmes d'état
-                if self.device == "cuda":
-                    torch.cuda.empty_cache()
-                elif self.device == "mps" and hasattr(torch.mps, "empty_cache"):
-                    torch.mps.empty_cache()
-                
-                # Forcer un garbage collection pour nettoyer la mémoire
-                gc.collect()
-                
-                # Transcription
-                # IMPORTANT: Créer une copie fraîche des options pour éviter tout état partagé
-                fresh_decode_options = decode_options.copy()
-                
-                # Calculer un hash du fichier pour le logging (mais ne pas l'utiliser pour la logique)
-                import hashlib
-                with open(audio_path, 'rb') as f:
-                    file_hash = hashlib.md5(f.read()).hexdigest()
-                logger.info(f"Hash MD5 du fichier audio: {file_hash[:16]}...")
-                
-                # SOLUTION: Forcer Whisper à utiliser un nouveau contexte en passant explicitement
-                # tous les paramètres et en s'assurant qu'aucun état n'est réutilisé
-                # Utiliser suppress_blank=True pour éviter les répétitions de caractères vides
-                if "suppress_blank" not in fresh_decode_options:
-                    fresh_decode_options["suppress_blank"] = True
-                
-                # Transcription avec options strictes
-                logger.info(f"Options de transcription: {list(fresh_decode_options.keys())}")
-                
-                # SOLUTION: Charger l'audio avec librosa et le passer directement à Whisper
-                # Cela évite les problèmes de compatibilité avec ffmpeg et les fichiers WAV générés par pydub
-                try:
-                    logger.info(f"Chargement de l'audio avec librosa pour Whisper...")
-                    audio_array, audio_sr = librosa.load(audio_path, sr=16000, mono=True)
-                    audio_duration = len(audio_array) / audio_sr
-                    logger.info(f"Audio chargé: {len(audio_array)} échantillons à {audio_sr}Hz = {audio_duration:.2f}s")
-                    
-                    # Vérifier que l'audio est valide
-                    if len(audio_array) == 0:
-                        raise ValueError("Audio vide après chargement avec librosa")
-                    
-                    if audio_duration < 0.5:
-                        raise ValueError(f"Audio trop court: {audio_duration:.2f}s (minimum 0.5s)")
-                    
-                    # Vérifier que l'audio n'est pas silencieux (au moins 1% de l'amplitude max)
-                    max_amplitude = np.max(np.abs(audio_array))
-                    if max_amplitude < 0.01:
-                        logger.warning(f"Audio très silencieux (amplitude max: {max_amplitude:.4f})")
-                    
-                    # Passer l'array numpy directement à Whisper au lieu du chemin de fichier
-                    logger.info(f"Envoi de l'audio à Whisper (durée: {audio_duration:.2f}s)...")
-                    result = self.model.transcribe(
-                        audio_array,
-                        **fresh_decode_options
-                    )
-                except Exception as e:
-                    logger.warning(f"Erreur lors du chargement avec librosa, tentative avec chemin de fichier: {e}")
-                    # Fallback: utiliser le chemin de fichier directement
-                    result = self.model.transcribe(
-                        audio_path,
-                        **fresh_decode_options
-                    )
-                
-                # Vider le cache après la transcription aussi
-                if self.device == "cuda":
-                    torch.cuda.empty_cache()
-                elif self.device == "mps" and hasattr(torch.mps, "empty_cache"):
-                    torch.mps.empty_cache()
+                results[i] = e
+        
+        return results
+    
+    def transcribe_window(
+        self,
+        audio: np.ndarray,
+        task: str = "transcribe",
+        beam_size: int = 1
+    ) -> Dict:
+        """
+        Décode une seule fenêtre (<= 30 s) sans cache ni repli en température
+        
+        Utilisé pour les hypothèses partielles du streaming : décodage glouton par
+        défaut (beam_size=1) pour minimiser la latence.
+        
+        Returns:
+            Dict au même format que transcribe()
+        """
+        start_time = time.time()
+        if len(audio) == 0:
+            raise ValueError("Audio vide")
+        audio = audio[-whisper.audio.N_SAMPLES:]
+        decoding = self._decode_windows([audio], task=task, beam_size=beam_size)[0]
+        return self._decoding_to_result(decoding, len(audio), start_time)
+    
+    def _decode_windows(
+        self,
+        audio_arrays: List[np.ndarray],
+        task: str = "transcribe",
+        beam_size: int = 5,
+        patience: float = 1.0,
+        length_penalty: float = 1.0,
+        suppress_tokens: str = "-1"
+    ) -> List:
+        """
+        Empile les fenêtres mel de 30 s, les encode en un seul lot et les décode
+
+        whisper.decode ne répète pas les caractéristiques audio pour chaque faisceau :
+        en beam search, un lot de plusieurs extraits échoue dans qkv_attention. Les
+        extraits sont alors décodés un par un sur leurs caractéristiques déjà
+        encodées (acceptées telles quelles par whisper.decode) ; le décodage glouton
+        reste fait en un seul lot.
+        """
+        # Entrée du modèle dérivée de la STFT du front-end partagé (mêmes valeurs
+        # que whisper.log_mel_spectrogram, filtres Mel en cache)
+        n_mels = self.model.dims.n_mels
+        with stage_timer("features"):
+            mel = torch.from_numpy(np.stack([
+                self.frontend.analyze(
+                    whisper.pad_or_trim(np.asarray(audio, dtype=np.float32))
+                ).whisper_log_mel(n_mels)
+                for audio in audio_arrays
+            ]))
+        
+        options = whisper.DecodingOptions(
+            task=task,
+            language=self.language,
+            temperature=0.0,
+            # beam_size=1 correspond au décodage glouton
+            beam_size=beam_size if beam_size > 1 else None,
+            patience=patience if beam_size > 1 else None,
+            length_penalty=length_penalty,
+            suppress_tokens=suppress_tokens,
+            suppress_blank=True,
+            without_timestamps=True,
+            fp16=self.device == "cuda"
+        )
+        
+        with self._transcribe_lock:
+            if self.reload_per_request:
+                self._reload_model()
+            self._reset_decoding_state()
+            with stage_timer("inference"):
+                mel = mel.to(self.model.device)
+                if options.beam_size is None or len(audio_arrays) == 1:
+                    return whisper.decode(self.model, mel, options)
+                with torch.no_grad():
+                    audio_features = self.model.encoder(mel.half() if options.fp16 else mel)
+                return [
+                    whisper.decode(self.model, features, options)
+                    for features in audio_features
+                ]
+    
+    def _decoding_to_result(self, decoding, num_samples: int, start_time: float) -> Dict:
+        """Convertit un DecodingResult (fenêtre unique) au format de transcribe()"""
+        text = decoding.text
+        # Même règle que whisper.transcribe pour les fenêtres sans parole
+        if decoding.no_speech_prob > 0.6 and decoding.avg_logprob < -1.0:
+            text = ""
+        segment = {
+            "id": 0,
+            "seek": 0,
+            "start": 0.0,
+            "end": num_samples / whisper.audio.SAMPLE_RATE,
+            "text": text,
+            "tokens": decoding.tokens,
+            "temperature": decoding.temperature,
+            "avg_logprob": decoding.avg_logprob,
+            "compression_ratio": decoding.compression_ratio,
+            "no_speech_prob": decoding.no_speech_prob
+        }
+        return self._build_result(
+            {"text": text, "language": decoding.language, "segments": [segment] if text else []},
+            start_time
+        )
+    
+    def _build_result(self, result: Dict, start_time: float) -> Dict:
+        """
+        Nettoie la sortie brute de Whisper (tokens spéciaux, répétitions, NaN)
+        et construit la réponse avec les métriques
+        """
+        with stage_timer("postprocessing"):
+            return self._clean_result(result, start_time)
+    
+    def _clean_result(self, result: Dict, start_time: float) -> Dict:
+        """Corps de _build_result (durée mesurée comme étape de post-traitement)"""
+        latency = time.time() - start_time
+        
+        # Calculer des métriques
+        text = result.get("text", "").strip()
+        
+        # Nettoyer les tokens spéciaux de Whisper (<|pt|>, <|transcribe|>, etc.)
+        text = re.sub(r'<\|[^|]+\|>', '', text)  # Supprimer les tokens <|xxx|>
+        text = text.strip()
+        
+        # Vérifier le résultat (détection des répétitions devenue moins nécessaire
+        # car l'état de décodage est réinitialisé à chaque appel, mais on garde la vérification)
+        if len(text) > 10:
+            # Compter les répétitions de caractères consécutifs (5+ répétitions)
+            repeated_pattern = re.search(r'(.)\1{4,}', text)
+            if repeated_pattern:
+                repeated_char = repeated_pattern.group(1)
+                logger.error(f"❌ PROBLÈME: Répétitions suspectes détectées malgré un état de décodage vierge!")
+                logger.error(f"❌ Caractère répété: '{repeated_char}'")
+                logger.error(f"❌ Texte complet: {text[:200]}")
                 
-                # Forcer un garbage collection après
-                gc.collect()
-            
-            # Vérifier le résultat
-            if not result or "text" not in result:
-                raise ValueError("Whisper n'a retourné aucun résultat")
-            
-            logger.info(f"Résultat Whisper brut: {result.get('text', '')[:100]}")
-            
-            latency = time.time() - start_time
-            
-            # Calculer des métriques
-            text = result.get("text", "").strip()
-            
-            # Nettoyer les tokens spéciaux de Whisper (<|pt|>, <|transcribe|>, etc.)
-            text = re.sub(r'<\|[^|]+\|>', '', text)  # Supprimer les tokens <|xxx|>
-            text = text.strip()
-            
-            # Vérifier le résultat (détection des répétitions devenue moins nécessaire
-            # car on recharge le modèle avant chaque transcription, mais on garde la vérification)
-            if len(text) > 10:
-                # Compter les répétitions de caractères consécutifs (5+ répétitions)
-                repeated_pattern = re.search(r'(.)\1{4,}', text)
-                if repeated_pattern:
-                    repeated_char = repeated_pattern.group(1)
-                    logger.error(f"❌ PROBLÈME: Répétitions suspectes détectées même après rechargement!")
-                    logger.error(f"❌ Caractère répété: '{repeated_char}'")
-                    logger.error(f"❌ Texte complet: {text[:200]}")
-                    
-                    # Essayer de nettoyer en supprimant les répétitions excessives (garder max 2 répétitions)
-                    text_cleaned = re.sub(r'(.)\1{2,}', r'\1\1', text)
-                    if text_cleaned != text:
-                        logger.warning(f"⚠️  Tentative de nettoyage: {text_cleaned[:100]}")
-                        text = text_cleaned
-                    else:
-                        # Si le nettoyage n'aide pas, c'est vraiment corrompu
-                        logger.error(f"❌ Transcription trop corrompue, impossible de nettoyer")
-                        raise ValueError(f"Transcription corrompue avec répétitions: {text[:100]}")
-            
-            # Log pour déboguer
-            logger.info(f"✅ Texte transcrit (premiers 100 caractères): {text[:100]}")
-            logger.info(f"✅ Longueur du texte: {len(text)} caractères, {len(text.split())} mots")
-            
-            word_count = len(text.split()) if text else 0
-            
-            # Nettoyer les segments pour éliminer les valeurs NaN (non JSON-compliant)
-            def clean_segment(seg):
-                """Nettoie un segment en remplaçant les NaN par None ou 0"""
-                cleaned = {}
-                for key, value in seg.items():
-                    if isinstance(value, (int, float)):
-                        if np.isnan(value) or np.isinf(value):
-                            cleaned[key] = 0.0 if key in ['start', 'end', 'temperature', 'avg_logprob', 'compression_ratio', 'no_speech_prob'] else None
-                        else:
-                            cleaned[key] = float(value) if isinstance(value, (np.float32, np.float64)) else value
-                    elif isinstance(value, list):
-                        # Nettoyer les listes (tokens, etc.)
-                        cleaned[key] = [v for v in value if v is not None and not (isinstance(v, float) and (np.isnan(v) or np.isinf(v)))]
+                # Essayer de nettoyer en supprimant les répétitions excessives (garder max 2 répétitions)
+                text_cleaned = re.sub(r'(.)\1{2,}', r'\1\1', text)
+                if text_cleaned != text:
+                    logger.warning(f"⚠️  Tentative de nettoyage: {text_cleaned[:100]}")
+                    text = text_cleaned
+                else:
+                    # Si le nettoyage n'aide pas, c'est vraiment corrompu
+                    logger.error(f"❌ Transcription trop corrompue, impossible de nettoyer")
+                    raise ValueError(f"Transcription corrompue avec répétitions: {text[:100]}")
+        
+        # Log pour déboguer
+        logger.info(f"✅ Texte transcrit (premiers 100 caractères): {text[:100]}")
+        logger.info(f"✅ Longueur du texte: {len(text)} caractères, {len(text.split())} mots")
+        
+        word_count = len(text.split()) if text else 0
+        
+        # Nettoyer les segments pour éliminer les valeurs NaN (non JSON-compliant)
+        def clean_segment(seg):
+            """Nettoie un segment en remplaçant les NaN par None ou 0"""
+            cleaned = {}
+            for key, value in seg.items():
+                if isinstance(value, (int, float)):
+                    if np.isnan(value) or np.isinf(value):
+                        cleaned[key] = 0.0 if key in ['start', 'end', 'temperature', 'avg_logprob', 'compression_ratio', 'no_speech_prob'] else None
                     else:
-                        cleaned[key] = value
-                return cleaned
-            
-            segments_cleaned = [clean_segment(seg) for seg in result.get("segments", [])]
-            
-            # S'assurer que latency n'est pas NaN
-            if np.isnan(latency) or np.isinf(latency):
-                latency = 0.0
-            
-            # Calculer le WER approximatif (nécessiterait une référence)
-            # Pour l'instant, on retourne juste les métriques disponibles
-            
-            return {
-                "text": text,
-                "language": result.get("language", self.language),
-                "segments": segments_cleaned,
-                "latency": float(latency) if not np.isnan(latency) else 0.0,
-                "word_count": word_count,
-                "model_size": self.model_size,
-                "device": self.device
-            }
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de la transcription: {e}")
-            raise
-        finally:
-            # Nettoyer les fichiers temporaires (même en cas d'erreur)
-            cleanup_paths = []
-            
-            # Nettoyer le fichier pré-traité s'il existe
-            if preprocessed_path and os.path.exists(preprocessed_path):
-                cleanup_paths.append(preprocessed_path)
-            
-            # Nettoyer le fichier converti s'il est différent de l'original
-            if converted_path and converted_path != original_audio_path and os.path.exists(converted_path):
-                # Vérifier que ce n'est pas le fichier pré-traité
-                if converted_path != preprocessed_path:
-                    cleanup_paths.append(converted_path)
-            
-            # Supprimer tous les fichiers temporaires
-            for path in cleanup_paths:
-                try:
-                    if os.path.exists(path):
-                        os.remove(path)
-                        logger.debug(f"Fichier temporaire supprimé: {path}")
-                except Exception as e:
-                    logger.warning(f"Impossible de supprimer {path}: {e}")
+                        cleaned[key] = float(value) if isinstance(value, (np.float32, np.float64)) else value
+                elif isinstance(value, list):
+                    # Nettoyer les listes (tokens, etc.)
+                    cleaned[key] = [v for v in value if v is not None and not (isinstance(v, float) and (np.isnan(v) or np.isinf(v)))]
+                else:
+                    cleaned[key] = value
+            return cleaned
+        
+        segments_cleaned = [clean_segment(seg) for seg in result.get("segments", [])]
+        
+        # S'assurer que latency n'est pas NaN
+        if np.isnan(latency) or np.isinf(latency):
+            latency = 0.0
+        
+        # Calculer le WER approximatif (nécessiterait une référence)
+        # Pour l'instant, on retourne juste les métriques disponibles
+        
+        return {
+            "text": text,
+            "language": result.get("language", self.language),
+            "segments": segments_cleaned,
+            "latency": float(latency) if not np.isnan(latency) else 0.0,
+            "word_count": word_count,
+            "model_size": self.model_size,
+            "device": self.device
+        }
     
     def transcribe_stream(
         self,
@@ -439,166 +751,7 @@ class SpeechToTextService:
         Returns:
             Dict avec la transcription
         """
-        # Sauvegarder temporairement
-        temp_path = self._get_temp_path(f"stream.{format}")
-        
-        try:
-            with open(temp_path, "wb") as f:
-                f.write(audio_buffer)
-            
-            return self.transcribe(temp_path)
-            
-        finally:
-            # Nettoyer les fichiers temporaires
-            cleanup_paths = []
-            
-            if temp_path and os.path.exists(temp_path):
-                cleanup_paths.append(temp_path)
-            
-            # Nettoyer aussi les fichiers pré-traités potentiels
-            if temp_path:
-                import tempfile
-                temp_dir = Path(tempfile.gettempdir()) / "trans_voice"
-                if temp_dir.exists():
-                    # Nettoyer les fichiers récents (moins de 2 minutes) qui pourraient être liés
-                    current_time = time.time()
-                    for file in temp_dir.glob("audio_*.wav"):
-                        try:
-                            file_time = file.stat().st_mtime
-                            if current_time - file_time < 120:  # Fichiers de moins de 2 minutes
-                                cleanup_paths.append(str(file))
-                        except:
-                            pass
-            
-            # Supprimer tous les fichiers
-            for path in cleanup_paths:
-                try:
-                    if os.path.exists(path):
-                        os.remove(path)
-                        logger.debug(f"Fichier temporaire supprimé: {path}")
-                except Exception as e:
-                    logger.warning(f"Impossible de supprimer {path}: {e}")
-    
-    def _ensure_format(self, audio_path: str) -> str:
-        """Convertit l'audio en format WAV si nécessaire"""
-        # Whisper peut gérer plusieurs formats, mais WAV est optimal
-        if audio_path.endswith('.wav'):
-            return audio_path
-        
-        # Convertir les formats non supportés (comme .webm) en WAV
-        try:
-            from pydub import AudioSegment
-            
-            # Créer le chemin du fichier WAV
-            wav_path = audio_path.rsplit('.', 1)[0] + '.wav'
-            
-            # Détecter le format depuis l'extension
-            ext = Path(audio_path).suffix.lower()
-            if ext == '.webm':
-                audio_format = 'webm'
-            elif ext == '.mp3':
-                audio_format = 'mp3'
-            elif ext == '.m4a':
-                audio_format = 'm4a'
-            elif ext == '.ogg':
-                audio_format = 'ogg'
-            else:
-                audio_format = ext[1:] if ext else 'webm'  # Par défaut webm
-            
-            # Charger avec pydub (nécessite ffmpeg)
-            logger.info(f"Conversion de {audio_path} ({audio_format}) en WAV...")
-            audio = AudioSegment.from_file(audio_path, format=audio_format)
-            
-            # Vérifier la durée source
-            duration_ms = len(audio)
-            duration_sec = duration_ms / 1000.0
-            logger.info(f"Durée audio source: {duration_sec:.2f}s ({duration_ms}ms)")
-            
-            if duration_sec < 0.5:
-                raise ValueError(f"Fichier audio trop court: {duration_sec:.2f}s (minimum 0.5s)")
-            
-            # Exporter en WAV mono 16kHz
-            audio = audio.set_channels(1)  # Mono
-            audio = audio.set_frame_rate(16000)  # 16kHz
-            audio.export(wav_path, format="wav")
-            
-            # Vérifier que le fichier WAV est valide
-            wav_size = os.path.getsize(wav_path)
-            expected_min_size = int(duration_sec * 16000 * 2 * 0.8)  # 80% de la taille attendue
-            logger.info(f"Fichier converti: {wav_path} ({wav_size} bytes, attendu: >{expected_min_size} bytes)")
-            
-            if wav_size < expected_min_size:
-                raise ValueError(f"Fichier WAV converti trop petit: {wav_size} bytes (attendu: >{expected_min_size} bytes). Conversion incomplète.")
-            
-            # Double vérification avec librosa
-            try:
-                test_audio, test_sr = librosa.load(wav_path, sr=None)
-                test_duration = len(test_audio) / test_sr
-                logger.info(f"Vérification finale WAV: {len(test_audio)} échantillons à {test_sr}Hz = {test_duration:.2f}s")
-                
-                # Vérifier que la durée correspond (tolérance de 30%)
-                if test_duration < duration_sec * 0.7:
-                    raise ValueError(f"Durée WAV incorrecte: {test_duration:.2f}s vs {duration_sec:.2f}s attendus")
-            except Exception as e:
-                logger.error(f"Erreur lors de la vérification du WAV: {e}")
-                if os.path.exists(wav_path):
-                    os.remove(wav_path)
-                raise
-            
-            # Supprimer l'ancien fichier si différent
-            if wav_path != audio_path and os.path.exists(audio_path):
-                try:
-                    os.remove(audio_path)
-                except:
-                    pass
-            
-            return wav_path
-        except ImportError:
-            logger.warning("pydub non disponible, tentative avec librosa...")
-            try:
-                # Fallback: utiliser librosa (nécessite ffmpeg système)
-                audio, sr = librosa.load(audio_path, sr=16000, mono=True)
-                wav_path = audio_path.rsplit('.', 1)[0] + '.wav'
-                sf.write(wav_path, audio, sr)
-                
-                if wav_path != audio_path and os.path.exists(audio_path):
-                    try:
-                        os.remove(audio_path)
-                    except:
-                        pass
-                
-                return wav_path
-            except Exception as e:
-                logger.error(f"Impossible de convertir {audio_path} en WAV: {e}")
-                raise
-        except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Erreur lors de la conversion {audio_path} en WAV: {error_msg}")
-            
-            # Vérifier si c'est un problème avec ffmpeg
-            if "ffmpeg" in error_msg.lower() or "No such file" in error_msg or "not found" in error_msg.lower():
-                logger.error("ffmpeg n'est pas installé ou non trouvé dans le PATH")
-                logger.error("Installez ffmpeg: brew install ffmpeg (macOS) ou apt-get install ffmpeg (Linux)")
-                raise RuntimeError(
-                    "ffmpeg est requis pour convertir les fichiers audio. "
-                    "Installez-le avec: brew install ffmpeg (macOS) ou apt-get install ffmpeg (Linux)"
-                )
-            
-            # Si la conversion échoue, on ne peut pas continuer
-            logger.error(f"Impossible de convertir {audio_path}. Le format .webm nécessite une conversion en WAV.")
-            raise RuntimeError(
-                f"Impossible de convertir le fichier audio {audio_path} en WAV. "
-                f"Erreur: {error_msg}"
-            )
-    
-    def _get_temp_path(self, original_path: str) -> str:
-        """Génère un chemin temporaire"""
-        import tempfile
-        temp_dir = Path(tempfile.gettempdir()) / "trans_voice"
-        temp_dir.mkdir(exist_ok=True)
-        
-        ext = Path(original_path).suffix or ".wav"
-        return str(temp_dir / f"audio_{int(time.time() * 1000)}{ext}")
+        return self.transcribe_bytes(audio_buffer, format=format)
     
     def calculate_wer(self, reference: str, hypothesis: str) -> float:
         """
@@ -644,13 +797,24 @@ class SpeechToTextService:
         
         return wer
     
+    def get_cache_stats(self) -> Optional[Dict]:
+        """Compteurs du cache de transcriptions (None sans cache)"""
+        return self.cache.get_stats() if self.cache is not None else None
+    
     def get_model_info(self) -> Dict:
         """Retourne les informations sur le modèle"""
         return {
             "model_size": self.model_size,
             "device": self.device,
             "language": self.language,
-            "preprocessing": self.preprocess
+            "preprocessing": self.preprocess,
+            "reload_per_request": self.reload_per_request,
+            "reload_count": self.reload_count,
+            "weights": {
+                "mmap": self.mmap_weights,
+                "checkpoint": str(self.checkpoint_path) if self.checkpoint_path else None
+            },
+            "cache": self.get_cache_stats()
         }
 
 
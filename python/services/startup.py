@@ -0,0 +1,93 @@
+"""
+Suivi du démarrage des services
+Les modèles sont chargés en arrière-plan après l'ouverture du port : l'état de
+chaque composant alimente les sondes de vivacité et de disponibilité de l'API.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class StartupTracker:
+    """
+    État de démarrage de chaque composant (pending -> loading -> warming -> ready,
+    ou failed), avec la durée de chaque phase
+    """
+
+    def __init__(self, components: Iterable[str]):
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._components: Dict[str, Dict] = {
+            name: {"state": PENDING, "detail": None, "error": None, "since": None, "phases": {}}
+            for name in components
+        }
+
+    def set(self, component: str, state: str, detail: Optional[str] = None, error: Optional[str] = None):
+        """Passe un composant dans un nouvel état (la durée de la phase précédente est conservée)"""
+        now = time.time()
+        with self._lock:
+            entry = self._components[component]
+            if entry["since"] is not None:
+                entry["phases"][entry["state"]] = now - entry["since"]
+            entry.update(state=state, detail=detail, error=error, since=now)
+        if state == FAILED:
+            logger.error(f"Démarrage de {component} en échec: {error}")
+        else:
+            logger.info(f"Démarrage de {component}: {state}{f' ({detail})' if detail else ''}")
+
+    @contextmanager
+    def phase(self, component: str, state: str, detail: Optional[str] = None):
+        """Bloc exécuté dans l'état `state` ; une exception fait passer le composant en échec"""
+        self.set(component, state, detail)
+        try:
+            yield
+        except BaseException as e:
+            self.set(component, FAILED, error=f"{type(e).__name__}: {e}")
+            raise
+
+    def state(self, component: str) -> str:
+        with self._lock:
+            return self._components[component]["state"]
+
+    def is_loading(self, component: str) -> bool:
+        """Le composant n'est pas encore prêt mais n'a pas échoué"""
+        return self.state(component) in (PENDING, LOADING, WARMING)
+
+    def is_ready(self) -> bool:
+        """Tous les composants sont prêts"""
+        with self._lock:
+            return all(entry["state"] == READY for entry in self._components.values())
+
+    def get_status(self) -> Dict:
+        """États, progression et durées (réponse des sondes)"""
+        now = time.time()
+        with self._lock:
+            components = {}
+            for name, entry in self._components.items():
+                phases = dict(entry["phases"])
+                if entry["since"] is not None and entry["state"] not in (READY, FAILED):
+                    phases[entry["state"]] = now - entry["since"]
+                components[name] = {
+                    "state": entry["state"],
+                    "detail": entry["detail"],
+                    "error": entry["error"],
+                    "phases": phases
+                }
+        ready = sum(1 for entry in components.values() if entry["state"] == READY)
+        return {
+            "ready": ready == len(components),
+            "progress": ready / len(components) if components else 1.0,
+            "uptime": now - self.started_at,
+            "components": components
+        }
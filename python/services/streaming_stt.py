@@ -0,0 +1,184 @@
+"""
+Transcription incrémentale pour le streaming (WebSocket)
+Tampon audio glissant par session, hypothèses partielles périodiques et segments
+finaux émis lorsqu'une pause est détectée.
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingTranscriber:
+    """
+    Session de transcription en flux
+
+    - Toutes les `partial_interval_ms` de nouvel audio, le tampon courant est décodé
+      (glouton) et une hypothèse partielle est émise. Le préfixe identique entre deux
+      hypothèses consécutives est signalé comme stable.
+    - Lorsqu'un silence de `min_silence_ms` suit de la parole (ou que le tampon atteint
+      `max_segment_s`), le tampon est décodé en beam search, émis comme segment final
+      puis vidé.
+    """
+
+    def __init__(
+        self,
+        window_decoder: Callable[..., Dict],
+        sample_rate: int = 16000,
+        partial_interval_ms: int = 500,
+        min_silence_ms: int = 600,
+        max_segment_s: float = 25.0,
+        final_beam_size: int = 5
+    ):
+        """
+        Args:
+            window_decoder: Fonction (audio, beam_size=...) -> résultat au format transcribe(),
+                typiquement SpeechToTextService.transcribe_window
+            sample_rate: Taux d'échantillonnage des signaux reçus
+            partial_interval_ms: Intervalle entre deux hypothèses partielles (ms d'audio),
+                0 = pas d'hypothèses partielles (segments finaux seulement)
+            min_silence_ms: Silence marquant la fin d'un segment
+            max_segment_s: Durée maximale d'un segment (< 30 s, fenêtre Whisper)
+            final_beam_size: Taille du beam pour le décodage final d'un segment
+        """
+        self.window_decoder = window_decoder
+        self.sample_rate = sample_rate
+        self.partial_interval = int(partial_interval_ms * sample_rate / 1000)
+        self.min_silence = int(min_silence_ms * sample_rate / 1000)
+        self.max_segment = int(max_segment_s * sample_rate)
+        self.final_beam_size = final_beam_size
+
+        self.frame_size = int(0.03 * sample_rate)  # trames de 30 ms pour la détection de pause
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # position (échantillons) du tampon dans la session
+        self._since_partial = 0
+        self._trailing_silence = 0
+        self._has_speech = False
+        self._noise_floor = 0.005  # niveau initial d'une pièce calme, ajusté au fil du flux
+        self._pending_frame = np.zeros(0, dtype=np.float32)
+        self._previous_words: List[str] = []
+        self._speech_started_at = None
+        self._first_partial_latency = None
+
+    def add_audio(self, samples: np.ndarray) -> List[Dict]:
+        """
+        Ajoute des échantillons au tampon
+
+        Returns:
+            Liste d'événements {"type": "partial" | "final", ...} à envoyer au client
+        """
+        if len(samples) == 0:
+            return []
+
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32, copy=False)])
+        self._since_partial += len(samples)
+        self._update_silence(samples)
+
+        if not self._has_speech:
+            # Ne pas décoder du silence : garder seulement la dernière seconde
+            excess = len(self._buffer) - self.sample_rate
+            if excess > 0:
+                self._buffer = self._buffer[excess:]
+                self._buffer_start += excess
+            self._since_partial = 0
+            return []
+
+        if self._trailing_silence >= self.min_silence or len(self._buffer) >= self.max_segment:
+            return [self._finalize()]
+
+        if self.partial_interval > 0 and self._since_partial >= self.partial_interval:
+            self._since_partial = 0
+            return [self._partial()]
+
+        return []
+
+    def flush(self) -> List[Dict]:
+        """Termine la session : décode ce qui reste dans le tampon"""
+        if self._has_speech and len(self._buffer) > 0:
+            return [self._finalize()]
+        return []
+
+    def _update_silence(self, samples: np.ndarray):
+        """Détection de pause par énergie sur des trames de 30 ms (plancher de bruit adaptatif)"""
+        data = np.concatenate([self._pending_frame, samples])
+        n_frames = len(data) // self.frame_size
+        self._pending_frame = data[n_frames * self.frame_size:]
+        if n_frames == 0:
+            return
+
+        frames = data[:n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+
+        for value in rms:
+            # Le plancher suit vite les baisses et lentement les hausses
+            self._noise_floor = min(value, self._noise_floor * 1.02)
+            if value > max(3.0 * self._noise_floor, 0.01):
+                if self._speech_started_at is None:
+                    self._speech_started_at = time.time()
+                self._has_speech = True
+                self._trailing_silence = 0
+            else:
+                self._trailing_silence += self.frame_size
+
+    def _partial(self) -> Dict:
+        result = self._decode(beam_size=1)
+        words = result["text"].split()
+
+        # Accord local : préfixe commun avec l'hypothèse précédente = partie stable
+        stable = 0
+        for previous, current in zip(self._previous_words, words):
+            if previous != current:
+                break
+            stable += 1
+        self._previous_words = words
+
+        # Temps entre le début de la parole et le premier mot renvoyé
+        if self._first_partial_latency is None and words:
+            self._first_partial_latency = time.time() - self._speech_started_at
+
+        return {
+            "type": "partial",
+            "text": result["text"],
+            "stable_text": " ".join(words[:stable]),
+            "start": self._buffer_start / self.sample_rate,
+            "end": (self._buffer_start + len(self._buffer)) / self.sample_rate,
+            "latency": result["latency"]
+        }
+
+    def _finalize(self) -> Dict:
+        result = self._decode(beam_size=self.final_beam_size)
+        event = {
+            "type": "final",
+            "text": result["text"],
+            "start": self._buffer_start / self.sample_rate,
+            "end": (self._buffer_start + len(self._buffer)) / self.sample_rate,
+            "latency": result["latency"]
+        }
+
+        self._buffer_start += len(self._buffer)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._since_partial = 0
+        self._trailing_silence = 0
+        self._has_speech = False
+        self._previous_words = []
+        return event
+
+    def _decode(self, beam_size: int) -> Dict:
+        try:
+            return self.window_decoder(self._buffer, beam_size=beam_size)
+        except Exception as e:
+            # Une hypothèse invalide (ex: répétitions) ne doit pas interrompre la session
+            logger.warning(f"Streaming: décodage impossible ({e})")
+            return {"text": "", "latency": 0.0}
+
+    def get_stats(self) -> Dict:
+        """Statistiques de la session"""
+        return {
+            "duration": (self._buffer_start + len(self._buffer)) / self.sample_rate,
+            "time_to_first_word": self._first_partial_latency
+        }
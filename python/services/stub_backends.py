@@ -0,0 +1,227 @@
+"""
+Backends simulés pour les tests de charge (STT_BACKEND=stub, TTS_BACKEND=stub)
+Mêmes interfaces que SpeechToTextService et TTSRegistry, sans modèle : chaque
+appel dure le temps d'inférence simulé, en attente passive ou en calcul actif.
+"""
+
+import io
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from .audio_io import DecodedAudio
+from .metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+
+def simulate_work(seconds: float, busy: bool = False):
+    """
+    Occupe l'appelant pendant `seconds`
+
+    Args:
+        busy: Calcul actif (occupe un cœur et le GIL, comme une vraie inférence)
+            au lieu d'une attente passive
+    """
+    if seconds <= 0:
+        return
+    if not busy:
+        time.sleep(seconds)
+        return
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class StubSpeechToTextService:
+    """
+    Simule SpeechToTextService : durée = latence fixe + rtf x durée de l'audio
+
+    Accepte la même configuration que le vrai service (les options sans objet
+    sont ignorées) pour être interchangeable dans l'API et le WorkerPool.
+    """
+
+    def __init__(
+        self,
+        model_size: str = "stub",
+        language: str = "pt",
+        rtf: float = 0.1,
+        base_latency: float = 0.05,
+        busy: bool = False,
+        **_options
+    ):
+        """
+        Args:
+            model_size: Nom rapporté dans les résultats
+            language: Langue rapportée dans les résultats
+            rtf: Facteur temps réel simulé (0.1 = 1 s de calcul pour 10 s d'audio)
+            base_latency: Coût fixe par appel (s)
+            busy: Calcul actif au lieu d'une attente passive (voir simulate_work)
+        """
+        self.model_size = f"stub-{model_size}"
+        self.language = language
+        self.rtf = rtf
+        self.base_latency = base_latency
+        self.busy = busy
+        self.device = "cpu"
+        self.calls = 0
+        logger.info(f"Backend STT simulé (rtf {rtf}, latence fixe {base_latency}s, actif: {busy})")
+
+    def _result(self, num_samples: int, start_time: float, task: str = "transcribe") -> Dict:
+        with stage_timer("inference"):
+            simulate_work(self.base_latency + self.rtf * num_samples / 16000, self.busy)
+        return self._build_result(num_samples, start_time, task)
+
+    def _build_result(self, num_samples: int, start_time: float, task: str = "transcribe") -> Dict:
+        """Résultat d'un extrait dont le calcul simulé est déjà fait"""
+        duration = num_samples / 16000
+        self.calls += 1
+        text = f"transcription simulée de {duration:.2f}s"
+        return {
+            "text": text,
+            "language": "en" if task == "translate" else self.language,
+            "segments": [{"id": 0, "start": 0.0, "end": duration, "text": text}],
+            "latency": time.time() - start_time,
+            "word_count": len(text.split()),
+            "model_size": self.model_size,
+            "device": self.device
+        }
+
+    def transcribe_array(self, audio: np.ndarray, task: str = "transcribe", **_options) -> Dict:
+        start_time = time.time()
+        if audio is None or len(audio) == 0:
+            raise ValueError("Audio vide")
+        return self._result(len(audio), start_time, task)
+
+    def transcribe_bytes(self, audio_bytes: bytes, format: Optional[str] = None, task: str = "transcribe",
+                         **_options) -> Dict:
+        start_time = time.time()
+        if not audio_bytes:
+            raise ValueError("Fichier audio vide")
+        decoded = DecodedAudio.from_bytes(audio_bytes, target_sr=16000, format_hint=format)
+        decoded.validate()
+        return self._result(decoded.num_samples, start_time, task)
+
+    def transcribe(self, audio_path: str, task: str = "transcribe", **_options) -> Dict:
+        with open(audio_path, "rb") as f:
+            return self.transcribe_bytes(f.read(), format=audio_path, task=task)
+
+    def transcribe_stream(self, audio_buffer: bytes, format: str = "webm") -> Dict:
+        return self.transcribe_bytes(audio_buffer, format=format)
+
+    def transcribe_window(self, audio: np.ndarray, task: str = "transcribe", beam_size: int = 1) -> Dict:
+        return self._result(len(audio), time.time(), task)
+
+    def transcribe_batch(self, audio_arrays: List[np.ndarray], task: str = "transcribe", **_options) -> List[Dict]:
+        # Un lot coûte comme son plus long extrait (décodage en parallèle)
+        start_time = time.time()
+        longest = max(len(audio) for audio in audio_arrays)
+        with stage_timer("inference"):
+            simulate_work(self.base_latency + self.rtf * longest / 16000, self.busy)
+        results = []
+        for audio in audio_arrays:
+            result = self._build_result(len(audio), start_time, task)
+            result["batch_size"] = len(audio_arrays)
+            results.append(result)
+        return results
+
+    def warm_up(self, duration: float = 2.0) -> float:
+        start = time.perf_counter()
+        self._result(int(duration * 16000), time.time())
+        return time.perf_counter() - start
+
+    def get_cache_stats(self) -> Optional[Dict]:
+        return None
+
+    def get_model_info(self) -> Dict:
+        return {
+            "model_size": self.model_size,
+            "device": self.device,
+            "language": self.language,
+            "stub": {"rtf": self.rtf, "base_latency": self.base_latency, "busy": self.busy, "calls": self.calls}
+        }
+
+
+class StubTTSRegistry:
+    """
+    Simule TTSRegistry : durée = latence fixe + coût par caractère, audio WAV
+    silencieux de la durée qu'aurait la phrase parlée
+    """
+
+    ENGINES = ("pyttsx3", "gtts")
+
+    # Débit de parole simulé (caractères par seconde d'audio)
+    CHARS_PER_SECOND = 15.0
+
+    def __init__(
+        self,
+        engine: str = "pyttsx3",
+        language: str = "fr",
+        base_latency: float = 0.05,
+        seconds_per_char: float = 0.002,
+        busy: bool = False,
+        **_options
+    ):
+        """
+        Args:
+            engine: Moteur par défaut rapporté
+            language: Langue par défaut rapportée
+            base_latency: Coût fixe par synthèse (s)
+            seconds_per_char: Coût par caractère de texte (s)
+            busy: Calcul actif au lieu d'une attente passive (voir simulate_work)
+        """
+        self.engine = engine
+        self.language = language
+        self.base_latency = base_latency
+        self.seconds_per_char = seconds_per_char
+        self.busy = busy
+        self.calls = 0
+        logger.info(f"Backend TTS simulé (latence fixe {base_latency}s, {seconds_per_char}s/caractère)")
+
+    def synthesize(
+        self,
+        text: str,
+        engine: Optional[str] = None,
+        language: Optional[str] = None,
+        voice_id: Optional[str] = None,
+        **_options
+    ) -> Tuple[bytes, Dict]:
+        engine = engine or self.engine
+        if engine not in self.ENGINES:
+            raise ValueError(f"Moteur TTS non supporté: {engine}")
+        start_time = time.time()
+        with stage_timer("tts_synthesis"):
+            simulate_work(self.base_latency + self.seconds_per_char * len(text), self.busy)
+        self.calls += 1
+
+        duration = max(0.1, len(text) / self.CHARS_PER_SECOND)
+        buffer = io.BytesIO()
+        sf.write(buffer, np.zeros(int(duration * 16000), dtype=np.int16), 16000, format="WAV", subtype="PCM_16")
+        return buffer.getvalue(), {
+            "engine": f"stub-{engine}",
+            "language": language or self.language,
+            "duration": duration,
+            "latency": time.time() - start_time,
+            "cached": False
+        }
+
+    def get_available_voices(self, engine: Optional[str] = None, language: Optional[str] = None) -> list:
+        return [{"id": "stub", "name": "Voix simulée", "languages": [language or self.language]}]
+
+    def warm_up(self, phrases: Iterable[str]) -> int:
+        return 0
+
+    def get_info(self) -> Dict:
+        return {
+            "engine": self.engine,
+            "language": self.language,
+            "stub": {
+                "base_latency": self.base_latency,
+                "seconds_per_char": self.seconds_per_char,
+                "busy": self.busy,
+                "calls": self.calls
+            }
+        }
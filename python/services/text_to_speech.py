@@ -5,29 +5,40 @@ Service Text-to-Speech avec support de plusieurs moteurs
 - Coqui TTS (optionnel, voix haute qualité)
 """
 
-import pyttsx3
-from gtts import gTTS
 import io
 import os
 import logging
 import time
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Iterable, Tuple
 import tempfile
 
+from .audio_container import audio_duration
+from .metrics import stage_timer
+from .tts_cache import AudioCache
+
 logger = logging.getLogger(__name__)
 
+# Fichiers de travail de pyttsx3 : /dev/shm (RAM) quand il existe, pas d'E/S disque
+SCRATCH_DIR = "/dev/shm" if os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+
 
 class TextToSpeechService:
     """Service de synthèse vocale"""
     
+    DEFAULT_RATE = 150
+    DEFAULT_VOLUME = 1.0
+    
     def __init__(
         self,
         engine: str = "pyttsx3",
         language: str = "fr",
         voice_id: Optional[str] = None,
-        rate: int = 150,
-        volume: float = 1.0
+        rate: int = DEFAULT_RATE,
+        volume: float = DEFAULT_VOLUME,
+        cache_size: int = 0,
+        cache_dir: Optional[str] = None,
+        cache: Optional[AudioCache] = None
     ):
         """
         Args:
@@ -36,12 +47,25 @@ class TextToSpeechService:
             voice_id: ID de la voix (pour pyttsx3)
             rate: Vitesse de parole (mots/min)
             volume: Volume (0.0 à 1.0)
+            cache_size: Nombre de synthèses gardées en mémoire (0 = pas de cache mémoire)
+            cache_dir: Dossier du cache disque des synthèses (optionnel)
+            cache: Cache partagé avec d'autres services (prioritaire sur cache_size/cache_dir)
         """
         self.engine_name = engine
         self.language = language
         self.rate = rate
         self.volume = volume
         self.voice_id = voice_id
+        # Voix retenue pour la langue quand voice_id n'est pas fourni (pyttsx3)
+        self.default_voice: Optional[str] = None
+        
+        # Cache des synthèses, indexé par le texte + paramètres de synthèse
+        if cache is not None:
+            self.cache = cache
+        elif cache_size > 0 or cache_dir:
+            self.cache = AudioCache(max_entries=cache_size, disk_dir=cache_dir, name="tts")
+        else:
+            self.cache = None
         
         # Initialiser le moteur
         if engine == "pyttsx3":
@@ -54,6 +78,8 @@ class TextToSpeechService:
     def _init_pyttsx3(self):
         """Initialise pyttsx3 (offline)"""
         try:
+            # Import à l'initialisation du moteur : charger l'API ne charge pas les moteurs
+            import pyttsx3
             self.engine = pyttsx3.init()
             
             # Configurer la vitesse
@@ -81,6 +107,7 @@ class TextToSpeechService:
                     target_voice = self.voice_id
                 
                 if target_voice:
+                    self.default_voice = target_voice
                     self.engine.setProperty('voice', target_voice)
                     logger.info(f"Voix sélectionnée: {target_voice}")
             
@@ -99,30 +126,123 @@ class TextToSpeechService:
         self,
         text: str,
         output_path: Optional[str] = None,
-        slow: bool = False
+        slow: bool = False,
+        voice_id: Optional[str] = None,
+        rate: Optional[int] = None,
+        volume: Optional[float] = None
     ) -> Tuple[bytes, Dict]:
         """
         Synthétise le texte en audio
         
+        Voix, vitesse et volume peuvent être fournis pour cet appel seulement :
+        ils sont appliqués au moteur le temps de la synthèse puis restaurés, sans
+        modifier la configuration du service.
+        
         Args:
             text: Texte à synthétiser
             output_path: Chemin de sortie (optionnel)
             slow: Parler lentement (pour gTTS)
+            voice_id: Voix pour cet appel (pyttsx3)
+            rate: Vitesse pour cet appel (mots/min)
+            volume: Volume pour cet appel (0.0 à 1.0)
         
         Returns:
             Tuple (audio_bytes, metadata)
         """
+        if voice_id is None and rate is None and volume is None:
+            return self._synthesize_cached(text, output_path, slow)
+        
+        saved = (self.voice_id, self.rate, self.volume)
+        try:
+            self._apply_settings(
+                voice_id if voice_id is not None else self.voice_id,
+                rate if rate is not None else self.rate,
+                volume if volume is not None else self.volume
+            )
+            return self._synthesize_cached(text, output_path, slow)
+        finally:
+            self._apply_settings(*saved)
+    
+    def _apply_settings(self, voice_id: Optional[str], rate: int, volume: float):
+        """Applique voix, vitesse et volume au service (reportés sur le moteur à chaque synthèse)"""
+        self.voice_id = voice_id
+        self.rate = rate
+        self.volume = volume
+    
+    def _synthesize_cached(
+        self,
+        text: str,
+        output_path: Optional[str],
+        slow: bool
+    ) -> Tuple[bytes, Dict]:
+        """Synthèse avec les paramètres courants, servie depuis le cache si possible"""
         start_time = time.time()
         
         if not text or not text.strip():
             raise ValueError("Texte vide")
         
-        if self.engine_name == "pyttsx3":
-            return self._synthesize_pyttsx3(text, output_path)
-        elif self.engine_name == "gtts":
-            return self._synthesize_gtts(text, output_path, slow)
-        else:
-            raise ValueError(f"Moteur {self.engine_name} non implémenté")
+        cache_key = self.cache_key(text, slow) if self.cache is not None else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                audio_bytes, metadata = cached
+                logger.info(f"✅ Synthèse servie depuis le cache ({cache_key[:16]}...)")
+                if output_path:
+                    Path(output_path).write_bytes(audio_bytes)
+                return audio_bytes, {**metadata, "latency": time.time() - start_time, "cached": True}
+        
+        with stage_timer("tts_synthesis"):
+            if self.engine_name == "pyttsx3":
+                audio_bytes, metadata = self._synthesize_pyttsx3(text, output_path)
+            elif self.engine_name == "gtts":
+                audio_bytes, metadata = self._synthesize_gtts(text, output_path, slow)
+            else:
+                raise ValueError(f"Moteur {self.engine_name} non implémenté")
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, (audio_bytes, metadata))
+        return audio_bytes, metadata
+    
+    def cache_key(
+        self,
+        text: str,
+        slow: bool = False,
+        voice_id: Optional[str] = None,
+        rate: Optional[int] = None,
+        volume: Optional[float] = None
+    ) -> str:
+        """Clé de cache (et ETag) d'une synthèse, avec les mêmes surcharges que synthesize()"""
+        return AudioCache.synthesis_key(
+            text,
+            self.engine_name,
+            self.language,
+            voice_id if voice_id is not None else self.voice_id,
+            rate if rate is not None else self.rate,
+            volume if volume is not None else self.volume,
+            slow
+        )
+    
+    def warm_up(self, phrases: Iterable[str]) -> int:
+        """
+        Pré-remplit le cache avec des phrases fréquentes
+        
+        Returns:
+            Nombre de phrases synthétisées (hors phrases déjà en cache)
+        """
+        if self.cache is None:
+            return 0
+        synthesized = 0
+        for phrase in phrases:
+            phrase = phrase.strip()
+            if not phrase or self.cache_key(phrase) in self.cache:
+                continue
+            try:
+                self.synthesize(phrase)
+                synthesized += 1
+            except Exception as e:
+                logger.warning(f"Pré-chauffage TTS: échec pour '{phrase[:40]}': {e}")
+        logger.debug(f"Cache TTS pré-chauffé: {synthesized} phrases synthétisées")
+        return synthesized
     
     def _synthesize_pyttsx3(
         self,
@@ -131,50 +251,55 @@ class TextToSpeechService:
     ) -> Tuple[bytes, Dict]:
         """Synthèse avec pyttsx3"""
         start_time = time.time()
+        scratch_path = None
         try:
-            # Créer un fichier temporaire si nécessaire
+            # pyttsx3 n'écrit que dans un fichier : fichier de travail en RAM si possible
             if not output_path:
-                temp_file = tempfile.NamedTemporaryFile(
-                    suffix='.wav',
-                    delete=False
-                )
-                output_path = temp_file.name
-                temp_file.close()
+                fd, scratch_path = tempfile.mkstemp(suffix='.wav', dir=SCRATCH_DIR)
+                os.close(fd)
+            
+            # pyttsx3.init() renvoie le même moteur à tous les services (un par pilote) :
+            # voix, vitesse et volume de ce service sont réappliqués avant chaque synthèse
+            self._configure_engine()
             
             # Sauvegarder dans un fichier
-            self.engine.save_to_file(text, output_path)
+            self.engine.save_to_file(text, output_path or scratch_path)
             self.engine.runAndWait()
             
             # Lire le fichier généré
-            with open(output_path, 'rb') as f:
+            with open(output_path or scratch_path, 'rb') as f:
                 audio_bytes = f.read()
             
-            # Calculer la durée (approximative)
-            duration = len(audio_bytes) / 16000 / 2  # Approximation pour WAV 16kHz
-            
             latency = time.time() - start_time
             
             metadata = {
                 "engine": "pyttsx3",
                 "language": self.language,
-                "duration": duration,
+                "duration": audio_duration(audio_bytes),
                 "latency": latency,
                 "text_length": len(text),
                 "word_count": len(text.split())
             }
             
-            # Nettoyer le fichier temporaire si créé
-            if not output_path or output_path.startswith(tempfile.gettempdir()):
-                try:
-                    os.remove(output_path)
-                except:
-                    pass
-            
             return audio_bytes, metadata
             
         except Exception as e:
             logger.error(f"Erreur lors de la synthèse pyttsx3: {e}")
             raise
+        finally:
+            if scratch_path:
+                try:
+                    os.remove(scratch_path)
+                except OSError:
+                    pass
+    
+    def _configure_engine(self):
+        """Reporte voix, vitesse et volume du service sur le moteur pyttsx3"""
+        voice = self.voice_id or self.default_voice
+        if voice:
+            self.engine.setProperty('voice', voice)
+        self.engine.setProperty('rate', self.rate)
+        self.engine.setProperty('volume', self.volume)
     
     def _synthesize_gtts(
         self,
@@ -185,44 +310,28 @@ class TextToSpeechService:
         """Synthèse avec gTTS"""
         start_time = time.time()
         try:
-            # Créer un fichier temporaire si nécessaire
-            if not output_path:
-                temp_file = tempfile.NamedTemporaryFile(
-                    suffix='.mp3',
-                    delete=False
-                )
-                output_path = temp_file.name
-                temp_file.close()
+            from gtts import gTTS
             
-            # Générer la synthèse
+            # Générer la synthèse directement en mémoire
             tts = gTTS(text=text, lang=self.language, slow=slow)
-            tts.save(output_path)
+            buffer = io.BytesIO()
+            tts.write_to_fp(buffer)
+            audio_bytes = buffer.getvalue()
             
-            # Lire le fichier
-            with open(output_path, 'rb') as f:
-                audio_bytes = f.read()
-            
-            # Calculer la durée (approximation)
-            duration = len(audio_bytes) / 16000 / 2  # Approximation
+            if output_path:
+                Path(output_path).write_bytes(audio_bytes)
             
             latency = time.time() - start_time
             
             metadata = {
                 "engine": "gTTS",
                 "language": self.language,
-                "duration": duration,
+                "duration": audio_duration(audio_bytes),
                 "latency": latency,
                 "text_length": len(text),
                 "word_count": len(text.split())
             }
             
-            # Nettoyer le fichier temporaire
-            if output_path.startswith(tempfile.gettempdir()):
-                try:
-                    os.remove(output_path)
-                except:
-                    pass
-            
             return audio_bytes, metadata
             
         except Exception as e:
@@ -277,6 +386,7 @@ class TextToSpeechService:
             "language": self.language,
             "rate": self.rate,
             "volume": self.volume,
-            "voice_id": self.voice_id
+            "voice_id": self.voice_id,
+            "cache": self.cache.get_stats() if self.cache is not None else None
         }
 
@@ -0,0 +1,182 @@
+"""
+Traduction de texte pour le pipeline parole -> parole
+Backends interchangeables : Gemini (API REST de Google) ou traduction hors ligne
+de démonstration (mêmes phrases que la simulation du serveur Node).
+"""
+
+import json
+import logging
+import os
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_NAMES = {
+    "fr": "français",
+    "en": "anglais",
+    "es": "espagnol",
+    "de": "allemand",
+    "it": "italien",
+    "pt": "portugais"
+}
+
+
+class Translator(ABC):
+    """Interface d'un backend de traduction"""
+
+    name = "base"
+
+    @abstractmethod
+    def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
+        """
+        Traduit un texte
+
+        Args:
+            text: Texte à traduire
+            target_language: Code langue cible (ex: "fr")
+            source_language: Code langue source (None = inconnue)
+
+        Returns:
+            Texte traduit
+        """
+
+    def get_info(self) -> Dict:
+        """Retourne les informations sur le backend"""
+        return {"backend": self.name}
+
+
+class OfflineTranslator(Translator):
+    """
+    Traduction hors ligne pour les tests et la démo
+
+    Les phrases connues (portugais) sont traduites, les autres sont rendues telles
+    quelles : le pipeline reste utilisable sans réseau ni clé d'API.
+    """
+
+    name = "offline"
+
+    PHRASES = {
+        "fr": {
+            "Olá, como você está?": "Bonjour, comment allez-vous ?",
+            "Bom dia, tudo bem?": "Bonjour, tout va bien ?",
+            "Obrigado pela sua ajuda": "Merci pour votre aide",
+            "Por favor, pode me ajudar?": "S'il vous plaît, pouvez-vous m'aider ?",
+            "Eu gosto muito deste aplicativo": "J'aime beaucoup cette application"
+        },
+        "en": {
+            "Olá, como você está?": "Hello, how are you?",
+            "Bom dia, tudo bem?": "Good morning, is everything okay?",
+            "Obrigado pela sua ajuda": "Thank you for your help",
+            "Por favor, pode me ajudar?": "Please, can you help me?",
+            "Eu gosto muito deste aplicativo": "I really like this application"
+        },
+        "es": {
+            "Olá, como você está?": "Hola, ¿cómo estás?",
+            "Bom dia, tudo bem?": "Buenos días, ¿todo bien?",
+            "Obrigado pela sua ajuda": "Gracias por tu ayuda",
+            "Por favor, pode me ajudar?": "Por favor, ¿puedes ayudarme?",
+            "Eu gosto muito deste aplicativo": "Me gusta mucho esta aplicación"
+        },
+        "de": {
+            "Olá, como você está?": "Hallo, wie geht es dir?",
+            "Bom dia, tudo bem?": "Guten Morgen, alles gut?",
+            "Obrigado pela sua ajuda": "Danke für deine Hilfe",
+            "Por favor, pode me ajudar?": "Bitte, kannst du mir helfen?",
+            "Eu gosto muito deste aplicativo": "Ich mag diese Anwendung sehr"
+        },
+        "it": {
+            "Olá, como você está?": "Ciao, come stai?",
+            "Bom dia, tudo bem?": "Buongiorno, tutto bene?",
+            "Obrigado pela sua ajuda": "Grazie per il tuo aiuto",
+            "Por favor, pode me ajudar?": "Per favore, puoi aiutarmi?",
+            "Eu gosto muito deste aplicativo": "Mi piace molto questa applicazione"
+        }
+    }
+
+    def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
+        phrases = self.PHRASES.get(target_language, {})
+        return phrases.get(text.strip(), text)
+
+
+class GeminiTranslator(Translator):
+    """Traduction avec l'API Gemini (REST, sans SDK)"""
+
+    name = "gemini"
+
+    ENDPOINT = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}"
+
+    def __init__(self, api_key: str, model: str = "gemini-2.0-flash", timeout: float = 10.0):
+        """
+        Args:
+            api_key: Clé d'API Gemini
+            model: Modèle Gemini
+            timeout: Délai maximal d'un appel (s)
+        """
+        if not api_key:
+            raise ValueError("Clé d'API Gemini manquante")
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+
+    def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
+        source = LANGUAGE_NAMES.get(source_language, source_language or "la langue d'origine")
+        target = LANGUAGE_NAMES.get(target_language, target_language)
+        prompt = (
+            f"Traduis le texte suivant du {source} vers le {target}.\n"
+            f"Réponds UNIQUEMENT avec la traduction, sans commentaires ni explications.\n\n"
+            f'Texte à traduire: "{text}"\n\nTraduction:'
+        )
+
+        request = urllib.request.Request(
+            self.ENDPOINT.format(model=self.model, key=self.api_key),
+            data=json.dumps({"contents": [{"parts": [{"text": prompt}]}]}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+
+        translated = payload["candidates"][0]["content"]["parts"][0]["text"].strip()
+        # Nettoyer la réponse si elle contient des guillemets ou un préfixe
+        if translated[:1] in ("\"", "'"):
+            translated = translated[1:]
+        if translated[-1:] in ("\"", "'"):
+            translated = translated[:-1]
+        if translated.lower().startswith("traduction:"):
+            translated = translated[len("traduction:"):]
+        return translated.strip()
+
+    def get_info(self) -> Dict:
+        return {"backend": self.name, "model": self.model}
+
+
+TRANSLATORS = {
+    OfflineTranslator.name: OfflineTranslator,
+    GeminiTranslator.name: GeminiTranslator
+}
+
+
+def create_translator(backend: Optional[str] = None) -> Optional[Translator]:
+    """
+    Crée le backend de traduction configuré
+
+    Args:
+        backend: "gemini" ou "offline" (défaut : gemini si GEMINI_API_KEY est définie)
+
+    Returns:
+        Le backend, ou None (traduction désactivée) si gemini est choisi sans clé d'API
+    """
+    backend = backend or ("gemini" if os.getenv("GEMINI_API_KEY") else "offline")
+    if backend not in TRANSLATORS:
+        raise ValueError(f"Backend de traduction inconnu: {backend} (attendu: {', '.join(TRANSLATORS)})")
+    if backend == GeminiTranslator.name:
+        if not os.getenv("GEMINI_API_KEY"):
+            logger.error("Traduction désactivée: TRANSLATION_BACKEND=gemini mais GEMINI_API_KEY n'est pas définie")
+            return None
+        return GeminiTranslator(
+            api_key=os.getenv("GEMINI_API_KEY", ""),
+            model=os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+        )
+    return TRANSLATORS[backend]()
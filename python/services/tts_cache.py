@@ -0,0 +1,44 @@
+"""
+Cache des synthèses vocales
+Audio + métadonnées indexés par le texte et les paramètres de synthèse
+(moteur, langue, voix, vitesse, volume).
+"""
+
+import json
+import struct
+from typing import Dict, Optional, Tuple
+
+from .result_cache import ResultCache
+
+
+class AudioCache(ResultCache):
+    """
+    ResultCache pour des valeurs (audio_bytes, metadata)
+
+    Sur disque : longueur de l'en-tête (4 octets), métadonnées JSON, puis l'audio brut.
+    """
+
+    file_suffix = ".audio"
+
+    @staticmethod
+    def synthesis_key(
+        text: str,
+        engine: str,
+        language: str,
+        voice_id: Optional[str],
+        rate: int,
+        volume: float,
+        slow: bool = False
+    ) -> str:
+        """Clé d'une synthèse (sert aussi d'ETag HTTP)"""
+        return ResultCache.make_key("tts", text, engine, language, voice_id, rate, float(volume), slow)
+
+    def _serialize(self, value: Tuple[bytes, Dict]) -> bytes:
+        audio_bytes, metadata = value
+        header = json.dumps(metadata).encode("utf-8")
+        return struct.pack(">I", len(header)) + header + audio_bytes
+
+    def _deserialize(self, data: bytes) -> Tuple[bytes, Dict]:
+        (header_length,) = struct.unpack(">I", data[:4])
+        metadata = json.loads(data[4:4 + header_length].decode("utf-8"))
+        return data[4 + header_length:], metadata
@@ -0,0 +1,205 @@
+"""
+Registre des moteurs TTS
+Un TextToSpeechService par (moteur, langue, voix), créé une seule fois (au démarrage
+pour les combinaisons configurées) puis réutilisé pendant toute la vie du processus.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .text_to_speech import TextToSpeechService
+from .tts_cache import AudioCache
+
+logger = logging.getLogger(__name__)
+
+
+class EngineKey(NamedTuple):
+    """Identifie un moteur du registre"""
+    engine: str
+    language: str
+    voice_id: Optional[str] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "EngineKey":
+        """Lit une spécification "moteur:langue[:voix]" (ex: "gtts:en")"""
+        parts = [part.strip() for part in spec.split(":", 2)]
+        if len(parts) < 2 or not parts[0] or not parts[1]:
+            raise ValueError(f"Spécification de moteur TTS invalide: '{spec}' (attendu moteur:langue[:voix])")
+        return cls(parts[0], parts[1], parts[2] if len(parts) > 2 and parts[2] else None)
+
+
+class TTSRegistry:
+    """
+    Services TTS pré-initialisés, indexés par (moteur, langue, voix)
+
+    Expose la même interface que TextToSpeechService (synthesize,
+    get_available_voices, warm_up, get_info) avec en plus le choix du moteur, de la
+    langue et de la voix : il peut donc être instancié tel quel dans chaque worker
+    d'un WorkerPool. Tous les services partagent un même cache de synthèses.
+    Les combinaisons non préchargées sont créées à la première demande ; au-delà de
+    `max_services`, la moins récemment utilisée (hors préchargées) est libérée.
+    """
+
+    ENGINES = ("pyttsx3", "gtts")
+
+    def __init__(
+        self,
+        engine: str = "pyttsx3",
+        language: str = "fr",
+        preload: Optional[Iterable[str]] = None,
+        max_services: int = 8,
+        cache_size: int = 0,
+        cache_dir: Optional[str] = None
+    ):
+        """
+        Args:
+            engine: Moteur par défaut
+            language: Langue par défaut
+            preload: Combinaisons "moteur:langue[:voix]" à initialiser dès maintenant
+            max_services: Nombre maximal de services gardés en mémoire
+            cache_size: Nombre de synthèses gardées en mémoire (0 = pas de cache mémoire)
+            cache_dir: Dossier du cache disque des synthèses (optionnel)
+        """
+        self.default_key = EngineKey(engine, language)
+        self.max_services = max(1, max_services)
+
+        if cache_size > 0 or cache_dir:
+            self.cache = AudioCache(max_entries=cache_size, disk_dir=cache_dir, name="tts")
+        else:
+            self.cache = None
+
+        self._services: "OrderedDict[EngineKey, TextToSpeechService]" = OrderedDict()
+        # Un verrou par service : un moteur ne synthétise qu'un texte à la fois. Les
+        # services pyttsx3 partagent un seul moteur (pyttsx3.init() le met en cache
+        # par pilote), donc un seul verrou
+        self._service_locks: Dict[EngineKey, threading.Lock] = {}
+        self._pyttsx3_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._evictions = 0
+
+        self._pinned = {self.default_key}
+        self._pinned.update(EngineKey.parse(spec) for spec in (preload or []) if spec.strip())
+        for key in self._pinned:
+            self._get(key)
+        logger.info(f"Registre TTS: {len(self._services)} moteurs préchargés")
+
+    def resolve(
+        self,
+        engine: Optional[str] = None,
+        language: Optional[str] = None,
+        voice_id: Optional[str] = None
+    ) -> EngineKey:
+        """Complète une demande avec le moteur et la langue par défaut"""
+        engine = engine or self.default_key.engine
+        if engine not in self.ENGINES:
+            raise ValueError(f"Moteur TTS non supporté: {engine}")
+        return EngineKey(engine, language or self.default_key.language, voice_id or None)
+
+    def _get(self, key: EngineKey) -> Tuple[TextToSpeechService, threading.Lock]:
+        """Service et verrou associés à la clé, créés si nécessaire"""
+        with self._lock:
+            service = self._services.get(key)
+            if service is not None:
+                self._services.move_to_end(key)
+                return service, self._service_locks[key]
+
+        # Initialisation (scan des voix pyttsx3...) hors du verrou du registre
+        service = TextToSpeechService(
+            engine=key.engine,
+            language=key.language,
+            voice_id=key.voice_id,
+            cache=self.cache
+        )
+
+        with self._lock:
+            if key in self._services:
+                # Créé entre-temps par un autre thread
+                return self._services[key], self._service_locks[key]
+            lock = self._pyttsx3_lock if key.engine == "pyttsx3" else threading.Lock()
+            self._services[key] = service
+            self._service_locks[key] = lock
+            self._created += 1
+            logger.info(f"Moteur TTS initialisé: {key.engine}/{key.language}/{key.voice_id or 'défaut'}")
+            self._evict()
+            return service, lock
+
+    def _evict(self):
+        """Libère les services non préchargés les moins récemment utilisés (verrou tenu)"""
+        for key in list(self._services):
+            if len(self._services) <= self.max_services:
+                return
+            if key in self._pinned:
+                continue
+            del self._services[key]
+            del self._service_locks[key]
+            self._evictions += 1
+
+    def get(
+        self,
+        engine: Optional[str] = None,
+        language: Optional[str] = None,
+        voice_id: Optional[str] = None
+    ) -> TextToSpeechService:
+        """Service TTS pour cette combinaison (créé une seule fois)"""
+        service, _ = self._get(self.resolve(engine, language, voice_id))
+        return service
+
+    def synthesize(
+        self,
+        text: str,
+        engine: Optional[str] = None,
+        language: Optional[str] = None,
+        voice_id: Optional[str] = None,
+        **options
+    ) -> Tuple[bytes, Dict]:
+        """
+        Synthétise avec le service de cette combinaison
+
+        Args:
+            text: Texte à synthétiser
+            engine, language, voice_id: Combinaison (défaut : moteur et langue du registre)
+            **options: Options de TextToSpeechService.synthesize (slow, rate, volume...)
+        """
+        service, lock = self._get(self.resolve(engine, language, voice_id))
+        with lock:
+            return service.synthesize(text, **options)
+
+    def get_available_voices(self, engine: Optional[str] = None, language: Optional[str] = None) -> list:
+        """Voix disponibles pour ce moteur et cette langue"""
+        service, lock = self._get(self.resolve(engine, language))
+        with lock:
+            return service.get_available_voices()
+
+    def warm_up(self, phrases: Iterable[str]) -> int:
+        """Pré-remplit le cache partagé avec le moteur par défaut (voir TextToSpeechService.warm_up)"""
+        service, lock = self._get(self.default_key)
+        with lock:
+            return service.warm_up(phrases)
+
+    def engines(self) -> List[Dict]:
+        """Combinaisons actuellement initialisées"""
+        with self._lock:
+            return [
+                {**key._asdict(), "preloaded": key in self._pinned}
+                for key in self._services
+            ]
+
+    def get_info(self) -> Dict:
+        """Retourne les informations sur le registre"""
+        with self._lock:
+            created = self._created
+            evictions = self._evictions
+        return {
+            "engine": self.default_key.engine,
+            "language": self.default_key.language,
+            "rate": TextToSpeechService.DEFAULT_RATE,
+            "volume": TextToSpeechService.DEFAULT_VOLUME,
+            "engines": self.engines(),
+            "max_services": self.max_services,
+            "created": created,
+            "evictions": evictions,
+            "cache": self.cache.get_stats() if self.cache is not None else None
+        }
@@ -0,0 +1,133 @@
+"""
+Synthèse vocale en flux, phrase par phrase
+Le texte est découpé en phrases synthétisées en pipeline : l'audio de chaque phrase
+est envoyé dès qu'elle est prête, le premier son ne dépend que de la première phrase.
+"""
+
+import asyncio
+import logging
+import re
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .audio_container import parse_wav, strip_id3, wav_stream_header
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…;])\s+|\s*\n+\s*")
+_CLAUSE_END = re.compile(r"(?<=[,:])\s+")
+
+
+def split_sentences(text: str, max_chars: int = 250) -> List[str]:
+    """
+    Découpe un texte en phrases
+
+    Une phrase plus longue que max_chars est coupée aux virgules, puis aux espaces.
+
+    Returns:
+        Phrases non vides, dans l'ordre du texte
+    """
+    sentences = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            sentences.append(sentence)
+            continue
+        for clause in _CLAUSE_END.split(sentence):
+            sentences.extend(_wrap(clause, max_chars))
+    return sentences
+
+
+def _wrap(text: str, max_chars: int) -> List[str]:
+    """Coupe aux espaces en morceaux d'au plus max_chars (un mot plus long reste entier)"""
+    pieces = []
+    current = ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+class AudioStreamAssembler:
+    """
+    Assemble l'audio de phrases successives en un seul flux lisible
+
+    WAV : l'en-tête de la première phrase est émis une seule fois (longueur inconnue),
+    puis uniquement les échantillons PCM de chaque phrase.
+    MP3 : les trames se concatènent ; les balises ID3 des phrases suivantes sont retirées.
+    """
+
+    def __init__(self):
+        self._wav_format: Optional[bytes] = None
+        self._started = False
+
+    def feed(self, audio_bytes: bytes) -> bytes:
+        """Retourne les octets à envoyer pour l'audio d'une phrase"""
+        if audio_bytes[:4] == b"RIFF":
+            info = parse_wav(audio_bytes)
+            pcm = audio_bytes[info.data_offset:info.data_offset + info.data_size]
+            if self._wav_format is None:
+                self._wav_format = info.fmt
+                self._started = True
+                return wav_stream_header(info.fmt) + pcm
+            if info.fmt != self._wav_format:
+                raise ValueError("Format WAV différent entre deux phrases")
+            return pcm
+
+        if not self._started:
+            self._started = True
+            return audio_bytes
+        return strip_id3(audio_bytes)
+
+
+async def synthesize_pipelined(
+    sentences: List[str],
+    synthesize: Callable[[str, int], Awaitable[Tuple[bytes, Dict]]],
+    lookahead: int = 2
+) -> AsyncIterator[Tuple[bytes, Dict]]:
+    """
+    Synthétise des phrases en pipeline et les rend dans l'ordre
+
+    Jusqu'à `lookahead` phrases sont en cours de synthèse pendant que les
+    précédentes sont envoyées ; avec plusieurs workers elles sont synthétisées
+    en parallèle.
+
+    Args:
+        sentences: Phrases à synthétiser
+        synthesize: Coroutine (phrase, index) -> (audio_bytes, metadata)
+        lookahead: Nombre maximal de phrases en cours de synthèse
+
+    Yields:
+        (audio_bytes, metadata) de chaque phrase, dans l'ordre
+    """
+    lookahead = max(1, lookahead)
+    remaining = iter(enumerate(sentences))
+    tasks: deque = deque()
+
+    def schedule():
+        while len(tasks) < lookahead:
+            item = next(remaining, None)
+            if item is None:
+                return
+            index, sentence = item
+            tasks.append(asyncio.ensure_future(synthesize(sentence, index)))
+
+    try:
+        schedule()
+        while tasks:
+            result = await tasks[0]
+            tasks.popleft()
+            # Lancer la phrase suivante avant de rendre la main à l'envoi
+            schedule()
+            yield result
+    finally:
+        # Client déconnecté ou erreur : abandonner les phrases non envoyées
+        for task in tasks:
+            task.cancel()
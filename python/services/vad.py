@@ -0,0 +1,216 @@
+"""
+Détection d'activité vocale (VAD) vectorisée
+Toutes les trames sont classées en une seule passe NumPy (énergie + caractéristiques
+spectrales dérivées de la STFT du front-end partagé), puis lissées par hangover.
+Le résultat est une liste de segments avec leurs positions dans l'audio original.
+"""
+
+import logging
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .spectral_frontend import SpectralFrontend, Spectrogram
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechSegment(NamedTuple):
+    """Segment de parole, en échantillons dans l'audio original ([start, end[)"""
+    start: int
+    end: int
+
+
+class SpeechTimeline:
+    """
+    Correspondance entre l'audio réduit aux segments de parole et l'audio original
+
+    Permet de supprimer les silences avant Whisper puis de reporter les timestamps
+    obtenus sur la chronologie d'origine.
+    """
+
+    def __init__(self, segments: List[SpeechSegment], sample_rate: int):
+        self.segments = list(segments)
+        self.sample_rate = sample_rate
+        lengths = np.array([end - start for start, end in self.segments], dtype=np.int64)
+        self._trimmed_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(lengths) else lengths
+        self._original_starts = np.array([start for start, _ in self.segments], dtype=np.int64)
+
+    def trim(self, audio: np.ndarray) -> np.ndarray:
+        """Concatène les segments de parole"""
+        if not self.segments:
+            return audio[:0]
+        return np.concatenate([audio[start:end] for start, end in self.segments])
+
+    def to_original(self, t):
+        """
+        Convertit un ou plusieurs instants (s) de l'audio réduit en instants de l'audio original
+        """
+        if not self.segments:
+            return t
+        samples = np.asarray(t, dtype=np.float64) * self.sample_rate
+        index = np.clip(np.searchsorted(self._trimmed_starts, samples, side="right") - 1, 0, None)
+        original = self._original_starts[index] + (samples - self._trimmed_starts[index])
+        result = original / self.sample_rate
+        return float(result) if np.ndim(result) == 0 else result
+
+
+class VADEngine:
+    """
+    VAD par énergie et caractéristiques spectrales
+
+    Une trame est considérée comme de la parole si son énergie dépasse le plancher de
+    bruit estimé d'au moins `snr_db`, si l'essentiel de son énergie se situe dans la bande
+    vocale (100-4000 Hz, fondamentale comprise) et si son spectre n'est pas plat (bruit blanc). Le masque obtenu
+    est lissé : hangover après chaque trame de parole, suppression des salves trop
+    courtes et fusion des segments séparés par de courts silences.
+    """
+
+    def __init__(
+        self,
+        snr_db: float = 12.0,
+        dynamic_range_db: float = 30.0,
+        min_energy_db: float = -55.0,
+        min_band_ratio: float = 0.35,
+        max_flatness: float = 0.45,
+        hangover_ms: float = 200.0,
+        min_speech_ms: float = 90.0,
+        min_silence_ms: float = 300.0
+    ):
+        """
+        Args:
+            snr_db: Écart minimal au plancher de bruit (dB)
+            dynamic_range_db: Écart maximal entre le plancher de bruit et les trames les plus fortes (dB)
+            min_energy_db: Énergie minimale absolue d'une trame de parole (dBFS)
+            min_band_ratio: Part minimale de l'énergie dans la bande vocale
+            max_flatness: Planéité spectrale maximale (0 = tonal, 1 = bruit blanc)
+            hangover_ms: Maintien de l'état parole après la dernière trame détectée
+            min_speech_ms: Durée minimale d'un segment de parole
+            min_silence_ms: Silence minimal séparant deux segments
+        """
+        self.snr_db = snr_db
+        self.dynamic_range_db = dynamic_range_db
+        self.min_energy_db = min_energy_db
+        self.min_band_ratio = min_band_ratio
+        self.max_flatness = max_flatness
+        self.hangover_ms = hangover_ms
+        self.min_speech_ms = min_speech_ms
+        self.min_silence_ms = min_silence_ms
+
+    def _spectrogram(self, audio: np.ndarray, sr: int, spectrogram: Optional[Spectrogram]) -> Spectrogram:
+        # Trames de 25 ms, pas de 10 ms (paramètres de Whisper)
+        if spectrogram is not None:
+            return spectrogram
+        return SpectralFrontend.get(sr).analyze(audio)
+
+    def frame_features(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        spectrogram: Optional[Spectrogram] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calcule les caractéristiques de toutes les trames en une passe
+
+        Args:
+            spectrogram: STFT déjà calculée de `audio` (évite de la recalculer)
+
+        Returns:
+            Tuple (energy_db, band_ratio, flatness), un élément par trame
+        """
+        spec = self._spectrogram(audio, sr, spectrogram)
+        energy_db = 10.0 * np.log10(spec.frame_energy() + 1e-10)
+        return energy_db, spec.band_ratio(100, 4000), spec.flatness()
+
+    def speech_mask(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        spectrogram: Optional[Spectrogram] = None
+    ) -> np.ndarray:
+        """Masque booléen parole/non-parole par trame (après lissage)"""
+        spec = self._spectrogram(audio, sr, spectrogram)
+        energy_db, band_ratio, flatness = self.frame_features(audio, sr, spec)
+        if len(energy_db) == 0:
+            return np.zeros(0, dtype=bool)
+
+        # Plancher de bruit : 10e percentile, plafonné sous le niveau de la parole
+        # pour les enregistrements qui ne contiennent presque pas de silence
+        low, high = np.percentile(energy_db, [10, 99])
+        noise_floor = min(low, high - self.dynamic_range_db)
+        raw = (
+            (energy_db > noise_floor + self.snr_db)
+            & (energy_db > self.min_energy_db)
+            & (band_ratio > self.min_band_ratio)
+            & (flatness < self.max_flatness)
+        )
+        return self._smooth(raw, 1000.0 * spec.frontend.hop_length / spec.frontend.sample_rate)
+
+    def _smooth(self, mask: np.ndarray, hop_ms: float) -> np.ndarray:
+        hangover = max(0, int(round(self.hangover_ms / hop_ms)))
+        min_speech = max(1, int(round(self.min_speech_ms / hop_ms)))
+        min_silence = max(0, int(round(self.min_silence_ms / hop_ms)))
+
+        # Supprimer les salves trop courtes (clics, bruits impulsionnels)
+        mask = mask.copy()
+        starts, ends = self._runs(mask)
+        for start, end in zip(starts, ends):
+            if end - start < min_speech:
+                mask[start:end] = False
+
+        # Hangover : chaque trame de parole prolonge l'état parole de `hangover` trames
+        if hangover:
+            counts = np.convolve(mask.astype(np.int32), np.ones(hangover + 1, dtype=np.int32))[:len(mask)]
+            mask = counts > 0
+
+        # Combler les silences trop courts entre deux segments
+        starts, ends = self._runs(~mask)
+        for start, end in zip(starts, ends):
+            if 0 < start and end < len(mask) and end - start < min_silence:
+                mask[start:end] = True
+
+        return mask
+
+    @staticmethod
+    def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Débuts et fins (exclues) des plages True d'un masque"""
+        padded = np.concatenate([[False], mask, [False]])
+        edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+        return edges[0::2], edges[1::2]
+
+    def detect(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        spectrogram: Optional[Spectrogram] = None
+    ) -> List[SpeechSegment]:
+        """
+        Détecte les segments de parole
+
+        Args:
+            spectrogram: STFT déjà calculée de `audio` (évite de la recalculer)
+
+        Returns:
+            Liste de SpeechSegment (positions en échantillons dans `audio`)
+        """
+        spec = self._spectrogram(audio, sr, spectrogram)
+        hop = spec.frontend.hop_length
+        half = spec.frontend.n_fft // 2
+        mask = self.speech_mask(audio, sr, spec)
+        starts, ends = self._runs(mask)
+        # La trame i est centrée sur l'échantillon i * hop
+        segments = [
+            SpeechSegment(int(max(0, start * hop - half)), int(min(len(audio), (end - 1) * hop + half)))
+            for start, end in zip(starts, ends)
+        ]
+        logger.debug(f"VAD: {len(segments)} segments de parole détectés")
+        return segments
+
+    def timeline(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        segments: Optional[List[SpeechSegment]] = None
+    ) -> SpeechTimeline:
+        """Construit la correspondance audio réduit <-> audio original"""
+        return SpeechTimeline(segments if segments is not None else self.detect(audio, sr), sr)
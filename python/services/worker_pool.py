@@ -0,0 +1,487 @@
+"""
+Pool de processus de travail pour les services d'inférence
+Chaque processus possède sa propre instance de service (ex: un modèle Whisper),
+ce qui permet un vrai parallélisme CPU sans verrou global partagé.
+"""
+
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import pickle
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait as wait_connections
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .metrics import REGISTRY
+from .profiling import capture_profile
+
+logger = logging.getLogger(__name__)
+
+# Messages échangés entre les workers et le processus parent
+_MSG_READY = "ready"
+_MSG_STARTED = "started"
+_MSG_DONE = "done"
+_MSG_INIT_FAILED = "init_failed"
+_MSG_METRICS = "metrics"
+_MSG_STATS = "stats"
+
+
+def _limit_threads(num_threads: int):
+    """Limite le nombre de threads de calcul d'un worker (évite la sur-souscription CPU)"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(num_threads)
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+def process_memory(pid: int) -> Optional[Dict[str, float]]:
+    """
+    Mémoire d'un processus en Mo (Linux, /proc/<pid>/smaps_rollup)
+
+    rss compte en entier les pages partagées avec d'autres processus (poids
+    mappés) ; pss les répartit entre eux : la somme des pss des workers est la
+    mémoire physique réellement occupée par le pool.
+
+    Returns:
+        rss, pss, shared, private ; None si l'information n'est pas disponible
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        return None
+    return {
+        "rss_mb": fields.get("Rss", 0.0),
+        "pss_mb": fields.get("Pss", 0.0),
+        "shared_mb": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+        "private_mb": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0)
+    }
+
+
+def _picklable_exception(exc: BaseException) -> BaseException:
+    """Retourne une exception transmissible au processus parent"""
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+def _send_metrics(worker_id: int, result_conn):
+    """Transmet au parent les métriques enregistrées depuis le dernier envoi"""
+    try:
+        deltas = REGISTRY.drain()
+        if deltas:
+            result_conn.send((_MSG_METRICS, worker_id, None, True, deltas, 0.0))
+    except Exception as e:
+        logger.debug(f"Métriques du worker {worker_id} non transmises: {e}")
+
+
+def _send_stats(worker_id: int, service, stats_method: Optional[str], result_conn):
+    """Transmet au parent les statistiques propres au service du worker (ex: cache)"""
+    if stats_method is None:
+        return
+    try:
+        result_conn.send((_MSG_STATS, worker_id, None, True, getattr(service, stats_method)(), 0.0))
+    except Exception as e:
+        logger.debug(f"Statistiques du worker {worker_id} non transmises: {e}")
+
+
+def _worker_main(
+    worker_id: int,
+    service_factory: Callable,
+    service_kwargs: Dict,
+    num_threads: int,
+    job_queue,
+    result_conn,
+    stats_method: Optional[str] = None
+):
+    """
+    Boucle principale d'un processus de travail
+
+    job_queue et result_conn sont propres à ce worker : mourir au milieu d'un
+    envoi ne bloque pas les autres workers sur un verrou partagé.
+    """
+    _limit_threads(num_threads)
+    try:
+        service = service_factory(**service_kwargs)
+    except BaseException as e:
+        result_conn.send((_MSG_INIT_FAILED, worker_id, None, False, _picklable_exception(e), 0.0))
+        return
+    result_conn.send((_MSG_READY, worker_id, None, True, None, 0.0))
+    _send_metrics(worker_id, result_conn)
+    _send_stats(worker_id, service, stats_method, result_conn)
+
+    while True:
+        job = job_queue.get()
+        if job is None:  # Sentinelle d'arrêt
+            break
+        job_id, method, args, kwargs, profile = job
+        result_conn.send((_MSG_STARTED, worker_id, job_id, True, None, 0.0))
+        start_time = time.perf_counter()
+        try:
+            # Profil demandé pour ce job seulement : (dossier, identifiant, étape)
+            with capture_profile(*profile) if profile is not None else nullcontext():
+                payload = getattr(service, method)(*args, **kwargs)
+            ok = True
+        except BaseException as e:
+            payload = _picklable_exception(e)
+            ok = False
+        elapsed = time.perf_counter() - start_time
+        try:
+            result_conn.send((_MSG_DONE, worker_id, job_id, ok, payload, elapsed))
+        except Exception as e:
+            # Résultat non sérialisable
+            result_conn.send((_MSG_DONE, worker_id, job_id, False, _picklable_exception(e), elapsed))
+        _send_metrics(worker_id, result_conn)
+        _send_stats(worker_id, service, stats_method, result_conn)
+
+
+class WorkerPool:
+    """
+    Pool de N processus alimentés par le processus parent
+
+    Le parent confie chaque job à un worker inactif, par la file propre à ce worker,
+    et note à qui il l'a confié avant de l'envoyer : le job d'un worker mort échoue
+    au lieu d'être perdu, quel que soit le moment de sa mort. Chaque worker répond
+    par son propre tube. Les méthodes du service
+    sont appelées par leur nom : pool.submit("transcribe", chemin, task="transcribe").
+    """
+
+    # Intervalle de vérification des workers morts (s)
+    CHECK_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        service_factory: Callable,
+        service_kwargs: Optional[Dict] = None,
+        num_workers: int = 2,
+        threads_per_worker: Optional[int] = None,
+        start_method: str = "spawn",
+        name: str = "worker",
+        stats_method: Optional[str] = None
+    ):
+        """
+        Args:
+            service_factory: Classe ou fonction (importable) construisant le service dans chaque worker
+            service_kwargs: Arguments passés à service_factory
+            num_workers: Nombre de processus de travail
+            threads_per_worker: Threads de calcul par worker (défaut: nb_coeurs / num_workers)
+            start_method: Méthode de démarrage multiprocessing ("spawn", "forkserver", "fork")
+            name: Nom du pool (logs et noms de processus)
+            stats_method: Méthode du service appelée dans chaque worker après chaque job
+                (statistiques propres au worker, voir get_worker_stats)
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers doit être >= 1")
+
+        self.service_factory = service_factory
+        self.service_kwargs = service_kwargs or {}
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+        self.name = name
+        self.stats_method = stats_method
+
+        self._ctx = mp.get_context(start_method)
+        self._job_queues: Dict[int, Any] = {}  # worker_id -> file du processus en cours
+        self._result_conns: Dict[int, Any] = {}  # worker_id -> tube de réponse du processus en cours
+        self._processes: Dict[int, Any] = {}
+
+        self._lock = threading.Lock()
+        self._futures: Dict[int, Future] = {}
+        self._job_ids = itertools.count()
+        self._pending: deque = deque()  # jobs en attente d'un worker inactif
+        self._running_jobs: Dict[int, int] = {}  # worker_id -> job_id confié
+        self._job_started_at: Dict[int, float] = {}  # worker_id -> début du job en cours
+        self._ready_workers = set()
+        self._idle_workers = set()
+        self._ready_event = threading.Event()
+        self._init_error: Optional[BaseException] = None
+        self._worker_stats: Dict[int, Any] = {}
+
+        self._completed = 0
+        self._failed = 0
+        self._busy_time = 0.0
+        self._started_at: Optional[float] = None
+        self._closed = False
+
+        self._collector: Optional[threading.Thread] = None
+
+    def start(self, wait: bool = True, timeout: Optional[float] = None):
+        """
+        Démarre les processus de travail
+
+        Args:
+            wait: Attendre que tous les workers aient initialisé leur service
+            timeout: Délai maximal d'attente (s)
+        """
+        logger.info(
+            f"Démarrage du pool {self.name}: {self.num_workers} workers "
+            f"x {self.threads_per_worker} threads"
+        )
+        self._started_at = time.perf_counter()
+        for worker_id in range(self.num_workers):
+            self._spawn_worker(worker_id)
+
+        self._collector = threading.Thread(
+            target=self._collect_results,
+            name=f"{self.name}-pool-collector",
+            daemon=True
+        )
+        self._collector.start()
+
+        if wait:
+            if not self._ready_event.wait(timeout):
+                raise TimeoutError(f"Pool {self.name}: workers non prêts après {timeout}s")
+            if self._init_error is not None:
+                self.shutdown()
+                raise RuntimeError(f"Échec d'initialisation du pool {self.name}") from self._init_error
+
+    def _spawn_worker(self, worker_id: int):
+        # Nouvelles file et tube à chaque lancement : rien n'y reste d'un worker mort
+        job_queue = self._ctx.Queue()
+        result_reader, result_writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                self.service_factory,
+                self.service_kwargs,
+                self.threads_per_worker,
+                job_queue,
+                result_writer,
+                self.stats_method
+            ),
+            name=f"{self.name}-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        # Seul le worker garde l'extrémité d'écriture : sa mort ferme le tube (EOF)
+        result_writer.close()
+        with self._lock:
+            self._job_queues[worker_id] = job_queue
+            self._result_conns[worker_id] = result_reader
+        self._processes[worker_id] = process
+
+    def _dispatch(self):
+        """Confie les jobs en attente aux workers inactifs (appelé sous self._lock)"""
+        while self._pending and self._idle_workers:
+            worker_id = self._idle_workers.pop()
+            job = self._pending.popleft()
+            # Attribution notée avant l'envoi : le parent sait toujours qui détient le job
+            self._running_jobs[worker_id] = job[0]
+            self._job_queues[worker_id].put(job)
+
+    def submit(self, method: str, *args, profile: Optional[Tuple[str, str, str]] = None, **kwargs) -> Future:
+        """
+        Place un job en file ; il part vers le premier worker inactif
+
+        Args:
+            profile: (dossier, identifiant, étape) pour profiler ce job dans le worker
+                (voir profiling.capture_profile)
+
+        Returns:
+            concurrent.futures.Future résolu avec le retour de service.<method>(*args, **kwargs)
+        """
+        if self._closed:
+            raise RuntimeError(f"Pool {self.name} arrêté")
+
+        future: Future = Future()
+        with self._lock:
+            job_id = next(self._job_ids)
+            self._futures[job_id] = future
+            self._pending.append((job_id, method, args, kwargs, profile))
+            self._dispatch()
+        return future
+
+    def call(self, method: str, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Version bloquante de submit()"""
+        return self.submit(method, *args, **kwargs).result(timeout=timeout)
+
+    def _collect_results(self):
+        """Thread du parent : reçoit les messages des workers et résout les futures"""
+        last_check = time.perf_counter()
+        while not self._closed:
+            # Vérification périodique, même quand les résultats arrivent sans
+            # interruption : un worker mort sous charge est détecté et relancé
+            now = time.perf_counter()
+            if now - last_check >= self.CHECK_INTERVAL:
+                self._check_workers()
+                last_check = now
+            with self._lock:
+                connections = list(self._result_conns.items())
+            try:
+                ready = wait_connections([conn for _, conn in connections], timeout=self.CHECK_INTERVAL)
+            except OSError:
+                break
+            for worker_id, conn in connections:
+                if conn in ready:
+                    self._receive(worker_id, conn)
+
+    def _receive(self, worker_id: int, conn) -> bool:
+        """Traite un message du tube d'un worker ; False (tube retiré) s'il est fermé"""
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            # Worker mort : _check_workers fait échouer son job et le relance
+            with self._lock:
+                if self._result_conns.get(worker_id) is conn:
+                    del self._result_conns[worker_id]
+            conn.close()
+            return False
+        self._handle_message(*message)
+        return True
+
+    def _handle_message(self, kind: str, worker_id: int, job_id: Optional[int], ok: bool, payload: Any,
+                        elapsed: float):
+        if kind == _MSG_METRICS:
+            # Durées d'étapes mesurées dans le worker : exposées par /metrics du parent
+            REGISTRY.merge(payload)
+            return
+        if kind == _MSG_STATS:
+            with self._lock:
+                self._worker_stats[worker_id] = payload
+            return
+
+        future = None
+        with self._lock:
+            if kind == _MSG_READY:
+                self._ready_workers.add(worker_id)
+                self._idle_workers.add(worker_id)
+                if len(self._ready_workers) == self.num_workers:
+                    self._ready_event.set()
+                self._dispatch()
+            elif kind == _MSG_INIT_FAILED:
+                logger.error(f"Pool {self.name}: échec d'initialisation du worker {worker_id}: {payload}")
+                self._init_error = payload
+                self._ready_event.set()
+            elif self._running_jobs.get(worker_id) != job_id:
+                # Job d'un worker mort, déjà traité par _check_workers
+                logger.debug(f"Pool {self.name}: message {kind} périmé du worker {worker_id} ignoré")
+            elif kind == _MSG_STARTED:
+                self._job_started_at[worker_id] = time.perf_counter()
+            elif kind == _MSG_DONE:
+                del self._running_jobs[worker_id]
+                self._job_started_at.pop(worker_id, None)
+                self._idle_workers.add(worker_id)
+                self._busy_time += elapsed
+                if ok:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                future = self._futures.pop(job_id, None)
+                self._dispatch()
+
+        if future is not None and not future.done():
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(payload)
+
+    def _check_workers(self):
+        """Détecte les workers morts, fait échouer leur job en cours et les relance"""
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive() or self._closed:
+                continue
+            # Messages envoyés avant la mort (ex: résultat du dernier job) : le
+            # processus est terminé, son tube se vide sans attente jusqu'à EOF
+            with self._lock:
+                conn = self._result_conns.get(worker_id)
+            while conn is not None and conn.poll() and self._receive(worker_id, conn):
+                pass
+            with self._lock:
+                # Job confié au worker, qu'il l'ait commencé ou non
+                job_id = self._running_jobs.pop(worker_id, None)
+                self._job_started_at.pop(worker_id, None)
+                self._ready_workers.discard(worker_id)
+                self._idle_workers.discard(worker_id)
+                future = self._futures.pop(job_id, None) if job_id is not None else None
+                if future is not None:
+                    self._failed += 1
+            if future is not None and not future.done():
+                future.set_exception(RuntimeError(
+                    f"Worker {worker_id} du pool {self.name} arrêté (code {process.exitcode})"
+                ))
+            if self._init_error is not None:
+                continue
+            logger.warning(f"Pool {self.name}: worker {worker_id} arrêté (code {process.exitcode}), relance...")
+            self._spawn_worker(worker_id)
+
+    def get_stats(self) -> Dict:
+        """Retourne la profondeur de file et l'utilisation des workers"""
+        with self._lock:
+            now = time.perf_counter()
+            busy_workers = len(self._running_jobs)
+            queued = len(self._pending)
+            in_progress = sum(now - started for started in self._job_started_at.values())
+            uptime = now - self._started_at if self._started_at else 0.0
+            capacity = uptime * self.num_workers
+            return {
+                "workers": self.num_workers,
+                "ready_workers": len(self._ready_workers),
+                "threads_per_worker": self.threads_per_worker,
+                "queue_depth": queued,
+                "busy_workers": busy_workers,
+                "idle_workers": self.num_workers - busy_workers,
+                "utilization": (self._busy_time + in_progress) / capacity if capacity > 0 else 0.0,
+                "current_utilization": busy_workers / self.num_workers,
+                "jobs_completed": self._completed,
+                "jobs_failed": self._failed,
+                "uptime": uptime
+            }
+
+    def get_worker_stats(self) -> Dict[int, Any]:
+        """Dernières statistiques transmises par chaque worker (voir stats_method)"""
+        with self._lock:
+            return dict(self._worker_stats)
+
+    def get_memory(self) -> Dict:
+        """
+        Mémoire de chaque worker (voir process_memory) et totaux du pool
+
+        Avec des poids partagés (checkpoint mappé), total_pss_mb reste proche d'une
+        seule copie du modèle alors que total_rss_mb la compte une fois par worker.
+        """
+        workers = {}
+        for worker_id, process in list(self._processes.items()):
+            memory = process_memory(process.pid) if process.is_alive() else None
+            if memory is not None:
+                workers[worker_id] = {"pid": process.pid, **memory}
+        return {
+            "workers": workers,
+            "total_rss_mb": sum(memory["rss_mb"] for memory in workers.values()),
+            "total_pss_mb": sum(memory["pss_mb"] for memory in workers.values())
+        }
+
+    def shutdown(self, timeout: float = 10.0):
+        """Arrête les workers (les jobs encore en file sont annulés)"""
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            job_queues = list(self._job_queues.values())
+        for job_queue in job_queues:
+            job_queue.put(None)
+        for process in self._processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        with self._lock:
+            pending = list(self._futures.values())
+            self._futures.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError(f"Pool {self.name} arrêté"))
+        logger.info(f"Pool {self.name} arrêté")
@@ -0,0 +1,9 @@
+"""
+Configuration des tests (depuis le dossier python/ : python -m pytest)
+Les services sont importés comme par l'API, depuis la racine python/.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,110 @@
+"""
+Transcription en lot (SpeechToTextService.transcribe_batch, MicroBatchScheduler)
+Modèle Whisper réduit à poids aléatoires : le texte n'a pas de sens, seule la
+cohérence entre décodage en lot et décodage extrait par extrait est vérifiée.
+"""
+
+import time
+
+import numpy as np
+import pytest
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+from services.batch_scheduler import MicroBatchScheduler
+from services.speech_to_text import SpeechToTextService
+
+# Graphe de Whisper avec une couche et un contexte texte court (16 jetons générés au plus)
+SMALL_DIMS = ModelDimensions(
+    n_mels=80,
+    n_audio_ctx=1500,
+    n_audio_state=64,
+    n_audio_head=2,
+    n_audio_layer=1,
+    n_vocab=51865,
+    n_text_ctx=32,
+    n_text_state=64,
+    n_text_head=2,
+    n_text_layer=1
+)
+
+
+class SmallSpeechToTextService(SpeechToTextService):
+    def _load_model(self):
+        torch.manual_seed(0)
+        self.model = Whisper(SMALL_DIMS).to(self.device).eval()
+
+
+@pytest.fixture(scope="module")
+def service():
+    return SmallSpeechToTextService(device="cpu", language="en", preprocess=False)
+
+
+def clips(count: int):
+    rng = np.random.default_rng(0)
+    return [(0.1 * rng.standard_normal(16000 + 4000 * i)).astype(np.float32) for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [2, 3])
+def test_batch_with_default_beam_search(service, count):
+    audio = clips(count)
+    batch = service.transcribe_batch(audio)
+
+    assert all(isinstance(result, dict) for result in batch), batch
+    for result, clip in zip(batch, audio):
+        single = service.transcribe_batch([clip])[0]
+        assert result["text"] == single["text"]
+        assert result["batch_size"] == count
+
+
+def test_greedy_batch_matches_single_clips(service):
+    audio = clips(2)
+    batch = service.transcribe_batch(audio, beam_size=1)
+
+    assert [result["text"] for result in batch] == [
+        service.transcribe_batch([clip], beam_size=1)[0]["text"] for clip in audio
+    ]
+
+
+def test_scheduler_batches_concurrent_requests(service):
+    scheduler = MicroBatchScheduler(service, window_ms=200, max_batch_size=4)
+    scheduler.start()
+    try:
+        futures = [scheduler.submit(clip, beam_size=5) for clip in clips(3)]
+        results = [future.result(timeout=120) for future in futures]
+    finally:
+        scheduler.shutdown()
+
+    assert all(result["batch_size"] == 3 for result in results)
+    assert scheduler.get_stats()["batches"] == 1
+
+
+def test_scheduler_groups_by_options(service):
+    scheduler = MicroBatchScheduler(service, window_ms=200, max_batch_size=4)
+    scheduler.start()
+    try:
+        audio = clips(2)
+        futures = [scheduler.submit(audio[0], beam_size=1), scheduler.submit(audio[1], beam_size=5)]
+        results = [future.result(timeout=120) for future in futures]
+    finally:
+        scheduler.shutdown()
+
+    assert [result["batch_size"] for result in results] == [1, 1]
+
+
+def test_scheduler_rejects_pending_on_shutdown():
+    class SlowService:
+        def transcribe_batch(self, audio_arrays, **options):
+            time.sleep(0.3)
+            return [{"text": ""} for _ in audio_arrays]
+
+    scheduler = MicroBatchScheduler(SlowService(), window_ms=0, max_batch_size=1)
+    scheduler.start()
+    first = scheduler.submit(np.ones(16000, dtype=np.float32))
+    time.sleep(0.05)
+    second = scheduler.submit(np.ones(16000, dtype=np.float32))
+    scheduler.shutdown()
+
+    assert first.result(timeout=5) == {"text": ""}
+    with pytest.raises(RuntimeError):
+        second.result(timeout=5)
@@ -0,0 +1,85 @@
+"""
+BoundedExecutor : limite de concurrence, file bornée et rejet immédiat
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.inference_executor import BoundedExecutor, QueueFullError
+
+
+def test_concurrency_is_limited():
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def work(value):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return value * 2
+
+    async def scenario():
+        executor = BoundedExecutor(max_concurrency=2, max_queue=8, name="test")
+        try:
+            return await asyncio.gather(*(executor.run(work, i) for i in range(6))), executor.get_stats()
+        finally:
+            executor.shutdown()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert peak == 2
+    assert stats["completed"] == 6
+    assert stats["in_flight"] == 0
+
+
+def test_full_queue_rejects_then_waiting_call_gets_through():
+    release = threading.Event()
+
+    async def scenario():
+        executor = BoundedExecutor(max_concurrency=1, max_queue=1, name="test")
+        try:
+            running = asyncio.create_task(executor.run(release.wait, 5))
+            queued = asyncio.create_task(executor.run(lambda: "en file"))
+            await asyncio.sleep(0.05)
+            with pytest.raises(QueueFullError) as excinfo:
+                await executor.run(lambda: "rejeté")
+            assert excinfo.value.retry_after >= 1
+            assert executor.get_stats()["queued"] == 1
+
+            waiting = asyncio.create_task(executor.run_waiting(lambda: "attendu"))
+            await asyncio.sleep(0.05)
+            assert not waiting.done()
+            release.set()
+            return await asyncio.gather(running, queued, waiting), executor.get_stats()
+        finally:
+            release.set()
+            executor.shutdown()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [True, "en file", "attendu"]
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 3
+
+
+def test_exceptions_propagate_and_free_the_slot():
+    def fail():
+        raise ValueError("échec")
+
+    async def scenario():
+        executor = BoundedExecutor(max_concurrency=1, max_queue=0, name="test")
+        try:
+            with pytest.raises(ValueError):
+                await executor.run(fail)
+            return await executor.run(lambda: "suivant")
+        finally:
+            executor.shutdown()
+
+    assert asyncio.run(scenario()) == "suivant"
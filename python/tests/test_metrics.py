@@ -0,0 +1,51 @@
+"""
+Registre de métriques : types, export texte et fusion des mesures des workers
+"""
+
+import pytest
+
+from services.metrics import Counter, Histogram, Metric, MetricsRegistry
+
+
+def test_metric_requires_samples():
+    with pytest.raises(TypeError):
+        Metric("test_untyped", "sans échantillons")
+
+    class Incomplete(Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("test_incomplete", "sans échantillons")
+
+
+def test_counter_drain_and_merge():
+    worker = Counter("test_requests_total", "Requêtes", ("route",))
+    parent = Counter("test_requests_total", "Requêtes", ("route",))
+    worker.inc(route="/a")
+    worker.inc(2, route="/a")
+
+    parent.merge(worker.drain())
+    assert worker.drain() == {}
+    worker.inc(route="/a")
+    parent.merge(worker.drain())
+
+    assert parent.samples() == ['test_requests_total{route="/a"} 4.0']
+
+
+def test_histogram_render():
+    histogram = Histogram("test_seconds", "Durées", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="decode")
+    histogram.observe(0.5, stage="decode")
+
+    text = histogram.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{stage="decode",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="decode",le="+Inf"} 2' in text
+    assert 'test_seconds_count{stage="decode"} 2' in text
+
+
+def test_registry_rejects_conflicting_types():
+    registry = MetricsRegistry()
+    registry.counter("test_conflict", "Compteur")
+    with pytest.raises(ValueError):
+        registry.gauge("test_conflict", "Jauge")
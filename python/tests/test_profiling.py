@@ -0,0 +1,98 @@
+"""
+Profilage à la demande (capture_profile, RequestProfiler)
+"""
+
+import cProfile
+import threading
+import time
+
+import pytest
+
+from services import profiling
+from services.profiling import RequestProfiler, capture_profile
+
+
+def busy(seconds: float = 0.01):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_capture_writes_profile(tmp_path):
+    with capture_profile(str(tmp_path), "p1", "stage"):
+        busy()
+
+    files = sorted(path.name for path in (tmp_path / "p1").iterdir())
+    assert "stage.pstats" in files and "stage.txt" in files
+
+
+def test_capture_survives_exception_in_block(tmp_path):
+    with pytest.raises(RuntimeError):
+        with capture_profile(str(tmp_path), "p1", "stage"):
+            raise RuntimeError("échec")
+
+    assert (tmp_path / "p1" / "stage.txt").exists()
+    assert not profiling._CAPTURE_LOCK.locked()
+
+
+def test_capture_releases_lock_when_cprofile_unavailable(tmp_path, monkeypatch):
+    class ActiveProfiler(cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", ActiveProfiler)
+    with capture_profile(str(tmp_path), "p1", "stage"):
+        busy()
+    assert not profiling._CAPTURE_LOCK.locked()
+
+    monkeypatch.undo()
+    with capture_profile(str(tmp_path), "p2", "stage"):
+        busy()
+    assert (tmp_path / "p2" / "stage.pstats").exists()
+
+
+def test_nested_capture_does_not_deadlock(tmp_path):
+    with capture_profile(str(tmp_path), "p1", "outer"):
+        with capture_profile(str(tmp_path), "p1", "inner"):
+            busy()
+
+    assert (tmp_path / "p1" / "outer.txt").exists()
+    assert not (tmp_path / "p1" / "inner.txt").exists()
+
+
+def test_concurrent_captures_are_serialized(tmp_path):
+    spans = []
+
+    def job(index: int):
+        with capture_profile(str(tmp_path), f"p{index}", "stage"):
+            start = time.perf_counter()
+            time.sleep(0.1)
+            spans.append((start, time.perf_counter()))
+
+    threads = [threading.Thread(target=job, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    first, second = sorted(spans)
+    assert first[1] <= second[0]
+    assert all((tmp_path / f"p{i}" / "stage.pstats").exists() for i in range(2))
+
+
+def test_profiling_disabled_without_token(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), sample_rate=1.0)
+
+    assert not profiler.should_profile("1")
+    assert not profiler.should_profile(None)
+    assert not profiler.authorize("1")
+
+
+def test_profiling_requires_matching_token(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), token="secret")
+
+    assert profiler.should_profile("secret")
+    assert not profiler.should_profile("1")
+    assert not profiler.should_profile(None)
+    assert profiler.authorize("secret")
+    assert not profiler.authorize("")
@@ -0,0 +1,71 @@
+"""
+ResultCache : niveau mémoire LRU, niveau disque et statistiques
+"""
+
+from services.result_cache import ResultCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" redevient la plus récente
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert (stats["memory_hits"], stats["misses"]) == (3, 1)
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    ResultCache(max_entries=4, disk_dir=str(tmp_path)).put("clé", {"text": "bonjour"})
+
+    cache = ResultCache(max_entries=4, disk_dir=str(tmp_path))
+    assert "clé" in cache
+    assert cache.get("clé") == {"text": "bonjour"}  # lu sur disque puis gardé en mémoire
+    assert cache.get("clé") == {"text": "bonjour"}
+    stats = cache.get_stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+    assert stats["hit_rate"] == 1.0
+
+
+def test_disk_only_cache(tmp_path):
+    cache = ResultCache(max_entries=0, disk_dir=str(tmp_path))
+    cache.put("k", [1, 2])
+    assert cache.get_stats()["entries"] == 0
+    assert cache.get("k") == [1, 2]
+    assert cache.get_stats()["disk_hits"] == 1
+
+
+def test_unreadable_disk_entry_is_a_miss(tmp_path):
+    cache = ResultCache(max_entries=0, disk_dir=str(tmp_path))
+    key = ResultCache.make_key("audio", 1)
+    cache.put(key, "ok")
+    cache._disk_path(key).write_bytes(b"{tronqu")
+
+    assert cache.get(key) is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_make_key_is_stable():
+    assert ResultCache.make_key({"a": 1, "b": 2}, "x") == ResultCache.make_key({"b": 2, "a": 1}, "x")
+    assert ResultCache.make_key("x", 1) != ResultCache.make_key("x", 2)
+
+
+def test_merge_stats_adds_worker_counters():
+    first = ResultCache(max_entries=4)
+    second = ResultCache(max_entries=4)
+    first.put("a", 1)
+    first.get("a")
+    second.get("a")
+
+    merged = ResultCache.merge_stats([first.get_stats(), second.get_stats()])
+    assert merged["entries"] == 1
+    assert merged["max_entries"] == 8
+    assert (merged["hits"], merged["misses"]) == (1, 1)
+    assert merged["hit_rate"] == 0.5
+    assert ResultCache.merge_stats([])["hit_rate"] == 0.0
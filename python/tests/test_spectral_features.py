@@ -0,0 +1,77 @@
+"""
+Caractéristiques du front-end spectral comparées à librosa et à Whisper
+"""
+
+import numpy as np
+import pytest
+
+librosa = pytest.importorskip("librosa")
+
+from services.audio_preprocessor import AudioPreprocessor
+from services.spectral_frontend import WHISPER_HOP_LENGTH, WHISPER_N_FFT, SpectralFrontend
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def audio():
+    # Signal non nul aux deux bords : c'est là que réflexion et zéros diffèrent
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    signal = 0.5 * np.sin(2 * np.pi * 220 * t) + 0.1 * rng.standard_normal(len(t))
+    return signal.astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def preprocessor():
+    return AudioPreprocessor(noise_reduction=False, vad_enabled=False)
+
+
+def test_mfcc_matches_librosa(audio, preprocessor):
+    expected = librosa.feature.mfcc(y=audio, sr=SAMPLE_RATE, n_mfcc=13)
+    mfcc = preprocessor.extract_mfcc(audio, SAMPLE_RATE)
+
+    assert mfcc.shape == expected.shape
+    np.testing.assert_allclose(mfcc[:, [0, -1]], expected[:, [0, -1]], atol=0.05)
+    np.testing.assert_allclose(mfcc, expected, atol=0.05)
+
+
+def test_log_mel_matches_librosa(audio, preprocessor):
+    mel = librosa.feature.melspectrogram(y=audio, sr=SAMPLE_RATE, n_mels=80)
+    expected = librosa.power_to_db(mel, ref=np.max)
+    log_mel = preprocessor.extract_log_mel_spectrogram(audio, SAMPLE_RATE)
+
+    assert log_mel.shape == expected.shape
+    np.testing.assert_allclose(log_mel[:, [0, -1]], expected[:, [0, -1]], atol=0.01)
+    np.testing.assert_allclose(log_mel, expected, atol=0.01)
+
+
+def test_batch_features_match_single_clip(audio, preprocessor):
+    clips = [audio, audio[:5000], audio[:100]]
+    packed = preprocessor.extract_features_batch(clips, SAMPLE_RATE, kind="mfcc")
+
+    for clip, features in zip(clips, packed):
+        expected = preprocessor.extract_mfcc(
+            clip, SAMPLE_RATE, n_fft=WHISPER_N_FFT, hop_length=WHISPER_HOP_LENGTH, n_mels=80
+        )
+        np.testing.assert_allclose(features.T, expected, atol=1e-3)
+
+
+def test_whisper_log_mel_matches_whisper(audio):
+    whisper = pytest.importorskip("whisper")
+    expected = whisper.log_mel_spectrogram(audio).numpy()
+    log_mel = SpectralFrontend.get(SAMPLE_RATE).analyze(audio).whisper_log_mel()
+
+    assert log_mel.shape == expected.shape
+    np.testing.assert_allclose(log_mel, expected, atol=1e-3)
+
+
+def test_frontend_shared_for_equivalent_parameters():
+    frontend = SpectralFrontend.get(SAMPLE_RATE)
+    assert SpectralFrontend.get(SAMPLE_RATE, WHISPER_N_FFT, WHISPER_HOP_LENGTH) is frontend
+    assert SpectralFrontend.get(SAMPLE_RATE, 2048, 512) is not frontend
+
+
+def test_analyze_rejects_unknown_pad_mode(audio):
+    with pytest.raises(ValueError):
+        SpectralFrontend.get(SAMPLE_RATE).analyze(audio, pad_mode="edge")
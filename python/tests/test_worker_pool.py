@@ -0,0 +1,114 @@
+"""
+WorkerPool : attribution des jobs et reprise après la mort d'un worker
+"""
+
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from services.worker_pool import _MSG_STARTED, WorkerPool
+
+
+class EchoService:
+    """Service minimal importable par les workers (démarrage spawn)"""
+
+    def echo(self, value):
+        return value
+
+    def pid(self) -> int:
+        return os.getpid()
+
+    def fail(self):
+        raise ValueError("échec du service")
+
+    def sleep(self, seconds: float) -> float:
+        time.sleep(seconds)
+        return seconds
+
+    def echo_then_exit(self, value):
+        """Répond puis termine le processus juste après l'envoi du résultat"""
+        threading.Timer(0.2, os._exit, (3,)).start()
+        return value
+
+
+def wait_until(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("condition non atteinte")
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(EchoService, num_workers=1, threads_per_worker=1, name="test")
+    pool.start(timeout=60)
+    yield pool
+    pool.shutdown(timeout=5)
+
+
+def test_results_and_errors_reach_the_caller(pool):
+    assert pool.call("echo", {"a": 1}, timeout=30) == {"a": 1}
+    with pytest.raises(ValueError, match="échec du service"):
+        pool.call("fail", timeout=30)
+    stats = pool.get_stats()
+    assert (stats["jobs_completed"], stats["jobs_failed"]) == (1, 1)
+
+
+def test_worker_killed_mid_job_is_respawned(pool):
+    old_pid = pool.call("pid", timeout=30)
+    running = pool.submit("sleep", 60)
+    queued = pool.submit("pid")
+    wait_until(lambda: 0 in pool._job_started_at)
+    assert pool.get_stats()["queue_depth"] == 1
+    os.kill(old_pid, signal.SIGKILL)
+
+    with pytest.raises(RuntimeError, match="arrêté"):
+        running.result(timeout=10)
+    # Le job en attente part vers le worker relancé
+    new_pid = queued.result(timeout=60)
+    assert new_pid != old_pid
+    stats = pool.get_stats()
+    assert stats["ready_workers"] == 1
+    assert stats["jobs_failed"] == 1
+
+
+def test_job_taken_by_a_dying_worker_fails(pool):
+    process = pool._processes[0]
+    # Le worker ne peut plus lire sa file : le job lui est confié sans être commencé
+    os.kill(process.pid, signal.SIGSTOP)
+    future = pool.submit("echo", "perdu ?")
+    assert pool.get_stats()["busy_workers"] == 1
+    os.kill(process.pid, signal.SIGKILL)
+
+    with pytest.raises(RuntimeError, match="arrêté"):
+        future.result(timeout=10)
+    assert pool.call("echo", "ok", timeout=60) == "ok"
+
+
+def test_stale_started_message_is_ignored(pool):
+    future = pool.submit("sleep", 60)
+    wait_until(lambda: pool.get_stats()["busy_workers"] == 1)
+    job_id = pool._running_jobs[0]
+    os.kill(pool._processes[0].pid, signal.SIGKILL)
+    with pytest.raises(RuntimeError):
+        future.result(timeout=10)
+
+    # "started" du worker mort traité après sa mort
+    pool._handle_message(_MSG_STARTED, 0, job_id, True, None, 0.0)
+    assert pool.call("echo", 1, timeout=60) == 1
+    stats = pool.get_stats()
+    assert stats["busy_workers"] == 0
+    assert stats["queue_depth"] == 0
+
+
+def test_result_sent_before_death_is_delivered(pool):
+    process = pool._processes[0]
+    assert pool.call("echo_then_exit", "livré", timeout=10) == "livré"
+    # Relance du worker avant le job suivant (sinon il lui serait confié et échouerait)
+    wait_until(lambda: pool._processes[0] is not process and pool.get_stats()["ready_workers"] == 1)
+    assert pool.call("echo", "relancé", timeout=60) == "relancé"
+    assert pool.get_stats()["jobs_failed"] == 0